@@ -0,0 +1,465 @@
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+import numpy as np
+import database
+from database import DB_FETCH_SIZE, close_pool, get_read_conn, init_db, sale_horizon
+
+EXPORT_DIR = "export"
+SNAPSHOT_DIR = os.getenv("REPORT_SNAPSHOT_DIR", "export/snapshot")
+SNAPSHOT_FORMAT = 3
+EPOCH = np.datetime64("1970-01-01", "D")
+
+SALE_COLUMNS = [
+    ("id", ">i4", np.int32),
+    ("day", ">i4", np.int32),
+    ("book_id", ">i4", np.int32),
+    ("employee_id", ">i4", np.int32),
+    ("quantity", ">i4", np.int32),
+    ("cents", ">i8", np.int64),
+]
+
+SALE_COPY_SQL = """
+    COPY (
+        SELECT id, sale_date - DATE '1970-01-01', book_id, employee_id, quantity_sold,
+               round(real_price * 100)::int8
+        FROM sale
+        WHERE is_deleted = FALSE AND {where}
+    ) TO STDOUT WITH (FORMAT binary)
+"""
+
+ADDED_SALES = "created_xid >= %(from_xid)s::text::xid8 AND created_xid < %(to_xid)s::text::xid8"
+CHANGED_SALES = ("changed_xid >= %(from_xid)s::text::xid8 AND changed_xid < %(to_xid)s::text::xid8 "
+                 "AND created_xid < %(from_xid)s::text::xid8")
+
+SALE_PARTITIONS_SQL = "SELECT inhrelid::bigint FROM pg_inherits WHERE inhparent = 'sale'::regclass ORDER BY 1;"
+
+COPY_BINARY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+COPY_BINARY_HEADER = 19
+COPY_BINARY_TRAILER = b"\xff\xff"
+COPY_PARSE_BYTES = 8 << 20
+
+
+def _record_dtype(columns) -> np.dtype:
+    spec = [("fields", ">i2")]
+    for name, wire, _ in columns:
+        spec += [(f"{name}_len", ">i4"), (name, wire)]
+    return np.dtype(spec)
+
+
+SALE_RECORD = _record_dtype(SALE_COLUMNS)
+
+
+def _empty_columns() -> dict:
+    return {name: np.empty(0, dtype=native) for name, _, native in SALE_COLUMNS}
+
+
+def _parse_records(buffer: bytearray, count: int, out: dict):
+    records = np.frombuffer(buffer, dtype=SALE_RECORD, count=count)
+    if (records["fields"] != len(SALE_COLUMNS)).any():
+        raise ValueError("Неочікуваний формат COPY для знімка продажів.")
+    for name, wire, _ in SALE_COLUMNS:
+        if (records[f"{name}_len"] != np.dtype(wire).itemsize).any():
+            raise ValueError(f"Неочікуваний формат COPY для знімка продажів (колонка {name}).")
+    for name, _, native in SALE_COLUMNS:
+        out[name].append(records[name].astype(native))
+    del records
+    del buffer[:count * SALE_RECORD.itemsize]
+
+
+def _parse_copy(chunks) -> dict:
+    parts = {name: [] for name, _, _ in SALE_COLUMNS}
+    buffer = bytearray()
+    header = True
+    for data in chunks:
+        buffer += data
+        if header and len(buffer) >= COPY_BINARY_HEADER:
+            if (not buffer.startswith(COPY_BINARY_SIGNATURE)
+                    or int.from_bytes(buffer[15:COPY_BINARY_HEADER], "big") != 0):
+                raise ValueError("Неочікуваний заголовок COPY для знімка продажів.")
+            del buffer[:COPY_BINARY_HEADER]
+            header = False
+        if not header and len(buffer) >= COPY_PARSE_BYTES:
+            _parse_records(buffer, len(buffer) // SALE_RECORD.itemsize, parts)
+    if header:
+        raise ValueError("Неочікуваний заголовок COPY для знімка продажів.")
+    _parse_records(buffer, max(len(buffer) - len(COPY_BINARY_TRAILER), 0) // SALE_RECORD.itemsize, parts)
+    if buffer != COPY_BINARY_TRAILER:
+        raise ValueError("Неочікуваний кінець COPY для знімка продажів.")
+    return {name: np.concatenate(values) for name, values in parts.items()}
+
+
+def _copy_sales(cur, where: str, params: dict) -> dict:
+    with cur.copy(SALE_COPY_SQL.format(where=where), params) as copy:
+        return _parse_copy(copy)
+
+
+def _day(value: str) -> int:
+    return int(np.datetime64(datetime.strptime(value, "%Y-%m-%d").date(), "D").astype(np.int64))
+
+
+def _money(cents) -> Decimal:
+    return Decimal(int(round(cents))).scaleb(-2)
+
+
+def _dense(size: int, ids: np.ndarray, codes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    labels, inverse = np.unique(codes, return_inverse=True)
+    dense = np.full(size, -1, dtype=np.int32)
+    dense[ids] = inverse
+    return dense, labels.astype(np.int32)
+
+
+class MappedStrings:
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, code: int) -> str:
+        return self.blob[self.offsets[code]:self.offsets[code + 1]].tobytes().decode("utf-8")
+
+
+def _check_snapshot_path(path: str):
+    export_dir = os.path.realpath(EXPORT_DIR)
+    target = os.path.realpath(path)
+    if target == export_dir or os.path.commonpath([target, export_dir]) != export_dir:
+        raise ValueError(f"Знімок зберігається лише в підкаталозі {EXPORT_DIR}/: {path}")
+    if not os.path.exists(path):
+        return
+    try:
+        with open(f"{path}/meta.json", encoding="utf-8") as f:
+            snapshot_format = json.load(f).get("format")
+    except (OSError, ValueError, AttributeError):
+        snapshot_format = None
+    if snapshot_format not in range(1, SNAPSHOT_FORMAT + 1):
+        raise ValueError(f"{path} існує і не є знімком продажів — не перезаписую.")
+
+
+class SalesSnapshot:
+    def __init__(self):
+        self.columns = _empty_columns()
+        self.dims = {}
+        self.strings = []
+        self.horizon = 0
+        self.partitions = []
+        self.refreshed_at = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.columns["id"])
+
+    def _label(self, code) -> str | None:
+        return None if code < 0 else self.strings[int(code)]
+
+    def _dim_label(self, dim: str, key: int) -> str | None:
+        values = self.dims[dim]
+        return self._label(values[key]) if 0 <= key < len(values) else None
+
+    def save(self, path: str = SNAPSHOT_DIR) -> str:
+        _check_snapshot_path(path)
+        tmp = path + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for name, values in self.columns.items():
+            np.save(f"{tmp}/sale_{name}.npy", values)
+        for name, values in self.dims.items():
+            np.save(f"{tmp}/{name}.npy", values)
+
+        encoded = [value.encode("utf-8") for value in self.strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        np.save(f"{tmp}/strings_offsets.npy", offsets)
+        with open(f"{tmp}/strings.bin", "wb") as f:
+            f.write(b"".join(encoded))
+
+        with open(f"{tmp}/meta.json", "w", encoding="utf-8") as f:
+            json.dump({
+                "format": SNAPSHOT_FORMAT,
+                "database": database.DB_NAME,
+                "sales": len(self),
+                "horizon": self.horizon,
+                "partitions": self.partitions,
+                "refreshed_at": self.refreshed_at.isoformat(timespec="seconds"),
+                "columns": list(self.columns),
+                "dims": list(self.dims),
+            }, f, ensure_ascii=False, indent=2)
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def open(cls, path: str = SNAPSHOT_DIR) -> "SalesSnapshot":
+        with open(f"{path}/meta.json", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["format"] != SNAPSHOT_FORMAT:
+            raise ValueError(f"Непідтримуваний формат знімка: {meta['format']}")
+
+        snapshot = cls()
+        snapshot.columns = {name: np.load(f"{path}/sale_{name}.npy", mmap_mode="r") for name in meta["columns"]}
+        snapshot.dims = {name: np.load(f"{path}/{name}.npy", mmap_mode="r") for name in meta["dims"]}
+        offsets = np.load(f"{path}/strings_offsets.npy", mmap_mode="r")
+        blob = (np.memmap(f"{path}/strings.bin", dtype=np.uint8, mode="r")
+                if offsets[-1] else np.empty(0, dtype=np.uint8))
+        snapshot.strings = MappedStrings(offsets, blob)
+        snapshot.horizon = meta["horizon"]
+        snapshot.partitions = meta["partitions"]
+        snapshot.refreshed_at = datetime.fromisoformat(meta["refreshed_at"])
+        return snapshot
+
+    def _load_dimensions(self, cur):
+        strings = {}
+
+        def code(value) -> int:
+            return -1 if value is None else strings.setdefault(value, len(strings))
+
+        cur.execute("SELECT id, title, author, genre, round(cost_price * 100)::int8 FROM book ORDER BY id;")
+        books = cur.fetchall()
+        size = (books[-1][0] + 1) if books else 1
+        ids = np.array([b[0] for b in books], dtype=np.int32)
+        self.dims["book_cost"] = np.zeros(size, dtype=np.int64)
+        self.dims["book_cost"][ids] = [b[4] for b in books]
+        self.dims["book_title"] = np.full(size, -1, dtype=np.int32)
+        self.dims["book_title"][ids] = [code(b[1]) for b in books]
+        self.dims["book_author"], self.dims["authors"] = _dense(
+            size, ids, np.array([code(b[2]) for b in books], dtype=np.int32))
+        self.dims["book_genre"], self.dims["genres"] = _dense(
+            size, ids, np.array([code(b[3]) for b in books], dtype=np.int32))
+
+        cur.execute("SELECT id, name FROM employee ORDER BY id;")
+        employees = cur.fetchall()
+        self.dims["employee_name"] = np.full((employees[-1][0] + 1) if employees else 1, -1, dtype=np.int32)
+        self.dims["employee_name"][[e[0] for e in employees]] = [code(e[1]) for e in employees]
+        self.strings = list(strings)
+
+    def refresh(self) -> int:
+        with self._lock:
+            with get_read_conn() as conn:
+                with conn.transaction():
+                    with conn.cursor() as cur:
+                        cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY;")
+                        to_xid = sale_horizon(cur)
+                        cur.execute(SALE_PARTITIONS_SQL)
+                        partitions = [r[0] for r in cur.fetchall()]
+                        if set(self.partitions) <= set(partitions):
+                            from_xid, columns = self.horizon, self.columns
+                        else:
+                            from_xid, columns = 0, _empty_columns()
+                        to_xid = max(to_xid, from_xid)
+                        params = {"from_xid": from_xid, "to_xid": to_xid}
+
+                        if from_xid < to_xid and len(columns["id"]):
+                            cur.execute(f"SELECT id FROM sale WHERE {CHANGED_SALES};", params)
+                            changed = np.array([r[0] for r in cur.fetchall()], dtype=np.int32)
+                            keep = ~np.isin(columns["id"], changed)
+                            columns = {name: values[keep] for name, values in columns.items()}
+                            updated = _copy_sales(cur, CHANGED_SALES, params)
+                        else:
+                            updated = _empty_columns()
+                        added = _copy_sales(cur, ADDED_SALES, params)
+                        self._load_dimensions(cur)
+
+            loaded = len(updated["id"]) + len(added["id"])
+            if loaded:
+                new = {name: np.concatenate([updated[name], added[name]]) for name in columns}
+                order = np.lexsort((new["id"], new["day"]))
+                new = {name: values[order] for name, values in new.items()}
+                in_order = not len(columns["id"]) or (
+                    (new["day"][0], new["id"][0]) > (columns["day"][-1], columns["id"][-1]))
+                columns = {name: np.concatenate([columns[name], new[name]]) for name in columns}
+                if not in_order:
+                    order = np.lexsort((columns["id"], columns["day"]))
+                    columns = {name: values[order] for name, values in columns.items()}
+            self.columns = columns
+            self.horizon = to_xid
+            self.partitions = partitions
+            self.refreshed_at = datetime.now()
+            return loaded
+
+    def _period(self, date_from: str, date_to: str) -> slice:
+        days = self.columns["day"]
+        return slice(
+            int(np.searchsorted(days, _day(date_from), side="left")),
+            int(np.searchsorted(days, _day(date_to), side="right")),
+        )
+
+    def _per_book(self, period: slice, weights) -> np.ndarray:
+        return np.bincount(self.columns["book_id"][period], weights=weights,
+                           minlength=len(self.dims["book_cost"]))
+
+    def _profit_cents(self, period: slice) -> np.ndarray:
+        quantity = self.columns["quantity"][period].astype(np.int64)
+        return self.columns["cents"][period] - quantity * self.dims["book_cost"][self.columns["book_id"][period]]
+
+    def _top_label(self, per_book: np.ndarray, book_dim: str, labels_dim: str):
+        book_codes = self.dims[book_dim]
+        valid = book_codes >= 0
+        totals = np.bincount(book_codes[valid], weights=per_book[valid], minlength=len(self.dims[labels_dim]))
+        best = int(totals.argmax())
+        return self._label(self.dims[labels_dim][best]), int(totals[best])
+
+    def most_sold_book(self, date_from: str, date_to: str):
+        period = self._period(date_from, date_to)
+        if period.start >= period.stop:
+            return None
+        per_book = self._per_book(period, self.columns["quantity"][period])
+        best = int(per_book.argmax())
+        return best, self._dim_label("book_title", best), int(per_book[best])
+
+    def profit(self, date_from: str, date_to: str) -> Decimal:
+        return _money(self._profit_cents(self._period(date_from, date_to)).sum())
+
+    def best_seller(self, date_from: str, date_to: str):
+        period = self._period(date_from, date_to)
+        if period.start >= period.stop:
+            return None
+        per_employee = np.bincount(self.columns["employee_id"][period], weights=self._profit_cents(period))
+        sold = np.bincount(self.columns["employee_id"][period]) > 0
+        best = int(np.where(sold, per_employee, -np.inf).argmax())
+        return best, self._dim_label("employee_name", best), _money(per_employee[best])
+
+    def top_author(self, date_from: str, date_to: str):
+        period = self._period(date_from, date_to)
+        if period.start >= period.stop:
+            return None
+        return self._top_label(self._per_book(period, self.columns["quantity"][period]),
+                               "book_author", "authors")
+
+    def top_genre(self, date_from: str, date_to: str):
+        period = self._period(date_from, date_to)
+        if period.start >= period.stop:
+            return None
+        return self._top_label(self._per_book(period, self.columns["quantity"][period]),
+                               "book_genre", "genres")
+
+    def _sale_rows(self, index, employee: bool = True) -> list:
+        c = self.columns
+        rows = [
+            c["id"][index].tolist(),
+            (EPOCH + c["day"][index]).tolist(),
+            [self._dim_label("book_title", b) for b in c["book_id"][index].tolist()],
+            c["quantity"][index].tolist(),
+            [_money(cents) for cents in c["cents"][index].tolist()],
+        ]
+        if employee:
+            rows.insert(2, [self._dim_label("employee_name", e) for e in c["employee_id"][index].tolist()])
+        return list(zip(*rows))
+
+    def sales_by_date(self, date_str: str) -> list:
+        return self._sale_rows(self._period(date_str, date_str))
+
+    def stream_sales_by_period(self, date_from: str, date_to: str, chunk_size: int = DB_FETCH_SIZE):
+        period = self._period(date_from, date_to)
+        for start in range(period.start, period.stop, chunk_size):
+            yield self._sale_rows(slice(start, min(start + chunk_size, period.stop)))
+
+    def sales_by_employee(self, emp_id: int, date_from: str, date_to: str) -> list:
+        period = self._period(date_from, date_to)
+        index = np.flatnonzero(self.columns["employee_id"][period] == emp_id) + period.start
+        return self._sale_rows(index, employee=False)
+
+    def summary(self, date_from: str, date_to: str) -> dict | None:
+        book = self.most_sold_book(date_from, date_to)
+        if book is None:
+            return None
+        return {
+            "book": book,
+            "seller": self.best_seller(date_from, date_to),
+            "profit": self.profit(date_from, date_to),
+            "author": self.top_author(date_from, date_to),
+            "genre": self.top_genre(date_from, date_to),
+        }
+
+
+_snapshot = SalesSnapshot()
+
+
+def get_snapshot(refresh: bool = True) -> SalesSnapshot:
+    if refresh or _snapshot.refreshed_at is None:
+        _snapshot.refresh()
+    return _snapshot
+
+
+def analytics_menu():
+    print("\n--- Аналітика в пам'яті ---")
+    try:
+        started = time.perf_counter()
+        loaded = _snapshot.refresh()
+        print(f"Знімок: {len(_snapshot)} продажів, завантажено {loaded} за {time.perf_counter() - started:.2f} с")
+    except Exception as e:
+        print("Помилка:", e)
+        return
+
+    while True:
+        date_from = input("\nДата від (YYYY-MM-DD, Enter — назад): ").strip()
+        if not date_from:
+            break
+        date_to = input("Дата до (YYYY-MM-DD): ").strip()
+        try:
+            started = time.perf_counter()
+            result = _snapshot.summary(date_from, date_to)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        except ValueError:
+            print("Некоректний формат дати.")
+            continue
+
+        if result is None:
+            print("Немає продажів за період.")
+            continue
+        book, seller, author, genre = result["book"], result["seller"], result["author"], result["genre"]
+        print(f"--- Підсумки за {date_from} — {date_to} ({elapsed_ms:.1f} мс) ---")
+        print(f"Найбільш продавана книга: ID={book[0]}, {book[1]} (кількість: {book[2]})")
+        print(f"Найуспішніший продавець: ID={seller[0]}, {seller[1]} (прибуток: {seller[2]})")
+        print(f"Сумарний прибуток за період: {result['profit']}")
+        print(f"ТОП автор: {author[0]} (кількість: {author[1]})")
+        print(f"ТОП жанр: {genre[0]} (кількість: {genre[1]})")
+
+
+def _dir_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def save_snapshot(path: str = SNAPSHOT_DIR) -> tuple[str, int]:
+    _snapshot.refresh()
+    _snapshot.save(path)
+    return path, _dir_size(path)
+
+
+def save_snapshot_menu():
+    print("\n--- Знімок продажів на диск ---")
+    try:
+        started = time.perf_counter()
+        path, size = save_snapshot()
+        print(f"Знімок {len(_snapshot)} продажів збережено в {path} "
+              f"({size / 1024 / 1024:.1f} МБ, {time.perf_counter() - started:.2f} с)")
+        print("Звіти без БД: python main.py --snapshot")
+    except Exception as e:
+        print("Помилка:", e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Знімок продажів на диск для звітів без БД")
+    parser.add_argument("--path", default=SNAPSHOT_DIR)
+    args = parser.parse_args()
+    try:
+        _check_snapshot_path(args.path)
+    except ValueError as e:
+        parser.error(str(e))
+
+    init_db()
+    started = time.perf_counter()
+    path, size = save_snapshot(args.path)
+    close_pool()
+    print(f"[DATA] Знімок {len(_snapshot)} продажів збережено в {path} "
+          f"({size / 1024 / 1024:.1f} МБ, {time.perf_counter() - started:.2f} с)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+import cache
+from database import close_pool, dedicated_conn, get_conn, init_db
+from stock import COMPACT_SQL
+
+ARCHIVE_LOCK_KEY = 7_310_004
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+
+ARCHIVE_TABLES = ["sale", "employee", "book"]
+HOT_TABLES = ["sale", "employee", "book", "stock_movement"]
+
+EMPLOYEE_COLUMNS = "id, name, position, phone, email, is_deleted, deleted_at"
+BOOK_COLUMNS = "id, isbn, title, author, genre, year, cost_price, sale_price, quantity, is_deleted, deleted_at"
+SALE_COLUMNS = "id, employee_id, book_id, sale_date, real_price, quantity_sold, is_deleted, change_seq, deleted_at"
+
+ARCHIVE_SALES_SQL = f"""
+    WITH moved AS (
+        DELETE FROM sale
+        WHERE (id, sale_date) IN (
+            SELECT id, sale_date
+            FROM sale
+            WHERE is_deleted AND deleted_at < %(cutoff)s
+            ORDER BY deleted_at
+            LIMIT %(batch)s
+        )
+        RETURNING {SALE_COLUMNS}
+    )
+    INSERT INTO sale_archive ({SALE_COLUMNS})
+    SELECT {SALE_COLUMNS} FROM moved
+"""
+
+ARCHIVABLE_EMPLOYEES_SQL = """
+    SELECT e.id
+    FROM employee e
+    WHERE e.is_deleted AND e.deleted_at < %(cutoff)s
+      AND NOT EXISTS (SELECT 1 FROM sale s WHERE s.employee_id = e.id)
+    ORDER BY e.id
+    LIMIT %(batch)s
+    FOR UPDATE OF e SKIP LOCKED
+"""
+
+ARCHIVABLE_BOOKS_SQL = """
+    SELECT b.id
+    FROM book b
+    WHERE b.is_deleted AND b.deleted_at < %(cutoff)s
+      AND NOT EXISTS (SELECT 1 FROM sale s WHERE s.book_id = b.id)
+    ORDER BY b.id
+    LIMIT %(batch)s
+    FOR UPDATE OF b SKIP LOCKED
+"""
+
+ARCHIVE_EMPLOYEES_SQL = f"""
+    WITH moved AS (
+        DELETE FROM employee WHERE id = ANY(%(ids)s) RETURNING {EMPLOYEE_COLUMNS}
+    )
+    INSERT INTO employee_archive ({EMPLOYEE_COLUMNS})
+    SELECT {EMPLOYEE_COLUMNS} FROM moved
+"""
+
+ARCHIVE_BOOKS_SQL = f"""
+    WITH moved AS (
+        DELETE FROM book WHERE id = ANY(%(ids)s) RETURNING {BOOK_COLUMNS}
+    )
+    INSERT INTO book_archive ({BOOK_COLUMNS})
+    SELECT {BOOK_COLUMNS} FROM moved
+"""
+
+RESTORE_SQL = {
+    "employee": f"""
+        WITH restored AS (
+            DELETE FROM employee_archive WHERE id = %s RETURNING *
+        )
+        INSERT INTO employee ({EMPLOYEE_COLUMNS})
+        SELECT id, name, position, phone, email, FALSE, NULL FROM restored
+    """,
+    "book": f"""
+        WITH restored AS (
+            DELETE FROM book_archive WHERE id = %s RETURNING *
+        )
+        INSERT INTO book ({BOOK_COLUMNS})
+        SELECT id, isbn, title, author, genre, year, cost_price, sale_price, quantity, FALSE, NULL FROM restored
+    """,
+}
+
+SIZES_SQL = """
+    SELECT t.name,
+           COALESCE(SUM(pg_table_size(p.relid)), 0)::bigint,
+           COALESCE(SUM(pg_indexes_size(p.relid)), 0)::bigint
+    FROM unnest(%s::text[]) AS t(name)
+    CROSS JOIN LATERAL (
+        SELECT relid FROM pg_partition_tree(t.name::regclass) WHERE isleaf
+        UNION
+        SELECT t.name::regclass
+    ) p
+    GROUP BY t.name
+"""
+
+
+def table_sizes(cur) -> dict:
+    tables = HOT_TABLES + [f"{t}_archive" for t in ARCHIVE_TABLES]
+    cur.execute(SIZES_SQL, (tables,))
+    sizes = {name: (table_bytes, index_bytes) for name, table_bytes, index_bytes in cur.fetchall()}
+    return {name: sizes[name] for name in tables}
+
+
+def archived_counts() -> dict:
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT (SELECT COUNT(*) FROM sale_archive), (SELECT COUNT(*) FROM employee_archive), "
+                "(SELECT COUNT(*) FROM book_archive);"
+            )
+            return dict(zip(ARCHIVE_TABLES, cur.fetchone()))
+
+
+def _archive_sales(conn, cutoff, batch_size: int) -> int:
+    moved = 0
+    while True:
+        with conn.transaction():
+            with conn.cursor() as cur:
+                cur.execute(ARCHIVE_SALES_SQL, {"cutoff": cutoff, "batch": batch_size})
+                count = cur.rowcount
+        moved += count
+        if count < batch_size:
+            return moved
+
+
+def _archive_rows(conn, select_sql: str, move_sql: str, cutoff, batch_size: int, books: bool = False) -> int:
+    moved = 0
+    while True:
+        with conn.transaction():
+            with conn.cursor() as cur:
+                cur.execute(select_sql, {"cutoff": cutoff, "batch": batch_size})
+                ids = [r[0] for r in cur.fetchall()]
+                if not ids:
+                    return moved
+                if books:
+                    cur.execute(COMPACT_SQL, {"book_ids": ids})
+                cur.execute(move_sql, {"ids": ids})
+                moved += cur.rowcount
+        if len(ids) < batch_size:
+            return moved
+
+
+def _vacuum(tables: list, full: bool):
+    with dedicated_conn() as conn:
+        for table in tables:
+            conn.execute(f"VACUUM ({'FULL, ' if full else ''}ANALYZE) {table};")
+
+
+def archive_deleted(older_than_days: int = ARCHIVE_AFTER_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE,
+                    vacuum_full: bool = False) -> dict:
+    cutoff = datetime.now().astimezone() - timedelta(days=older_than_days)
+    with get_conn() as conn:
+        locked = conn.execute("SELECT pg_try_advisory_lock(%s);", (ARCHIVE_LOCK_KEY,)).fetchone()[0]
+        if not locked:
+            conn.rollback()
+            raise RuntimeError("Архівація вже виконується в іншому процесі.")
+        try:
+            with conn.cursor() as cur:
+                before = table_sizes(cur)
+            conn.commit()
+
+            moved = {
+                "sale": _archive_sales(conn, cutoff, batch_size),
+                "employee": _archive_rows(conn, ARCHIVABLE_EMPLOYEES_SQL, ARCHIVE_EMPLOYEES_SQL, cutoff, batch_size),
+                "book": _archive_rows(conn, ARCHIVABLE_BOOKS_SQL, ARCHIVE_BOOKS_SQL, cutoff, batch_size, books=True),
+            }
+            if any(moved.values()):
+                _vacuum(HOT_TABLES, vacuum_full)
+
+            with conn.cursor() as cur:
+                after = table_sizes(cur)
+        finally:
+            conn.rollback()
+            conn.execute("SELECT pg_advisory_unlock(%s);", (ARCHIVE_LOCK_KEY,))
+            conn.commit()
+    return {"cutoff": cutoff, "moved": moved, "before": before, "after": after}
+
+
+def restore(table: str, row_id: int) -> bool:
+    with get_conn() as conn:
+        with conn.transaction():
+            with conn.cursor() as cur:
+                cur.execute(RESTORE_SQL[table], (row_id,))
+                if cur.rowcount == 0:
+                    return False
+                cache.notify_change(cur, table, row_id)
+    return True
+
+
+def _mb(value: int) -> str:
+    return f"{value / 1024 / 1024:.2f}"
+
+
+def print_result(result: dict):
+    moved = result["moved"]
+    print(f"Перенесено в архів (видалені до {result['cutoff']:%Y-%m-%d %H:%M}): "
+          f"продажів {moved['sale']}, співробітників {moved['employee']}, книг {moved['book']}")
+    print("\nТаблиця | Дані до, МБ | Дані після, МБ | Індекси до, МБ | Індекси після, МБ")
+    print("-" * 90)
+    saved = 0
+    for name, (table_before, index_before) in result["before"].items():
+        table_after, index_after = result["after"][name]
+        print(f"{name} | {_mb(table_before)} | {_mb(table_after)} | {_mb(index_before)} | {_mb(index_after)}")
+        if name in HOT_TABLES:
+            saved += table_before + index_before - table_after - index_after
+    print(f"Робочі таблиці зменшились на {_mb(saved)} МБ")
+
+
+def archive_menu():
+    while True:
+        print("\n=== АРХІВ ВИДАЛЕНИХ ЗАПИСІВ ===")
+        print(f"1) Перенести в архів видалені понад {ARCHIVE_AFTER_DAYS} днів тому (продажі — без відновлення)")
+        print("2) Відновити співробітника з архіву")
+        print("3) Відновити книгу з архіву")
+        print("4) Кількість записів в архіві")
+        print("0) Назад")
+        choice = input("Оберіть: ").strip()
+
+        try:
+            if choice == "0":
+                break
+            elif choice == "1":
+                days = input(f"Вік видалення в днях (Enter — {ARCHIVE_AFTER_DAYS}): ").strip()
+                if days and not days.isdigit():
+                    raise ValueError("Кількість днів має бути числом.")
+                full = input("Стиснути таблиці VACUUM FULL (блокує їх)? (y/N): ").strip().lower() in ("y", "т", "так")
+                started = time.perf_counter()
+                result = archive_deleted(int(days) if days else ARCHIVE_AFTER_DAYS, vacuum_full=full)
+                print_result(result)
+                print(f"Час: {time.perf_counter() - started:.2f} с")
+            elif choice in ("2", "3"):
+                table = "employee" if choice == "2" else "book"
+                value = input("ID: ").strip()
+                if not value.isdigit():
+                    raise ValueError("ID має бути числом.")
+                if restore(table, int(value)):
+                    print("Запис відновлено.")
+                else:
+                    print("В архіві такого запису немає.")
+            elif choice == "4":
+                counts = archived_counts()
+                print(f"Продажів: {counts['sale']}, співробітників: {counts['employee']}, книг: {counts['book']}")
+            else:
+                print("Невірний пункт.")
+        except Exception as e:
+            print("Помилка:", e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Перенесення давно видалених записів в *_archive таблиці")
+    parser.add_argument("--older-than-days", type=int, default=ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--vacuum-full", action="store_true", help="стиснути таблиці після перенесення (блокує їх)")
+    parser.add_argument("--restore-employee", type=int, metavar="ID")
+    parser.add_argument("--restore-book", type=int, metavar="ID")
+    args = parser.parse_args()
+
+    init_db()
+    if args.restore_employee or args.restore_book:
+        for table, row_id in (("employee", args.restore_employee), ("book", args.restore_book)):
+            if row_id:
+                found = restore(table, row_id)
+                print(f"[DB] {table} {row_id}: " + ("відновлено" if found else "в архіві немає"))
+    else:
+        print_result(archive_deleted(args.older_than_days, args.batch_size, args.vacuum_full))
+    close_pool()
+
+
+if __name__ == "__main__":
+    main()
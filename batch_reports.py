@@ -0,0 +1,146 @@
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from database import DB_POOL_MAX, close_pool, init_db
+from reports import EXPORT_REPORTS, export_report
+
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", str(min(4, DB_POOL_MAX))))
+
+BATCH_PARAMS = {"date_from", "date_to", "employee_id"}
+BATCH_REPORTS = [key for key, report in EXPORT_REPORTS.items() if set(report[2]) <= BATCH_PARAMS]
+MONTH_END_REPORTS = ["sales_all", "sales_by_period", "most_sold_books", "sellers_by_profit",
+                     "profit_by_period", "top_authors", "top_genres"]
+
+
+def build_jobs(keys: list, periods: list, employee_id: int | None = None) -> list:
+    jobs = []
+    for key in keys:
+        needed = EXPORT_REPORTS[key][2]
+        if "employee_id" in needed and employee_id is None:
+            raise ValueError(f"Звіт {key} потребує ID співробітника.")
+        if "date_from" in needed and not periods:
+            raise ValueError(f"Звіт {key} потребує хоча б одного періоду.")
+        for date_from, date_to in (periods if "date_from" in needed else [(None, None)]):
+            params = {}
+            if "date_from" in needed:
+                params.update(date_from=date_from, date_to=date_to)
+            if "employee_id" in needed:
+                params["employee_id"] = employee_id
+            if (key, params) not in jobs:
+                jobs.append((key, params))
+    return jobs
+
+
+def _run_job(key: str, params: dict, compress: bool) -> dict:
+    started = time.perf_counter()
+    result = {"key": key, "params": params, "file": None, "rows": 0, "error": None}
+    try:
+        result["file"], result["rows"] = export_report(key, params, compress)
+    except Exception as e:
+        result["error"] = str(e)
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def run_batch(jobs: list, workers: int = REPORT_WORKERS, compress: bool = False) -> tuple[list, float]:
+    started = time.perf_counter()
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, DB_POOL_MAX)), thread_name_prefix="report") as pool:
+        futures = [pool.submit(_run_job, key, params, compress) for key, params in jobs]
+        for future in as_completed(futures):
+            results.append(future.result())
+    order = {(key, str(params)): i for i, (key, params) in enumerate(jobs)}
+    results.sort(key=lambda r: order[(r["key"], str(r["params"]))])
+    return results, time.perf_counter() - started
+
+
+def print_summary(results: list, wall_seconds: float):
+    print("\nЗвіт | Параметри | Рядків | Час, с | Файл")
+    print("-" * 120)
+    for r in results:
+        params = ", ".join(str(v) for v in r["params"].values()) or "—"
+        outcome = r["file"] if r["error"] is None else f"ПОМИЛКА: {r['error']}"
+        print(f"{EXPORT_REPORTS[r['key']][0]} | {params} | {r['rows']} | {r['seconds']:.2f} | {outcome}")
+    total = sum(r["seconds"] for r in results)
+    failed = sum(1 for r in results if r["error"] is not None)
+    print(f"Звітів: {len(results)}, помилок: {failed}. "
+          f"Загальний час {wall_seconds:.2f} с, сума часу звітів {total:.2f} с")
+
+
+def _parse_period(value: str) -> tuple[str, str]:
+    date_from, _, date_to = value.partition(":")
+    try:
+        datetime.strptime(date_from, "%Y-%m-%d")
+        datetime.strptime(date_to, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"Некоректний період: {value} (очікується YYYY-MM-DD:YYYY-MM-DD)")
+    return date_from, date_to
+
+
+def batch_report_menu():
+    print("\n--- Пакетний запуск звітів ---")
+    for i, key in enumerate(BATCH_REPORTS, start=1):
+        print(f"{i}) {EXPORT_REPORTS[key][0]}")
+
+    try:
+        choice = input("Номери звітів через кому (Enter — звіти на кінець місяця): ").strip()
+        if choice:
+            numbers = choice.replace(" ", "").split(",")
+            if any(not n.isdigit() or not 1 <= int(n) <= len(BATCH_REPORTS) for n in numbers):
+                raise ValueError("Невірний номер звіту.")
+            keys = [BATCH_REPORTS[int(n) - 1] for n in numbers]
+        else:
+            keys = MONTH_END_REPORTS
+
+        periods = []
+        print("Періоди у форматі YYYY-MM-DD:YYYY-MM-DD, по одному в рядку; порожній рядок — кінець.")
+        while value := input("Період: ").strip():
+            periods.append(_parse_period(value))
+
+        employee_id = None
+        if any("employee_id" in EXPORT_REPORTS[k][2] for k in keys):
+            value = input("ID співробітника: ").strip()
+            if not value.isdigit():
+                raise ValueError("ID має бути числом.")
+            employee_id = int(value)
+
+        compress = input("Стиснути gzip? (y/N): ").strip().lower() in ("y", "т", "так")
+        jobs = build_jobs(keys, periods, employee_id)
+        print(f"Запуск {len(jobs)} звітів у {min(REPORT_WORKERS, DB_POOL_MAX)} потоках...")
+        results, wall = run_batch(jobs, compress=compress)
+        print_summary(results, wall)
+    except ValueError as e:
+        print("Помилка:", e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетний паралельний експорт звітів у export/")
+    parser.add_argument("--reports", default=",".join(MONTH_END_REPORTS),
+                        help=f"через кому: {', '.join(BATCH_REPORTS)}")
+    parser.add_argument("--period", action="append", default=[], help="YYYY-MM-DD:YYYY-MM-DD, можна кілька")
+    parser.add_argument("--employee-id", type=int)
+    parser.add_argument("--workers", type=int, default=REPORT_WORKERS)
+    parser.add_argument("--gzip", action="store_true")
+    args = parser.parse_args()
+
+    keys = [k.strip() for k in args.reports.split(",") if k.strip()]
+    unknown = [k for k in keys if k not in BATCH_REPORTS]
+    if unknown:
+        parser.error(f"невідомі звіти: {', '.join(unknown)}")
+    try:
+        jobs = build_jobs(keys, [_parse_period(p) for p in args.period], args.employee_id)
+    except ValueError as e:
+        parser.error(str(e))
+
+    init_db()
+    results, wall = run_batch(jobs, args.workers, args.gzip)
+    print_summary(results, wall)
+    close_pool()
+    if any(r["error"] for r in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+import database
+from analytics import SalesSnapshot
+from crud import delete_sale, sell_basket
+from datagen import generate
+from reports import (
+    export_report,
+    fetch_best_seller,
+    fetch_dashboard,
+    fetch_most_sold_book,
+    fetch_profit,
+    fetch_sales_by_date,
+    fetch_sales_by_employee,
+    fetch_top_author,
+    fetch_top_genre,
+    stream_sales_by_period,
+)
+
+BENCH_SIZES = {
+    "small": (50, 2_000, 100_000),
+    "medium": (200, 20_000, 1_000_000),
+    "large": (1_000, 100_000, 10_000_000),
+}
+BENCH_SEED = 42
+BENCH_YEARS = 2
+BENCH_PERIOD_DAYS = 90
+BENCH_NOISE_MS = 1.0
+
+
+def _use_database(name: str):
+    database.close_pool()
+    database.DB_NAME = name
+
+
+def _prepare_dataset(size: str) -> str:
+    employees, books, sales = BENCH_SIZES[size]
+    _use_database(f"{database.DB_NAME}_bench_{size}")
+    database.init_db()
+    with database.dedicated_conn() as conn:
+        counts = conn.execute("""
+            SELECT (SELECT COUNT(*) FROM employee),
+                   (SELECT COUNT(*) FROM book),
+                   (SELECT COUNT(*) FROM sale WHERE is_deleted = FALSE);
+        """).fetchone()
+        if counts[2] < sales:
+            generate(
+                conn,
+                employees=max(employees - counts[0], 0),
+                books=max(books - counts[1], 0),
+                sales=sales - counts[2],
+                days=BENCH_YEARS * 365,
+                seed=BENCH_SEED,
+            )
+    return database.DB_NAME
+
+
+def _bench_context() -> dict:
+    with database.get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT MIN(id) FROM employee WHERE is_deleted = FALSE;")
+            employee_id = cur.fetchone()[0]
+            cur.execute("""
+                SELECT id, sale_price FROM book
+                WHERE is_deleted = FALSE
+                ORDER BY quantity DESC, id
+                LIMIT 3;
+            """)
+            books = cur.fetchall()
+    today = date.today()
+    return {
+        "employee_id": employee_id,
+        "books": books,
+        "date": (today - timedelta(days=7)).isoformat(),
+        "date_from": (today - timedelta(days=BENCH_PERIOD_DAYS)).isoformat(),
+        "date_to": today.isoformat(),
+    }
+
+
+def _consume_sales_by_period(ctx: dict) -> int:
+    with database.get_conn() as conn:
+        return sum(len(rows) for rows in stream_sales_by_period(conn, ctx["date_from"], ctx["date_to"]))
+
+
+def _analytics_summary(ctx: dict) -> dict | None:
+    if "snapshot" not in ctx:
+        ctx["snapshot"] = SalesSnapshot()
+        ctx["snapshot"].refresh()
+    return ctx["snapshot"].summary(ctx["date_from"], ctx["date_to"])
+
+
+def _sell_and_undo(ctx: dict, lines: int) -> list:
+    basket = [(book_id, 1, price) for book_id, price in ctx["books"][:lines]]
+    sale_ids = sell_basket(ctx["employee_id"], basket)
+    ctx.setdefault("undo", []).extend(sale_ids)
+    return sale_ids
+
+
+BENCH_CASES = {
+    "report.sales_by_date": lambda ctx: fetch_sales_by_date(ctx["date"]),
+    "report.sales_by_period": _consume_sales_by_period,
+    "report.sales_by_employee": lambda ctx: fetch_sales_by_employee(
+        ctx["employee_id"], ctx["date_from"], ctx["date_to"]),
+    "report.most_sold_book": lambda ctx: fetch_most_sold_book(ctx["date_from"], ctx["date_to"]),
+    "report.best_seller_by_profit": lambda ctx: fetch_best_seller(ctx["date_from"], ctx["date_to"]),
+    "report.profit_by_period": lambda ctx: fetch_profit(ctx["date_from"], ctx["date_to"]),
+    "report.top_author": lambda ctx: fetch_top_author(ctx["date_from"], ctx["date_to"]),
+    "report.top_genre": lambda ctx: fetch_top_genre(ctx["date_from"], ctx["date_to"]),
+    "report.dashboard": lambda ctx: fetch_dashboard(ctx["date_from"], ctx["date_to"]),
+    "analytics.summary": _analytics_summary,
+    "export.sales_by_period": lambda ctx: export_report(
+        "sales_by_period", {"date_from": ctx["date_from"], "date_to": ctx["date_to"]}),
+    "sale.create": lambda ctx: _sell_and_undo(ctx, 1),
+    "sale.basket": lambda ctx: _sell_and_undo(ctx, 3),
+}
+
+
+def _percentile(samples: list, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def _undo_sales(ctx: dict):
+    for sale_id in ctx.pop("undo", []):
+        delete_sale(sale_id)
+
+
+def run_case(func, ctx: dict, iterations: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        func(ctx)
+    _undo_sales(ctx)
+
+    samples = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t = time.perf_counter()
+        func(ctx)
+        samples.append((time.perf_counter() - t) * 1000)
+    elapsed = time.perf_counter() - started
+    _undo_sales(ctx)
+
+    tracemalloc.start()
+    func(ctx)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    _undo_sales(ctx)
+
+    return {
+        "iterations": iterations,
+        "p50_ms": round(_percentile(samples, 0.50), 3),
+        "p95_ms": round(_percentile(samples, 0.95), 3),
+        "p99_ms": round(_percentile(samples, 0.99), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "throughput_per_s": round(iterations / elapsed, 1),
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def run(sizes: list, cases: list, iterations: int, warmup: int) -> dict:
+    base_name = database.DB_NAME
+    result = {"created": datetime.now().isoformat(timespec="seconds"), "datasets": {}}
+    for size in sizes:
+        db_name = _prepare_dataset(size)
+        ctx = _bench_context()
+        print(f"\n[BENCH] {size} ({db_name})")
+        measured = {}
+        for name in cases:
+            measured[name] = run_case(BENCH_CASES[name], ctx, iterations, warmup)
+            m = measured[name]
+            print(f"  {name:<30} p50 {m['p50_ms']:>9.2f} мс  p95 {m['p95_ms']:>9.2f} мс  "
+                  f"p99 {m['p99_ms']:>9.2f} мс  {m['throughput_per_s']:>8.1f}/с  {m['peak_memory_kb']:>9.1f} КБ")
+        result["datasets"][size] = {"sizes": BENCH_SIZES[size], "cases": measured}
+        _use_database(base_name)
+    return result
+
+
+def compare(result: dict, baseline: dict, threshold: float) -> list:
+    regressions = []
+    for size, dataset in result["datasets"].items():
+        base_cases = baseline.get("datasets", {}).get(size, {}).get("cases", {})
+        for name, m in dataset["cases"].items():
+            base = base_cases.get(name)
+            if base is None:
+                continue
+            for metric in ("p50_ms", "p95_ms"):
+                if m[metric] > base[metric] * (1 + threshold) and m[metric] - base[metric] > BENCH_NOISE_MS:
+                    regressions.append(f"{size} {name} {metric}: {base[metric]} -> {m[metric]}")
+            if m["peak_memory_kb"] > base["peak_memory_kb"] * (1 + threshold):
+                regressions.append(
+                    f"{size} {name} peak_memory_kb: {base['peak_memory_kb']} -> {m['peak_memory_kb']}"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк звітів і продажів")
+    parser.add_argument("--sizes", default="small", help=f"через кому: {', '.join(BENCH_SIZES)}")
+    parser.add_argument("--cases", default="", help="через кому; за замовчуванням усі")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=25)
+    parser.add_argument("--output", default="")
+    parser.add_argument("--baseline", default="")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    cases = [c.strip() for c in args.cases.split(",") if c.strip()] or list(BENCH_CASES)
+    unknown = [s for s in sizes if s not in BENCH_SIZES] + [c for c in cases if c not in BENCH_CASES]
+    if unknown:
+        parser.error(f"невідомі розміри або сценарії: {', '.join(unknown)}")
+
+    result = run(sizes, cases, args.iterations, args.warmup)
+    database.close_pool()
+
+    output = args.output or f"export/bench_{datetime.now():%Y%m%d_%H%M%S}.json"
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"\n[BENCH] Результати збережено в {output}")
+
+    if not args.baseline:
+        return
+    if args.save_baseline or not os.path.exists(args.baseline):
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"[BENCH] Базову лінію збережено в {args.baseline}")
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(result, baseline, args.threshold)
+    if regressions:
+        print(f"[BENCH] Регресії (поріг {args.threshold:.0%}):")
+        for line in regressions:
+            print("  " + line)
+        sys.exit(1)
+    print("[BENCH] Регресій немає")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+import csv
+import os
+from datetime import datetime
+import cache
+from database import get_conn
+from stock import STOCK_LOCK_SPACE
+
+COPY_BLOCK_SIZE = 1 << 20
+SALE_IMPORT_MAX_AGE_DAYS = int(os.getenv("SALE_IMPORT_MAX_AGE_DAYS", "730"))
+
+SALE_IMPORT_COLUMNS = ["employee_id", "book_id", "sale_date", "real_price", "quantity_sold"]
+BOOK_IMPORT_COLUMNS = ["isbn", "title", "author", "genre", "year", "cost_price", "sale_price", "quantity"]
+EMPLOYEE_IMPORT_COLUMNS = ["name", "position", "phone", "email"]
+
+NUMBER_RE = "^[0-9]+([.,][0-9]+)?$"
+EMAIL_RE = "^[^@[:space:]]+@[^@[:space:]]+\\.[^@[:space:]]+$"
+
+
+def _copy_file(cur, statement: str, path: str):
+    with open(path, "rb") as f:
+        with cur.copy(statement) as copy:
+            while data := f.read(COPY_BLOCK_SIZE):
+                copy.write(data)
+
+
+def _stage_text(cur, table: str, columns: list, path: str) -> int:
+    cur.execute(f"""
+        CREATE TEMP TABLE {table} (
+            line_no SERIAL,
+            {", ".join(f"{c} TEXT" for c in columns)}
+        ) ON COMMIT DROP;
+    """)
+    _copy_file(cur, f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, HEADER)", path)
+    cur.execute(f"UPDATE {table} SET {', '.join(f'{c} = NULLIF(btrim({c}), {chr(39)}{chr(39)})' for c in columns)};")
+    return cur.rowcount
+
+
+def write_rejects(name: str, header: list, rows: list) -> str:
+    os.makedirs("export", exist_ok=True)
+    filename = f"export/{name}_rejects_{datetime.now():%Y%m%d_%H%M%S}.csv"
+    with open(filename, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(header)
+        w.writerows(rows)
+    return filename
+
+
+def _valid_dates(cur, table: str, column: str) -> list:
+    cur.execute(f"SELECT DISTINCT {column} FROM {table} WHERE {column} ~ '^[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}$';")
+    valid = []
+    for (value,) in cur.fetchall():
+        try:
+            datetime.strptime(value, "%Y-%m-%d")
+        except ValueError:
+            continue
+        valid.append(value)
+    return valid
+
+
+def _over_stock_lines(cur) -> list:
+    cur.execute("""
+        SELECT line_no, book_id, quantity_sold, stock
+        FROM sale_import_checked
+        WHERE reject_reason IS NULL
+        ORDER BY line_no;
+    """)
+    left = {}
+    rejected = []
+    for line_no, book_id, quantity, stock in cur.fetchall():
+        available = left.setdefault(book_id, stock)
+        if quantity > available:
+            rejected.append(line_no)
+        else:
+            left[book_id] = available - quantity
+    return rejected
+
+
+def import_sales_csv(path: str) -> tuple[int, list]:
+    with get_conn() as conn:
+        with conn.transaction():
+            with conn.cursor() as cur:
+                _stage_text(cur, "sale_import", SALE_IMPORT_COLUMNS, path)
+                valid_dates = _valid_dates(cur, "sale_import", "sale_date")
+
+                cur.execute("""
+                    CREATE TEMP TABLE sale_import_typed ON COMMIT DROP AS
+                    SELECT line_no, employee_id AS raw_employee_id, book_id AS raw_book_id, sale_date AS raw_sale_date,
+                           real_price AS raw_real_price, quantity_sold AS raw_quantity_sold,
+                           CASE WHEN employee_id ~ '^[0-9]{1,9}$' THEN employee_id::int END AS employee_id,
+                           CASE WHEN book_id ~ '^[0-9]{1,9}$' THEN book_id::int END AS book_id,
+                           CASE WHEN sale_date = ANY(%(dates)s) THEN sale_date::date END AS sale_date,
+                           CASE WHEN real_price ~ %(number)s THEN replace(real_price, ',', '.')::numeric END AS real_price,
+                           CASE WHEN quantity_sold ~ '^[0-9]{1,9}$' THEN quantity_sold::int END AS quantity_sold
+                    FROM sale_import;
+                """, {"dates": valid_dates, "number": NUMBER_RE})
+
+                cur.execute("""
+                    SELECT pg_advisory_xact_lock(%s, book_id)
+                    FROM (SELECT DISTINCT book_id FROM sale_import_typed WHERE book_id IS NOT NULL ORDER BY book_id) b;
+                """, (STOCK_LOCK_SPACE,))
+
+                cur.execute("""
+                    CREATE TEMP TABLE sale_import_checked ON COMMIT DROP AS
+                    SELECT st.*, bs.stock,
+                           CASE
+                               WHEN st.employee_id IS NULL THEN 'ID співробітника має бути цілим числом'
+                               WHEN st.book_id IS NULL THEN 'ID книги має бути цілим числом'
+                               WHEN st.sale_date IS NULL THEN 'Некоректна дата (очікується YYYY-MM-DD)'
+                               WHEN st.sale_date > current_date THEN 'Дата продажу в майбутньому'
+                               WHEN st.sale_date < current_date - %(max_age)s
+                                   THEN 'Дата продажу старша за ' || %(max_age)s || ' днів'
+                               WHEN st.real_price IS NULL OR st.real_price <= 0 THEN 'Сума має бути числом > 0'
+                               WHEN st.quantity_sold IS NULL OR st.quantity_sold <= 0 THEN 'Кількість має бути > 0'
+                               WHEN e.id IS NULL THEN 'Співробітника не знайдено'
+                               WHEN b.id IS NULL THEN 'Книгу не знайдено'
+                           END AS reject_reason
+                    FROM sale_import_typed st
+                    LEFT JOIN employee e ON e.id = st.employee_id AND e.is_deleted = FALSE
+                    LEFT JOIN book b ON b.id = st.book_id AND b.is_deleted = FALSE
+                    LEFT JOIN book_stock bs ON bs.book_id = b.id;
+                """, {"max_age": SALE_IMPORT_MAX_AGE_DAYS})
+
+                cur.execute(
+                    "UPDATE sale_import_checked SET reject_reason = 'Недостатньо книг на складі' WHERE line_no = ANY(%s);",
+                    (_over_stock_lines(cur),),
+                )
+
+                cur.execute("""
+                    SELECT ensure_sale_partitions(month, month)
+                    FROM (
+                        SELECT DISTINCT date_trunc('month', sale_date)::date AS month
+                        FROM sale_import_checked
+                        WHERE reject_reason IS NULL
+                        ORDER BY month
+                    ) m;
+                """)
+
+                cur.execute("""
+                    WITH inserted AS (
+                        INSERT INTO sale (employee_id, book_id, sale_date, real_price, quantity_sold)
+                        SELECT employee_id, book_id, sale_date, real_price, quantity_sold
+                        FROM sale_import_checked
+                        WHERE reject_reason IS NULL
+                        ORDER BY line_no
+                        RETURNING id, book_id, quantity_sold
+                    )
+                    INSERT INTO stock_movement (book_id, kind, delta, sale_id)
+                    SELECT book_id, 'sale', -quantity_sold, id
+                    FROM inserted;
+                """)
+                imported = cur.rowcount
+
+                cur.execute("""
+                    INSERT INTO sale_daily_rollup AS r (sale_date, book_id, employee_id, quantity, revenue, cost)
+                    SELECT c.sale_date, c.book_id, c.employee_id,
+                           SUM(c.quantity_sold), SUM(c.real_price), SUM(b.cost_price * c.quantity_sold)
+                    FROM sale_import_checked c
+                    JOIN book b ON b.id = c.book_id
+                    WHERE c.reject_reason IS NULL
+                    GROUP BY c.sale_date, c.book_id, c.employee_id
+                    ON CONFLICT (sale_date, book_id, employee_id) DO UPDATE
+                    SET quantity = r.quantity + EXCLUDED.quantity,
+                        revenue = r.revenue + EXCLUDED.revenue,
+                        cost = r.cost + EXCLUDED.cost;
+                """)
+
+                cur.execute("""
+                    SELECT line_no + 1, raw_employee_id, raw_book_id, raw_sale_date, raw_real_price, raw_quantity_sold,
+                           reject_reason
+                    FROM sale_import_checked
+                    WHERE reject_reason IS NOT NULL
+                    ORDER BY line_no;
+                """)
+                rejects = cur.fetchall()
+
+    return imported, rejects
+
+
+def import_books_csv(path: str) -> tuple[int, int, int, list]:
+    with get_conn() as conn:
+        with conn.transaction():
+            with conn.cursor() as cur:
+                total = _stage_text(cur, "book_import", BOOK_IMPORT_COLUMNS, path)
+
+                cur.execute("""
+                    CREATE TEMP TABLE book_import_checked ON COMMIT DROP AS
+                    SELECT st.*, b.id AS found_book, b.cost_price AS old_cost_price,
+                           CASE
+                               WHEN st.isbn IS NULL THEN 'Не вказано ISBN'
+                               WHEN st.title IS NULL OR st.author IS NULL THEN 'Назва та автор не можуть бути порожні'
+                               WHEN st.year IS NOT NULL AND st.year !~ '^[0-9]{1,4}$' THEN 'Рік має бути цілим числом'
+                               WHEN st.cost_price IS NULL OR st.sale_price IS NULL
+                                    OR st.cost_price !~ %(number)s OR st.sale_price !~ %(number)s
+                                   THEN 'Ціни мають бути числами'
+                               WHEN replace(st.cost_price, ',', '.')::numeric <= 0
+                                    OR replace(st.sale_price, ',', '.')::numeric <= 0 THEN 'Ціни мають бути > 0'
+                               WHEN st.quantity IS NOT NULL AND st.quantity !~ '^[0-9]{1,9}$'
+                                   THEN 'Кількість має бути цілим числом >= 0'
+                               WHEN b.is_deleted THEN 'Книгу з цим ISBN видалено'
+                           END AS reject_reason
+                    FROM book_import st
+                    LEFT JOIN book b ON b.isbn = st.isbn;
+                """, {"number": NUMBER_RE})
+
+                cur.execute("""
+                    CREATE TEMP TABLE book_import_valid ON COMMIT DROP AS
+                    SELECT DISTINCT ON (isbn)
+                           isbn, title, author, COALESCE(genre, '') AS genre, year::int AS year,
+                           replace(cost_price, ',', '.')::numeric AS cost_price,
+                           replace(sale_price, ',', '.')::numeric AS sale_price,
+                           SUM(COALESCE(quantity::int, 0)) OVER (PARTITION BY isbn) AS quantity,
+                           found_book, old_cost_price
+                    FROM book_import_checked
+                    WHERE reject_reason IS NULL
+                    ORDER BY isbn, line_no DESC;
+                """)
+
+                cur.execute("""
+                    WITH upserted AS (
+                        INSERT INTO book (isbn, title, author, genre, year, cost_price, sale_price, quantity)
+                        SELECT isbn, title, author, genre, year, cost_price, sale_price, 0
+                        FROM book_import_valid
+                        ORDER BY isbn
+                        ON CONFLICT (isbn) DO UPDATE
+                        SET cost_price = EXCLUDED.cost_price, sale_price = EXCLUDED.sale_price
+                        RETURNING id, isbn, xmax = 0 AS inserted
+                    ), received AS (
+                        INSERT INTO stock_movement (book_id, kind, delta)
+                        SELECT u.id, 'receipt', v.quantity
+                        FROM upserted u
+                        JOIN book_import_valid v ON v.isbn = u.isbn
+                        WHERE v.quantity > 0
+                    )
+                    SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted)
+                    FROM upserted;
+                """)
+                inserted, updated = cur.fetchone()
+
+                cur.execute("""
+                    UPDATE sale_daily_rollup r
+                    SET cost = r.quantity * v.cost_price
+                    FROM book_import_valid v
+                    WHERE r.book_id = v.found_book
+                      AND v.cost_price <> v.old_cost_price;
+                """)
+                if updated:
+                    cache.notify_table(cur, "book")
+
+                cur.execute(f"""
+                    SELECT line_no + 1, {", ".join(BOOK_IMPORT_COLUMNS)}, reject_reason
+                    FROM book_import_checked
+                    WHERE reject_reason IS NOT NULL
+                    ORDER BY line_no;
+                """)
+                rejects = cur.fetchall()
+
+    return total, inserted, updated, rejects
+
+
+def import_employees_csv(path: str) -> tuple[int, int, int, list]:
+    with get_conn() as conn:
+        with conn.transaction():
+            with conn.cursor() as cur:
+                total = _stage_text(cur, "employee_import", EMPLOYEE_IMPORT_COLUMNS, path)
+
+                cur.execute("""
+                    CREATE TEMP TABLE employee_import_checked ON COMMIT DROP AS
+                    SELECT st.*,
+                           CASE
+                               WHEN st.name IS NULL THEN 'Не вказано ПІБ'
+                               WHEN st.email IS NULL OR st.email !~ %(email)s THEN 'Email має некоректний формат'
+                               WHEN e.is_deleted THEN 'Співробітника з цим email видалено'
+                               WHEN COUNT(*) OVER (PARTITION BY st.email) > 1
+                                    AND line_no <> MAX(line_no) OVER (PARTITION BY st.email)
+                                   THEN 'Email повторюється нижче у файлі'
+                           END AS reject_reason
+                    FROM employee_import st
+                    LEFT JOIN employee e ON e.email = st.email;
+                """, {"email": EMAIL_RE})
+
+                cur.execute("""
+                    WITH upserted AS (
+                        INSERT INTO employee (name, position, phone, email)
+                        SELECT name, COALESCE(position, ''), COALESCE(phone, ''), email
+                        FROM employee_import_checked
+                        WHERE reject_reason IS NULL
+                        ORDER BY email
+                        ON CONFLICT (email) DO UPDATE
+                        SET name = EXCLUDED.name,
+                            position = COALESCE(NULLIF(EXCLUDED.position, ''), employee.position),
+                            phone = COALESCE(NULLIF(EXCLUDED.phone, ''), employee.phone)
+                        RETURNING xmax = 0 AS inserted
+                    )
+                    SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted)
+                    FROM upserted;
+                """)
+                inserted, updated = cur.fetchone()
+                if updated:
+                    cache.notify_table(cur, "employee")
+
+                cur.execute(f"""
+                    SELECT line_no + 1, {", ".join(EMPLOYEE_IMPORT_COLUMNS)}, reject_reason
+                    FROM employee_import_checked
+                    WHERE reject_reason IS NOT NULL
+                    ORDER BY line_no;
+                """)
+                rejects = cur.fetchall()
+
+    return total, inserted, updated, rejects
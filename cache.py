@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+import psycopg
+from database import dedicated_conn, get_conn
+
+CACHE_CHANNEL = "bookstore_cache"
+CACHE_SIZE = int(os.getenv("CACHE_SIZE", "1024"))
+LISTENER_RETRY_SECONDS = 5
+
+EMPLOYEE_SQL = """
+    SELECT id, name, position, phone, email
+    FROM employee
+    WHERE id=%s AND is_deleted=FALSE
+"""
+
+BOOK_SQL = """
+    SELECT id, isbn, title, author, genre, year, cost_price, sale_price
+    FROM book
+    WHERE id=%s AND is_deleted=FALSE
+"""
+
+
+class LRUCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return True, self._data[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value, generation: int):
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self.generation += 1
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+_caches = {
+    "employee": LRUCache(CACHE_SIZE),
+    "book": LRUCache(CACHE_SIZE),
+}
+_listening = threading.Event()
+_listener = None
+
+
+def _clear_all():
+    for c in _caches.values():
+        c.clear()
+
+
+def _handle_notify(payload: str):
+    table, _, row_id = payload.partition(":")
+    c = _caches.get(table)
+    if c is None:
+        return
+    if row_id.isdigit():
+        c.invalidate(int(row_id))
+    else:
+        c.clear()
+
+
+def _listen_loop():
+    while True:
+        try:
+            with dedicated_conn() as conn:
+                conn.execute(f"LISTEN {CACHE_CHANNEL};")
+                _clear_all()
+                _listening.set()
+                for n in conn.notifies():
+                    _handle_notify(n.payload)
+        except psycopg.Error:
+            pass
+        _listening.clear()
+        _clear_all()
+        time.sleep(LISTENER_RETRY_SECONDS)
+
+
+def start_listener():
+    global _listener
+    if _listener is None:
+        _listener = threading.Thread(target=_listen_loop, name="cache-listener", daemon=True)
+        _listener.start()
+
+
+def notify_change(cur, table: str, row_id: int):
+    cur.execute("SELECT pg_notify(%s, %s);", (CACHE_CHANNEL, f"{table}:{row_id}"))
+    _caches[table].invalidate(row_id)
+
+
+def notify_table(cur, table: str):
+    cur.execute("SELECT pg_notify(%s, %s);", (CACHE_CHANNEL, f"{table}:*"))
+    _caches[table].clear()
+
+
+def _cached(table: str, row_id: int, query: str, cur=None):
+    c = _caches[table]
+    if _listening.is_set():
+        found, row = c.get(row_id)
+        if found:
+            return row
+    generation = c.generation
+
+    if cur is not None:
+        cur.execute(query, (row_id,))
+        row = cur.fetchone()
+    else:
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(query, (row_id,))
+                row = cur.fetchone()
+
+    if row is not None and _listening.is_set():
+        c.put(row_id, row, generation)
+    return row
+
+
+def get_employee(emp_id: int, cur=None):
+    return _cached("employee", emp_id, EMPLOYEE_SQL, cur)
+
+
+def get_book(book_id: int, cur=None):
+    return _cached("book", book_id, BOOK_SQL, cur)
+
+
+def cache_stats() -> dict:
+    return {table: c.stats() for table, c in _caches.items()}
@@ -1,19 +1,95 @@
+import os
 import re
+import time
 from datetime import date, datetime
 from database import get_conn
+from instrumentation import action, timed_input
+from bulk_import import (
+    BOOK_IMPORT_COLUMNS,
+    EMPLOYEE_IMPORT_COLUMNS,
+    SALE_IMPORT_COLUMNS,
+    import_books_csv,
+    import_employees_csv,
+    import_sales_csv,
+    write_rejects,
+)
+from paging import browse_books, browse_employees, browse_sales
+import cache
+import rollup
+import stock
 
 EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
 
+BOOK_SEARCH_LIMIT = int(os.getenv("BOOK_SEARCH_LIMIT", "20"))
+BOOK_SEARCH_CANDIDATES = int(os.getenv("BOOK_SEARCH_CANDIDATES", "500"))
+
+BOOK_SEARCH_SQL = """
+    WITH tokens AS (
+        SELECT token, n, COUNT(*) OVER () AS total
+        FROM regexp_split_to_table(
+                 CASE WHEN %(text)s ~ '^[0-9Xx -]+$'
+                      THEN lower(regexp_replace(%(text)s, '[^0-9Xx]', '', 'g'))
+                      ELSE book_search_normalize(%(text)s)
+                 END, ' ') WITH ORDINALITY AS t(token, n)
+        WHERE token <> ''
+    ), q AS (
+        SELECT to_tsquery('simple', string_agg(
+                   quote_literal(token)
+                   || CASE WHEN %(prefix)s AND n = total AND length(token) >= 3 THEN ':*' ELSE '' END,
+                   ' & ' ORDER BY n)) AS query
+        FROM tokens
+    ), candidates AS (
+        SELECT b.id, b.isbn, b.title, b.author, b.sale_price,
+               ts_rank_cd(b.search_vector, q.query) AS rank
+        FROM book b, q
+        WHERE b.search_vector @@ q.query
+          AND b.is_deleted = FALSE
+        LIMIT %(candidates)s
+    )
+    SELECT c.id, c.isbn, c.title, c.author, c.sale_price, st.stock
+    FROM candidates c
+    JOIN book_stock st ON st.book_id = c.id
+    ORDER BY c.rank DESC, st.stock > 0 DESC, c.title, c.id
+    LIMIT %(limit)s
+"""
+
+CHANGED_WHILE_EDITING = "Запис змінили або видалили під час редагування, спробуйте ще раз."
+
+EMPLOYEE_EDIT_SQL = "SELECT name, position, phone, email FROM employee WHERE id=%s AND is_deleted=FALSE"
+BOOK_EDIT_SQL = """
+    SELECT isbn, title, author, genre, year, cost_price, sale_price
+    FROM book
+    WHERE id=%s AND is_deleted=FALSE
+"""
+SALE_EDIT_SQL = """
+    SELECT employee_id, sale_date, real_price, book_id, quantity_sold
+    FROM sale
+    WHERE id=%s AND is_deleted=FALSE
+"""
+
+
+def _read_for_edit(query, row_id):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(query, (row_id,))
+            return cur.fetchone()
+
+
+def _lock_unchanged(cur, query, row_id, row):
+    cur.execute(query + " FOR UPDATE", (row_id,))
+    if cur.fetchone() != row:
+        raise ValueError(CHANGED_WHILE_EDITING)
+
 
 def _input_non_empty(prompt):
-    value = input(prompt).strip()
+    value = timed_input(prompt).strip()
     if not value:
         raise ValueError("Поле не може бути порожнім.")
     return value
 
 
 def _input_int(prompt, min_value=None):
-    s = input(prompt).strip()
+    s = timed_input(prompt).strip()
     if not s.isdigit():
         raise ValueError("Потрібно ввести ціле число.")
     v = int(s)
@@ -23,7 +99,7 @@ def _input_int(prompt, min_value=None):
 
 
 def _input_float(prompt, min_value=None):
-    s = input(prompt).strip().replace(",", ".")
+    s = timed_input(prompt).strip().replace(",", ".")
     try:
         v = float(s)
     except ValueError:
@@ -34,7 +110,7 @@ def _input_float(prompt, min_value=None):
 
 
 def _input_date(prompt):
-    s = input(prompt).strip()
+    s = timed_input(prompt).strip()
     try:
         datetime.strptime(s, "%Y-%m-%d")
     except ValueError:
@@ -43,19 +119,37 @@ def _input_date(prompt):
 
 
 def _input_email(prompt):
-    s = input(prompt).strip()
+    s = timed_input(prompt).strip()
     if not EMAIL_RE.match(s):
         raise ValueError("Email має некоректний формат.")
     return s
 
 
+def _input_csv_path(columns: list) -> str:
+    print(f"Колонки: {', '.join(columns)} (перший рядок — заголовок)")
+    path = _input_non_empty("Шлях до файлу: ")
+    if not os.path.isfile(path):
+        raise ValueError("Файл не знайдено.")
+    return path
+
+
+def _print_import_result(name: str, columns: list, result: tuple, elapsed: float):
+    total, inserted, updated, rejects = result
+    print(f"Оброблено рядків: {total} за {elapsed:.2f} с ({total / max(elapsed, 1e-6):.0f} рядків/с)")
+    print(f"Додано: {inserted}, оновлено: {updated}")
+    if rejects:
+        filename = write_rejects(name, ["line"] + columns + ["reason"], rejects)
+        print(f"Відхилено рядків: {len(rejects)} (деталі в {filename})")
+
+
 class EmployeeCRUD:
+    @action
     def add(self):
         print("\n--- Додати співробітника ---")
         try:
             name = _input_non_empty("ПІБ: ")
-            position = input("Посада: ").strip()
-            phone = input("Телефон: ").strip()
+            position = timed_input("Посада: ").strip()
+            phone = timed_input("Телефон: ").strip()
             email = _input_email("Email: ")
 
             with get_conn() as conn:
@@ -71,47 +165,20 @@ class EmployeeCRUD:
         except Exception as e:
             print("Помилка:", e)
 
+    @action
     def list_all(self):
         print("\n--- Список співробітників ---")
         try:
-            with get_conn() as conn:
-                with conn.cursor() as cur:
-                    cur.execute(
-                        """
-                        SELECT id, name, position, phone, email
-                        FROM employee
-                        WHERE is_deleted = FALSE
-                        ORDER BY id
-                        """
-                    )
-                    rows = cur.fetchall()
-
-            if not rows:
-                print("Немає співробітників.")
-                return
-
-            print("ID | ПІБ | Посада | Телефон | Email")
-            print("-" * 80)
-            for r in rows:
-                print(f"{r[0]} | {r[1]} | {r[2]} | {r[3]} | {r[4]}")
+            browse_employees()
         except Exception as e:
             print("Помилка:", e)
 
+    @action
     def details(self):
         print("\n--- Деталі співробітника ---")
         try:
             emp_id = _input_int("Введіть ID: ", min_value=1)
-            with get_conn() as conn:
-                with conn.cursor() as cur:
-                    cur.execute(
-                        """
-                        SELECT id, name, position, phone, email
-                        FROM employee
-                        WHERE id = %s AND is_deleted = FALSE
-                        """,
-                        (emp_id,),
-                    )
-                    row = cur.fetchone()
+            row = cache.get_employee(emp_id)
 
             if row is None:
                 print("Співробітника не знайдено.")
@@ -125,52 +192,48 @@ class EmployeeCRUD:
         except Exception as e:
             print("Помилка:", e)
 
+    @action
     def update(self):
         print("\n--- Редагувати співробітника ---")
         try:
             emp_id = _input_int("Введіть ID: ", min_value=1)
+            row = _read_for_edit(EMPLOYEE_EDIT_SQL, emp_id)
+            if row is None:
+                print("Співробітника не знайдено.")
+                return
 
-            with get_conn() as conn:
-                with conn.cursor() as cur:
-                    cur.execute(
-                        """
-                        SELECT name, position, phone, email
-                        FROM employee
-                        WHERE id=%s AND is_deleted=FALSE
-                        """,
-                        (emp_id,),
-                    )
-                    row = cur.fetchone()
-                    if row is None:
-                        print("Співробітника не знайдено.")
-                        return
-
-                    old_name, old_position, old_phone, old_email = row
+            old_name, old_position, old_phone, old_email = row
 
-                    print("Залиште порожнім, якщо не хочете змінювати.")
-                    new_name = input(f"ПІБ ({old_name}): ").strip() or old_name
-                    new_position = input(f"Посада ({old_position}): ").strip() or old_position
-                    new_phone = input(f"Телефон ({old_phone}): ").strip() or old_phone
-                    new_email = input(f"Email ({old_email}): ").strip() or old_email
+            print("Залиште порожнім, якщо не хочете змінювати.")
+            new_name = timed_input(f"ПІБ ({old_name}): ").strip() or old_name
+            new_position = timed_input(f"Посада ({old_position}): ").strip() or old_position
+            new_phone = timed_input(f"Телефон ({old_phone}): ").strip() or old_phone
+            new_email = timed_input(f"Email ({old_email}): ").strip() or old_email
 
-                    if not new_name:
-                        raise ValueError("ПІБ не може бути порожнім.")
-                    if not EMAIL_RE.match(new_email):
-                        raise ValueError("Email має некоректний формат.")
+            if not new_name:
+                raise ValueError("ПІБ не може бути порожнім.")
+            if not EMAIL_RE.match(new_email):
+                raise ValueError("Email має некоректний формат.")
 
-                    cur.execute(
-                        """
-                        UPDATE employee
-                        SET name = %s, position = %s, phone = %s, email = %s
-                        WHERE id=%s
-                        """,
-                        (new_name, new_position, new_phone, new_email, emp_id),
-                    )
+            with get_conn() as conn:
+                with conn.transaction():
+                    with conn.cursor() as cur:
+                        _lock_unchanged(cur, EMPLOYEE_EDIT_SQL, emp_id, row)
+                        cur.execute(
+                            """
+                            UPDATE employee
+                            SET name = %s, position = %s, phone = %s, email = %s
+                            WHERE id=%s
+                            """,
+                            (new_name, new_position, new_phone, new_email, emp_id),
+                        )
+                        cache.notify_change(cur, "employee", emp_id)
 
             print("Дані оновлено.")
         except Exception as e:
             print("Помилка:", e)
 
+    @action
     def delete(self):
         print("\n--- Видалити співробітника (soft delete) ---")
         try:
@@ -186,23 +249,68 @@ class EmployeeCRUD:
                         return
 
                     cur.execute(
-                        "UPDATE employee SET is_deleted=TRUE WHERE id=%s;",
+                        "UPDATE employee SET is_deleted=TRUE, deleted_at=now() WHERE id=%s;",
                         (emp_id,),
                     )
+                    cache.notify_change(cur, "employee", emp_id)
 
             print("Співробітника позначено як видаленого.")
         except Exception as e:
             print("Помилка:", e)
 
+    @action
+    def import_csv(self):
+        print("\n--- Імпорт співробітників з CSV (оновлення за email) ---")
+        try:
+            path = _input_csv_path(EMPLOYEE_IMPORT_COLUMNS)
+            started = time.perf_counter()
+            result = import_employees_csv(path)
+            _print_import_result("employees_import", EMPLOYEE_IMPORT_COLUMNS, result, time.perf_counter() - started)
+        except Exception as e:
+            print("Помилка:", e)
+
+
+def search_books(text: str, limit: int = BOOK_SEARCH_LIMIT) -> list:
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            params = {"text": text, "limit": limit, "candidates": BOOK_SEARCH_CANDIDATES, "prefix": False}
+            cur.execute(BOOK_SEARCH_SQL, params)
+            rows = cur.fetchall()
+            if len(rows) < limit:
+                cur.execute(BOOK_SEARCH_SQL, dict(params, prefix=True))
+                rows = cur.fetchall()
+            return rows
+
+
+def _pick_book():
+    text = _input_non_empty("Назва, автор або ISBN: ")
+    rows = search_books(text)
+    if not rows:
+        print("Нічого не знайдено.")
+        return None
+
+    print("\n№ | ID | Назва | Автор | ISBN | Ціна | К-ть")
+    print("-" * 100)
+    for i, r in enumerate(rows, start=1):
+        print(f"{i}) {r[0]} | {r[2]} | {r[3]} | {r[1]} | {r[4]} | {r[5]}")
+
+    choice = timed_input("Номер книги (Enter — назад): ").strip()
+    if not choice:
+        return None
+    if not choice.isdigit() or not 1 <= int(choice) <= len(rows):
+        raise ValueError("Невірний номер.")
+    return rows[int(choice) - 1][0]
+
 
 class BookCRUD:
+    @action
     def add(self):
         print("\n--- Додати книгу ---")
         try:
             isbn = _input_non_empty("ISBN: ")
             title = _input_non_empty("Назва: ")
             author = _input_non_empty("Автор: ")
-            genre = input("Жанр: ").strip()
+            genre = timed_input("Жанр: ").strip()
             year = _input_int("Рік публікації: ", min_value=1)
             cost_price = _input_float("Собівартість: ", min_value=0.01)
             sale_price = _input_float("Потенційна ціна продажу: ", min_value=0.01)
@@ -213,56 +321,39 @@ class BookCRUD:
                     cur.execute(
                         """
                         INSERT INTO book (isbn, title, author, genre, year, cost_price, sale_price, quantity)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, 0)
+                        RETURNING id
                         """,
-                        (isbn, title, author, genre, year, cost_price, sale_price, quantity),
+                        (isbn, title, author, genre, year, cost_price, sale_price),
                     )
+                    if quantity:
+                        stock.record_movement(cur, cur.fetchone()[0], "receipt", quantity)
             print("Книгу додано.")
         except Exception as e:
             print("Помилка:", e)
 
+    @action
     def list_all(self):
         print("\n--- Список книг ---")
         try:
-            with get_conn() as conn:
-                with conn.cursor() as cur:
-                    cur.execute(
-                        """
-                        SELECT id, isbn, title, author, genre, year, cost_price, sale_price, quantity
-                        FROM book
-                        WHERE is_deleted = FALSE
-                        ORDER BY id
-                        """
-                    )
-                    rows = cur.fetchall()
-
-            if not rows:
-                print("Немає книг.")
-                return
-
-            print("ID | ISBN | Назва | Автор | Жанр | Рік | Собівартість | Ціна | К-ть")
-            print("-" * 120)
-            for r in rows:
-                print(f"{r[0]} | {r[1]} | {r[2]} | {r[3]} | {r[4]} | {r[5]} | {r[6]} | {r[7]} | {r[8]}")
+            browse_books()
         except Exception as e:
             print("Помилка:", e)
 
+    @action
     def details(self):
         print("\n--- Деталі книги ---")
         try:
             book_id = _input_int("Введіть ID: ", min_value=1)
+            row = cache.get_book(book_id)
+            if row is None:
+                print("Книгу не знайдено.")
+                return
+
             with get_conn() as conn:
                 with conn.cursor() as cur:
-                    cur.execute(
-                        """
-                        SELECT id, isbn, title, author, genre, year, cost_price, sale_price, quantity
-                        FROM book
-                        WHERE id=%s AND is_deleted=FALSE
-                        """,
-                        (book_id,),
-                    )
-                    row = cur.fetchone()
-            if row is None:
+                    quantity = stock.current_stock(cur, book_id)
+            if quantity is None:
                 print("Книгу не знайдено.")
                 return
 
@@ -274,68 +365,86 @@ class BookCRUD:
             print(f"Рік: {row[5]}")
             print(f"Собівартість: {row[6]}")
             print(f"Потенційна ціна: {row[7]}")
-            print(f"Залишок: {row[8]}")
+            print(f"Залишок: {quantity}")
+        except Exception as e:
+            print("Помилка:", e)
+
+    @action
+    def search(self):
+        print("\n--- Пошук книги ---")
+        try:
+            book_id = _pick_book()
         except Exception as e:
             print("Помилка:", e)
+            return
+        if book_id is not None:
+            SaleCRUD().create_sale(book_id)
 
+    @action
     def update(self):
         print("\n--- Редагувати книгу ---")
         try:
             book_id = _input_int("Введіть ID книги: ", min_value=1)
             with get_conn() as conn:
                 with conn.cursor() as cur:
-                    cur.execute(
-                        """
-                        SELECT isbn, title, author, genre, year, cost_price, sale_price, quantity
-                        FROM book
-                        WHERE id=%s AND is_deleted=FALSE
-                        """,
-                        (book_id,),
-                    )
+                    cur.execute(BOOK_EDIT_SQL, (book_id,))
                     row = cur.fetchone()
-                    if row is None:
-                        print("Книгу не знайдено.")
-                        return
+                    old_qty = None if row is None else stock.current_stock(cur, book_id)
+            if row is None:
+                print("Книгу не знайдено.")
+                return
 
-                    old_isbn, old_title, old_author, old_genre, old_year, old_cost, old_sale, old_qty = row
-                    print("Залиште порожнім, якщо не хочете змінювати.")
+            old_isbn, old_title, old_author, old_genre, old_year, old_cost, old_sale = row
+            print("Залиште порожнім, якщо не хочете змінювати.")
 
-                    new_isbn = input(f"ISBN ({old_isbn}): ").strip() or old_isbn
-                    new_title = input(f"Назва ({old_title}): ").strip() or old_title
-                    new_author = input(f"Автор ({old_author}): ").strip() or old_author
-                    new_genre = input(f"Жанр ({old_genre}): ").strip() or old_genre
+            new_isbn = timed_input(f"ISBN ({old_isbn}): ").strip() or old_isbn
+            new_title = timed_input(f"Назва ({old_title}): ").strip() or old_title
+            new_author = timed_input(f"Автор ({old_author}): ").strip() or old_author
+            new_genre = timed_input(f"Жанр ({old_genre}): ").strip() or old_genre
 
-                    year_str = input(f"Рік ({old_year}): ").strip()
-                    cost_str = input(f"Собівартість ({old_cost}): ").strip()
-                    sale_str = input(f"Ціна ({old_sale}): ").strip()
-                    qty_str = input(f"К-ть ({old_qty}): ").strip()
+            year_str = timed_input(f"Рік ({old_year}): ").strip()
+            cost_str = timed_input(f"Собівартість ({old_cost}): ").strip()
+            sale_str = timed_input(f"Ціна ({old_sale}): ").strip()
+            qty_str = timed_input(f"К-ть ({old_qty}): ").strip()
 
-                    new_year = old_year if not year_str else int(year_str)
-                    new_cost = float(old_cost) if not cost_str else float(cost_str.replace(",", "."))
-                    new_sale = float(old_sale) if not sale_str else float(sale_str.replace(",", "."))
-                    new_qty = int(old_qty) if not qty_str else int(qty_str)
+            new_year = old_year if not year_str else int(year_str)
+            new_cost = float(old_cost) if not cost_str else float(cost_str.replace(",", "."))
+            new_sale = float(old_sale) if not sale_str else float(sale_str.replace(",", "."))
+            new_qty = int(old_qty) if not qty_str else int(qty_str)
 
-                    if not new_title or not new_author:
-                        raise ValueError("Назва та автор не можуть бути порожні.")
-                    if new_cost <= 0 or new_sale <= 0:
-                        raise ValueError("Ціни мають бути > 0.")
-                    if new_qty < 0:
-                        raise ValueError("К-ть не може бути від'ємною.")
+            if not new_title or not new_author:
+                raise ValueError("Назва та автор не можуть бути порожні.")
+            if new_cost <= 0 or new_sale <= 0:
+                raise ValueError("Ціни мають бути > 0.")
+            if new_qty < 0:
+                raise ValueError("К-ть не може бути від'ємною.")
 
-                    cur.execute(
-                        """
-                        UPDATE book
-                        SET isbn = %s, title = %s, author = %s, genre = %s, year = %s,
-                            cost_price = %s, sale_price = %s, quantity = %s
-                        WHERE id=%s
-                        """,
-                        (new_isbn, new_title, new_author, new_genre, new_year, new_cost, new_sale, new_qty, book_id),
-                    )
+            with get_conn() as conn:
+                with conn.transaction():
+                    with conn.cursor() as cur:
+                        _lock_unchanged(cur, BOOK_EDIT_SQL, book_id, row)
+                        new_row = (new_isbn, new_title, new_author, new_genre, new_year, new_cost, new_sale)
+                        if new_row != (old_isbn, old_title, old_author, old_genre, old_year, float(old_cost), float(old_sale)):
+                            cur.execute(
+                                """
+                                UPDATE book
+                                SET isbn = %s, title = %s, author = %s, genre = %s, year = %s,
+                                    cost_price = %s, sale_price = %s
+                                WHERE id=%s
+                                """,
+                                (*new_row, book_id),
+                            )
+                            if new_cost != float(old_cost):
+                                rollup.update_book_cost(cur, book_id, new_cost)
+                            cache.notify_change(cur, "book", book_id)
+                        if qty_str and new_qty != old_qty:
+                            stock.adjust_stock(cur, book_id, new_qty)
 
             print("Книгу оновлено.")
         except Exception as e:
             print("Помилка:", e)
 
+    @action
     def delete(self):
         print("\n--- Видалити книгу (soft delete) ---")
         try:
@@ -346,87 +455,236 @@ class BookCRUD:
                     if cur.fetchone() is None:
                         print("Книгу не знайдено.")
                         return
-                    cur.execute("UPDATE book SET is_deleted=TRUE WHERE id=%s;", (book_id,))
+                    cur.execute("UPDATE book SET is_deleted=TRUE, deleted_at=now() WHERE id=%s;", (book_id,))
+                    cache.notify_change(cur, "book", book_id)
             print("Книгу позначено як видалену.")
         except Exception as e:
             print("Помилка:", e)
 
+    @action
+    def receive(self):
+        print("\n--- Надходження на склад ---")
+        try:
+            book_id = _input_int("Введіть ID книги: ", min_value=1)
+            quantity = _input_int("Кількість: ", min_value=1)
+            print(f"Надходження записано. Залишок: {stock.receive_stock(book_id, quantity)}")
+        except Exception as e:
+            print("Помилка:", e)
+
+    @action
+    def movements(self):
+        print("\n--- Рух товару книги ---")
+        try:
+            book_id = _input_int("Введіть ID книги: ", min_value=1)
+            rows = stock.book_movements(book_id)
+            if not rows:
+                print("Руху товару немає (залишок — початковий).")
+                return
+            print("\nID | Час | Операція | Зміна | Продаж")
+            print("-" * 80)
+            for r in rows:
+                print(f"{r[0]} | {r[1]:%Y-%m-%d %H:%M} | {stock.MOVEMENT_KINDS[r[2]]} | {r[3]:+d} | {r[4] or '—'}")
+        except Exception as e:
+            print("Помилка:", e)
+
+    @action
+    def import_csv(self):
+        print("\n--- Імпорт каталогу з CSV (поповнення за ISBN) ---")
+        print("Нові книги додаються, для наявних оновлюються ціни, а кількість додається до залишку.")
+        try:
+            path = _input_csv_path(BOOK_IMPORT_COLUMNS)
+            started = time.perf_counter()
+            result = import_books_csv(path)
+            _print_import_result("books_import", BOOK_IMPORT_COLUMNS, result, time.perf_counter() - started)
+        except Exception as e:
+            print("Помилка:", e)
+
+
+SELL_LINE_SQL = """
+    WITH sold AS (
+        SELECT b.id, b.cost_price
+        FROM book b
+        JOIN book_stock st ON st.book_id = b.id
+        JOIN employee e ON e.id = %(employee_id)s AND e.is_deleted = FALSE
+        WHERE b.id = %(book_id)s
+          AND b.is_deleted = FALSE
+          AND st.stock >= %(quantity)s
+    ), inserted AS (
+        INSERT INTO sale (employee_id, book_id, sale_date, real_price, quantity_sold)
+        SELECT %(employee_id)s, id, %(sale_date)s, %(real_price)s, %(quantity)s
+        FROM sold
+        RETURNING id
+    ), moved AS (
+        INSERT INTO stock_movement (book_id, kind, delta, sale_id)
+        SELECT %(book_id)s, 'sale', -%(quantity)s, id
+        FROM inserted
+    ), rolled_up AS (
+        INSERT INTO sale_daily_rollup AS r (sale_date, book_id, employee_id, quantity, revenue, cost)
+        SELECT %(sale_date)s, id, %(employee_id)s, %(quantity)s, %(real_price)s, cost_price * %(quantity)s
+        FROM sold
+        ON CONFLICT (sale_date, book_id, employee_id) DO UPDATE
+        SET quantity = r.quantity + EXCLUDED.quantity,
+            revenue = r.revenue + EXCLUDED.revenue,
+            cost = r.cost + EXCLUDED.cost
+    )
+    SELECT id FROM inserted
+"""
+
+
+def _sale_failure_reason(cur, line: dict) -> str:
+    cur.execute(
+        """
+        SELECT (SELECT TRUE FROM employee WHERE id=%(employee_id)s AND is_deleted=FALSE),
+               (SELECT st.stock FROM book b JOIN book_stock st ON st.book_id = b.id
+                WHERE b.id=%(book_id)s AND b.is_deleted=FALSE)
+        """,
+        line,
+    )
+    employee_found, quantity = cur.fetchone()
+    if not employee_found:
+        return "Співробітника не знайдено."
+    if quantity is None:
+        return f"Книгу не знайдено (ID={line['book_id']})."
+    return f"Недостатньо книг на складі (ID={line['book_id']}, залишок {quantity})."
+
+
+def _print_book_line(book_id: int):
+    book = cache.get_book(book_id)
+    if book is None:
+        raise ValueError(f"Книгу не знайдено (ID={book_id}).")
+    print(f"  {book[2]} — {book[3]}, ціна {book[7]}")
+
+
+def sell_basket(employee_id: int, lines: list, sale_date=None) -> list:
+    sale_date = sale_date or date.today()
+    params = [
+        {
+            "employee_id": employee_id,
+            "book_id": book_id,
+            "quantity": quantity,
+            "real_price": real_price,
+            "sale_date": sale_date,
+        }
+        for book_id, quantity, real_price in lines
+    ]
+
+    with get_conn() as conn:
+        with conn.transaction():
+            with conn.cursor() as cur:
+                with conn.pipeline():
+                    with conn.cursor() as lock_cur:
+                        stock.lock_books(lock_cur, [p["book_id"] for p in params])
+                    cur.executemany(SELL_LINE_SQL, params, returning=True)
+
+                sale_ids = []
+                while True:
+                    row = cur.fetchone()
+                    sale_ids.append(row[0] if row else None)
+                    if not cur.nextset():
+                        break
+
+                if None in sale_ids:
+                    raise ValueError(_sale_failure_reason(cur, params[sale_ids.index(None)]))
+
+    return sale_ids
+
+
+def delete_sale(sale_id: int) -> bool:
+    with get_conn() as conn:
+        with conn.transaction():
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT book_id, quantity_sold, employee_id, sale_date, real_price
+                    FROM sale
+                    WHERE id=%s AND is_deleted=FALSE
+                    FOR UPDATE
+                    """,
+                    (sale_id,),
+                )
+                row = cur.fetchone()
+                if row is None:
+                    return False
+
+                book_id, qty, emp_id, sale_date, total = row
+
+                stock.record_movement(cur, book_id, "reversal", qty, sale_id)
+                cur.execute(
+                    "UPDATE sale SET is_deleted=TRUE, deleted_at=now(), change_seq=nextval('sale_change_seq'), "
+                    "changed_xid=pg_current_xact_id() "
+                    "WHERE id=%s;",
+                    (sale_id,),
+                )
+                rollup.apply_sale(cur, sale_date, book_id, emp_id, qty, total, sign=-1)
+    return True
+
 
 class SaleCRUD:
-    def create_sale(self):
+    @action
+    def create_sale(self, book_id: int | None = None):
         print("\n--- Продаж книги ---")
         try:
             emp_id = _input_int("ID співробітника: ", min_value=1)
-            book_id = _input_int("ID книги: ", min_value=1)
+            if cache.get_employee(emp_id) is None:
+                raise ValueError("Співробітника не знайдено.")
+            if book_id is None:
+                book_str = timed_input("ID книги (Enter — пошук): ").strip()
+                if not book_str:
+                    book_id = _pick_book()
+                    if book_id is None:
+                        return
+                elif not book_str.isdigit() or int(book_str) < 1:
+                    raise ValueError("ID книги має бути цілим числом >= 1.")
+                else:
+                    book_id = int(book_str)
+            _print_book_line(book_id)
             quantity_sold = _input_int("Кількість: ", min_value=1)
             real_price = _input_float("Фактична сума продажу (TOTAL): ", min_value=0.01)
 
-            with get_conn() as conn:
-                with conn.transaction():
-                    with conn.cursor() as cur:
-                        cur.execute("SELECT id FROM employee WHERE id=%s AND is_deleted=FALSE;", (emp_id,))
-                        if cur.fetchone() is None:
-                            print("Співробітника не знайдено.")
-                            return
-
-                        cur.execute("SELECT quantity FROM book WHERE id=%s AND is_deleted=FALSE;", (book_id,))
-                        row = cur.fetchone()
-                        if row is None:
-                            print("Книгу не знайдено.")
-                            return
-
-                        current_quantity = row[0]
-                        if current_quantity < quantity_sold:
-                            print("Недостатньо книг на складі.")
-                            return
-
-                        cur.execute(
-                            "UPDATE book SET quantity = quantity - %s WHERE id=%s;",
-                            (quantity_sold, book_id),
-                        )
+            sell_basket(emp_id, [(book_id, quantity_sold, real_price)])
+            print("Продаж виконано.")
+        except Exception as e:
+            print("Помилка:", e)
 
-                        cur.execute(
-                            """
-                            INSERT INTO sale (employee_id, book_id, sale_date, real_price, quantity_sold)
-                            VALUES (%s, %s, %s, %s, %s)
-                            """,
-                            (emp_id, book_id, date.today(), real_price, quantity_sold),
-                        )
+    @action
+    def create_basket(self):
+        print("\n--- Продаж кошика (кілька книг) ---")
+        try:
+            emp_id = _input_int("ID співробітника: ", min_value=1)
+            if cache.get_employee(emp_id) is None:
+                raise ValueError("Співробітника не знайдено.")
+
+            lines = []
+            print("Вводьте позиції; порожній ID книги завершує кошик.")
+            while True:
+                book_str = timed_input("ID книги: ").strip()
+                if not book_str:
+                    break
+                if not book_str.isdigit() or int(book_str) < 1:
+                    raise ValueError("ID книги має бути цілим числом >= 1.")
+                _print_book_line(int(book_str))
+                quantity_sold = _input_int("Кількість: ", min_value=1)
+                real_price = _input_float("Фактична сума позиції (TOTAL): ", min_value=0.01)
+                lines.append((int(book_str), quantity_sold, real_price))
+
+            if not lines:
+                print("Кошик порожній.")
+                return
 
-            print("Продаж виконано.")
+            sale_ids = sell_basket(emp_id, lines)
+            print(f"Продаж виконано: {len(sale_ids)} позицій (ID продажів: {', '.join(map(str, sale_ids))}).")
         except Exception as e:
             print("Помилка:", e)
 
+    @action
     def list_all(self):
         print("\n--- Список продажів ---")
         try:
-            with get_conn() as conn:
-                with conn.cursor() as cur:
-                    cur.execute(
-                        """
-                        SELECT s.id, s.sale_date, e.name, b.title, s.quantity_sold, s.real_price
-                        FROM sale s
-                        JOIN employee e ON e.id = s.employee_id
-                        JOIN book b ON b.id = s.book_id
-                        WHERE s.is_deleted=FALSE
-                          AND e.is_deleted=FALSE
-                          AND b.is_deleted=FALSE
-                        ORDER BY s.id
-                        """
-                    )
-                    rows = cur.fetchall()
-
-            if not rows:
-                print("Немає продажів.")
-                return
-
-            print("ID | Дата | Співробітник | Книга | К-ть | Сума (TOTAL)")
-            print("-" * 100)
-            for r in rows:
-                print(f"{r[0]} | {r[1]} | {r[2]} | {r[3]} | {r[4]} | {r[5]}")
+            browse_sales()
         except Exception as e:
             print("Помилка:", e)
 
+    @action
     def details(self):
         print("\n--- Деталі продажу ---")
         try:
@@ -458,90 +716,85 @@ class SaleCRUD:
         except Exception as e:
             print("Помилка:", e)
 
+    @action
     def update(self):
         print("\n--- Редагувати продаж ---")
         try:
             sale_id = _input_int("ID продажу: ", min_value=1)
+            row = _read_for_edit(SALE_EDIT_SQL, sale_id)
+            if row is None:
+                print("Продаж не знайдено.")
+                return
 
-            with get_conn() as conn:
-                with conn.cursor() as cur:
-                    cur.execute(
-                        """
-                        SELECT employee_id, sale_date, real_price
-                        FROM sale
-                        WHERE id=%s AND is_deleted=FALSE
-                        """,
-                        (sale_id,),
-                    )
-                    row = cur.fetchone()
-                    if row is None:
-                        print("Продаж не знайдено.")
-                        return
-
-                    old_emp_id, old_date, old_total = row
+            old_emp_id, old_date, old_total, book_id, qty = row
 
-                    print("Залиште порожнім, якщо не хочете змінювати.")
-                    emp_str = input(f"Новий ID співробітника ({old_emp_id}): ").strip()
-                    date_str = input(f"Нова дата ({old_date}) [YYYY-MM-DD]: ").strip()
-                    total_str = input(f"Нова сума (TOTAL) ({old_total}): ").strip()
+            print("Залиште порожнім, якщо не хочете змінювати.")
+            emp_str = timed_input(f"Новий ID співробітника ({old_emp_id}): ").strip()
+            date_str = timed_input(f"Нова дата ({old_date}) [YYYY-MM-DD]: ").strip()
+            total_str = timed_input(f"Нова сума (TOTAL) ({old_total}): ").strip()
 
-                    new_emp_id = old_emp_id if not emp_str else int(emp_str)
-                    new_total = float(old_total) if not total_str else float(total_str.replace(",", "."))
+            new_emp_id = old_emp_id if not emp_str else int(emp_str)
+            new_total = float(old_total) if not total_str else float(total_str.replace(",", "."))
 
-                    if new_total <= 0:
-                        raise ValueError("Сума має бути > 0.")
+            if new_total <= 0:
+                raise ValueError("Сума має бути > 0.")
 
-                    if date_str:
-                        datetime.strptime(date_str, "%Y-%m-%d")
-                        new_date = date_str
-                    else:
-                        new_date = old_date
+            if date_str:
+                datetime.strptime(date_str, "%Y-%m-%d")
+                new_date = date_str
+            else:
+                new_date = old_date
 
-                    cur.execute("SELECT id FROM employee WHERE id=%s AND is_deleted=FALSE;", (new_emp_id,))
-                    if cur.fetchone() is None:
-                        print("Співробітника не знайдено.")
-                        return
+            with get_conn() as conn:
+                with conn.transaction():
+                    with conn.cursor() as cur:
+                        _lock_unchanged(cur, SALE_EDIT_SQL, sale_id, row)
+                        if cache.get_employee(new_emp_id, cur) is None:
+                            print("Співробітника не знайдено.")
+                            return
 
-                    cur.execute(
-                        """
-                        UPDATE sale
-                        SET employee_id = %s, sale_date = %s, real_price = %s
-                        WHERE id=%s
-                        """,
-                        (new_emp_id, new_date, new_total, sale_id),
-                    )
+                        cur.execute(
+                            """
+                            UPDATE sale
+                            SET employee_id = %s, sale_date = %s, real_price = %s,
+                                change_seq = nextval('sale_change_seq'), changed_xid = pg_current_xact_id()
+                            WHERE id=%s
+                            """,
+                            (new_emp_id, new_date, new_total, sale_id),
+                        )
+                        rollup.apply_sale(cur, old_date, book_id, old_emp_id, qty, old_total, sign=-1)
+                        rollup.apply_sale(cur, new_date, book_id, new_emp_id, qty, new_total)
 
             print("Продаж оновлено.")
         except Exception as e:
             print("Помилка:", e)
 
+    @action
     def delete(self):
         print("\n--- Видалити продаж (soft delete) ---")
         try:
             sale_id = _input_int("ID продажу: ", min_value=1)
+            if not delete_sale(sale_id):
+                print("Продаж не знайдено.")
+                return
+            print("Продаж видалено (soft delete).")
+        except Exception as e:
+            print("Помилка:", e)
 
-            with get_conn() as conn:
-                with conn.transaction():
-                    with conn.cursor() as cur:
-                        cur.execute(
-                            """
-                            SELECT book_id, quantity_sold
-                            FROM sale
-                            WHERE id=%s AND is_deleted=FALSE
-                            """,
-                            (sale_id,),
-                        )
-                        row = cur.fetchone()
-                        if row is None:
-                            print("Продаж не знайдено.")
-                            return
-
-                        book_id, qty = row
+    @action
+    def import_csv(self):
+        print("\n--- Імпорт продажів з CSV ---")
+        try:
+            path = _input_csv_path(SALE_IMPORT_COLUMNS)
 
-                        cur.execute("UPDATE book SET quantity = quantity + %s WHERE id=%s;", (qty, book_id))
-                        cur.execute("UPDATE sale SET is_deleted=TRUE WHERE id=%s;", (sale_id,))
+            started = time.perf_counter()
+            imported, rejects = import_sales_csv(path)
+            elapsed = time.perf_counter() - started
 
-            print("Продаж видалено (soft delete).")
+            print(f"Імпортовано продажів: {imported} за {elapsed:.2f} с")
+            if rejects:
+                filename = write_rejects("sales_import", ["line"] + SALE_IMPORT_COLUMNS + ["reason"], rejects)
+                print(f"Відхилено рядків: {len(rejects)} (деталі в {filename})")
         except Exception as e:
             print("Помилка:", e)
 
@@ -555,9 +808,10 @@ def employees_menu():
         print("3) Деталі")
         print("4) Редагувати")
         print("5) Видалити")
+        print("6) Імпорт з CSV")
         print("0) Назад")
 
-        choice = input("Оберіть пункт: ").strip()
+        choice = timed_input("Оберіть пункт: ").strip()
         if choice == "0":
             break
         elif choice == "1":
@@ -570,6 +824,8 @@ def employees_menu():
             emp.update()
         elif choice == "5":
             emp.delete()
+        elif choice == "6":
+            emp.import_csv()
         else:
             print("Невірний пункт.")
 
@@ -583,9 +839,14 @@ def books_menu():
         print("3) Деталі")
         print("4) Редагувати")
         print("5) Видалити")
+        print("6) Пошук і продаж")
+        print("7) Надходження на склад")
+        print("8) Рух товару книги")
+        print("9) Стиснути журнал руху товару")
+        print("10) Імпорт каталогу з CSV (поповнення за ISBN)")
         print("0) Назад")
 
-        choice = input("Оберіть пункт: ").strip()
+        choice = timed_input("Оберіть пункт: ").strip()
         if choice == "0":
             break
         elif choice == "1":
@@ -598,6 +859,16 @@ def books_menu():
             book.update()
         elif choice == "5":
             book.delete()
+        elif choice == "6":
+            book.search()
+        elif choice == "7":
+            book.receive()
+        elif choice == "8":
+            book.movements()
+        elif choice == "9":
+            stock.compact_ledger_menu()
+        elif choice == "10":
+            book.import_csv()
         else:
             print("Невірний пункт.")
 
@@ -611,9 +882,11 @@ def sales_menu():
         print("3) Деталі продажу")
         print("4) Редагувати продаж")
         print("5) Видалити продаж")
+        print("6) Імпорт продажів з CSV")
+        print("7) Продаж кошика (кілька книг)")
         print("0) Назад")
 
-        choice = input("Оберіть пункт: ").strip()
+        choice = timed_input("Оберіть пункт: ").strip()
         if choice == "0":
             break
         elif choice == "1":
@@ -626,5 +899,9 @@ def sales_menu():
             sale.update()
         elif choice == "5":
             sale.delete()
+        elif choice == "6":
+            sale.import_csv()
+        elif choice == "7":
+            sale.create_basket()
         else:
             print("Невірний пункт.")
\ No newline at end of file
@@ -1,8 +1,13 @@
 import os
-import datetime
-import random
+from contextlib import contextmanager
+from datetime import date, timedelta
+import threading
+import time
 import psycopg
+from psycopg_pool import ConnectionPool, PoolTimeout
 from dotenv import load_dotenv
+from instrumentation import configure_connection, record_connect
+from migrations import LATEST_VERSION, apply_migrations, ensure_sale_partitions, schema_version
 load_dotenv()
 
 
@@ -12,9 +17,37 @@ DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_PORT = os.getenv("DB_PORT", "5432")
 DB_NAME = os.getenv("DB_NAME", "bookstore")
 
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "5"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", "3600"))
+DB_POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", "600"))
 
-def _conn_str(dbname: str) -> str:
-    return f"dbname={dbname} user={DB_USER} password={DB_PASSWORD} host={DB_HOST} port={DB_PORT}"
+DB_FETCH_SIZE = int(os.getenv("DB_FETCH_SIZE", "2000"))
+
+DB_REPLICA_HOST = os.getenv("DB_REPLICA_HOST", "")
+DB_REPLICA_PORT = os.getenv("DB_REPLICA_PORT", DB_PORT)
+DB_REPLICA_TIMEOUT = float(os.getenv("DB_REPLICA_TIMEOUT", "2"))
+DB_REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", "30"))
+DB_REPLICA_CHECK_SECONDS = float(os.getenv("DB_REPLICA_CHECK_SECONDS", "10"))
+
+REPLICA_LAG_SQL = """
+    SELECT pg_is_in_recovery(),
+           CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+           END::float8
+"""
+
+SALE_PARTITIONS_AHEAD_MONTHS = int(os.getenv("SALE_PARTITIONS_AHEAD_MONTHS", "3"))
+
+_pool = None
+_pool_lock = threading.Lock()
+_replica_pool = None
+_replica = {"ok": None, "lag": None, "error": None, "next_check": 0.0}
+
+
+def _conn_str(dbname: str, host: str = DB_HOST, port: str = DB_PORT) -> str:
+    return f"dbname={dbname} user={DB_USER} password={DB_PASSWORD} host={host} port={port}"
 
 
 def create_db_if_not_exists():
@@ -29,134 +62,201 @@ def create_db_if_not_exists():
                 print(f"[DB] База даних {DB_NAME} вже існує")
 
 
+def dedicated_conn():
+    return psycopg.connect(_conn_str(DB_NAME), autocommit=True)
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(
+                _conn_str(DB_NAME),
+                min_size=DB_POOL_MIN,
+                max_size=DB_POOL_MAX,
+                timeout=DB_POOL_TIMEOUT,
+                max_lifetime=DB_POOL_MAX_LIFETIME,
+                max_idle=DB_POOL_MAX_IDLE,
+                configure=configure_connection,
+                check=ConnectionPool.check_connection,
+                name="bookstore",
+                open=True,
+            )
+        return _pool
+
+
+@contextmanager
 def get_conn():
-    return psycopg.connect(_conn_str(DB_NAME))
+    started = time.perf_counter()
+    with get_pool().connection() as conn:
+        record_connect((time.perf_counter() - started) * 1000)
+        yield conn
 
 
-def init_tables():
-    with get_conn() as conn:
-        with conn.cursor() as cur:
-            cur.execute("""
-            CREATE TABLE IF NOT EXISTS employee (
-                id SERIAL PRIMARY KEY,
-                name TEXT NOT NULL,
-                position TEXT,
-                phone TEXT,
-                email TEXT UNIQUE NOT NULL,
-                is_deleted BOOLEAN NOT NULL DEFAULT FALSE
-            );
-            """)
+def get_replica_pool() -> ConnectionPool:
+    global _replica_pool
+    with _pool_lock:
+        if _replica_pool is None:
+            _replica_pool = ConnectionPool(
+                _conn_str(DB_NAME, DB_REPLICA_HOST, DB_REPLICA_PORT),
+                min_size=DB_POOL_MIN,
+                max_size=DB_POOL_MAX,
+                timeout=DB_REPLICA_TIMEOUT,
+                max_lifetime=DB_POOL_MAX_LIFETIME,
+                max_idle=DB_POOL_MAX_IDLE,
+                configure=configure_connection,
+                check=ConnectionPool.check_connection,
+                name="bookstore-replica",
+                open=True,
+            )
+        return _replica_pool
 
-            cur.execute("""
-            CREATE TABLE IF NOT EXISTS book (
-                id SERIAL PRIMARY KEY,
-                isbn TEXT UNIQUE NOT NULL,
-                title TEXT NOT NULL,
-                author TEXT NOT NULL,
-                genre TEXT,
-                year INT,
-                cost_price NUMERIC NOT NULL CHECK (cost_price > 0),
-                sale_price NUMERIC NOT NULL CHECK (sale_price > 0),
-                quantity INT NOT NULL CHECK (quantity >= 0),
-                is_deleted BOOLEAN NOT NULL DEFAULT FALSE
-            );
-            """)
 
-            cur.execute("""
-            CREATE TABLE IF NOT EXISTS sale (
-                id SERIAL PRIMARY KEY,
-                employee_id INT NOT NULL REFERENCES employee(id),
-                book_id INT NOT NULL REFERENCES book(id),
-                sale_date DATE NOT NULL,
-                real_price NUMERIC NOT NULL CHECK (real_price > 0),
-                quantity_sold INT NOT NULL CHECK (quantity_sold > 0),
-                is_deleted BOOLEAN NOT NULL DEFAULT FALSE
-            );
-            """)
+def _check_replica():
+    try:
+        with get_replica_pool().connection(timeout=DB_REPLICA_TIMEOUT) as conn:
+            in_recovery, lag = conn.execute(REPLICA_LAG_SQL).fetchone()
+        if not in_recovery:
+            ok, error = False, "сервер не є реплікою"
+        elif lag > DB_REPLICA_MAX_LAG:
+            ok, error = False, f"відставання {lag:.1f} с > {DB_REPLICA_MAX_LAG:g} с"
+        else:
+            ok, error = True, None
+    except (psycopg.Error, PoolTimeout) as e:
+        ok, lag, error = False, None, str(e).strip() or type(e).__name__
+
+    if ok != _replica["ok"]:
+        if ok:
+            print(f"[DB] Звіти читають з репліки {DB_REPLICA_HOST}")
+        else:
+            print(f"[DB] Репліка {DB_REPLICA_HOST} недоступна для звітів ({error}), читаємо з основної БД")
+    _replica.update(ok=ok, lag=lag, error=error)
+
+
+def _use_replica() -> bool:
+    if not DB_REPLICA_HOST:
+        return False
+    with _pool_lock:
+        due = time.monotonic() >= _replica["next_check"]
+        if due:
+            _replica["next_check"] = time.monotonic() + DB_REPLICA_CHECK_SECONDS
+    if due:
+        _check_replica()
+    return bool(_replica["ok"])
 
-    print("[DB] Таблиці готові")
 
+@contextmanager
+def get_read_conn():
+    conn = None
+    if _use_replica():
+        pool = get_replica_pool()
+        started = time.perf_counter()
+        try:
+            conn = pool.getconn(timeout=DB_REPLICA_TIMEOUT)
+        except PoolTimeout:
+            _replica["next_check"] = 0.0
+        record_connect((time.perf_counter() - started) * 1000)
 
-def seed_data():
-    with get_conn() as conn:
+    if conn is None:
+        with get_conn() as conn:
+            yield conn
+        return
+
+    try:
+        with conn:
+            yield conn
+    finally:
+        pool.putconn(conn)
+
+
+def sale_horizon(cur) -> int:
+    cur.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint;")
+    return cur.fetchone()[0]
+
+
+def replica_status() -> dict:
+    if not DB_REPLICA_HOST:
+        return {}
+    return {
+        "host": DB_REPLICA_HOST,
+        "in_use": bool(_replica["ok"]),
+        "lag_seconds": _replica["lag"],
+        "error": _replica["error"],
+        "pool": _replica_pool.get_stats() if _replica_pool is not None else {},
+    }
+
+
+def stream_rows(conn, name: str, query, params=None, fetch_size: int | None = None):
+    size = fetch_size or DB_FETCH_SIZE
+    with conn.cursor(name=name) as cur:
+        cur.itersize = size
+        cur.execute(query, params)
+        while True:
+            rows = cur.fetchmany(size)
+            if not rows:
+                break
+            yield rows
+
+
+def pool_stats() -> dict:
+    if _pool is None:
+        return {}
+    return _pool.get_stats()
+
+
+def close_pool():
+    global _pool, _replica_pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+        if _replica_pool is not None:
+            _replica_pool.close()
+            _replica_pool = None
+        _replica.update(ok=None, lag=None, error=None, next_check=0.0)
+
+
+def seed_data(conn):
+    from datagen import DEMO_BOOKS, DEMO_EMPLOYEES, generate
+
+    with conn.transaction():
         with conn.cursor() as cur:
-            cur.execute("SELECT COUNT(*) FROM employee;")
-            emp_count = cur.fetchone()[0]
-            cur.execute("SELECT COUNT(*) FROM book;")
-            book_count = cur.fetchone()[0]
-            cur.execute("SELECT COUNT(*) FROM sale;")
-            sale_count = cur.fetchone()[0]
-
-            if emp_count == 0:
-                employees = [
-                    ("Іван Петренко", "Продавець", "+380501112233", "ivan.petrenko@example.com"),
-                    ("Олена Коваль", "Продавець", "+380631234567", "olena.koval@example.com"),
-                    ("Андрій Мельник", "Старший продавець", "+380671110022", "andrii.melnyk@example.com"),
-                    ("Марія Ткаченко", "Касир", "+380951234111", "maria.tkachenko@example.com"),
-                ]
-                cur.executemany(
-                    "INSERT INTO employee (name, position, phone, email) VALUES (%s, %s, %s, %s);",
-                    employees,
-                )
-                print("[DB] Додано demo співробітників (4)")
-
-            if book_count == 0:
-                books = [
-                    ("978-617-12-0001-1", "Кобзар", "Тарас Шевченко", "Класика", 2015, 120.0, 220.0, 10),
-                    ("978-617-12-0002-8", "Лісова пісня", "Леся Українка", "Драма", 2018, 90.0, 180.0, 8),
-                    ("978-617-12-0003-5", "Тигролови", "Іван Багряний", "Роман", 2019, 110.0, 210.0, 6),
-                    ("978-617-12-0004-2", "1984", "Джордж Орвелл", "Антиутопія", 2020, 140.0, 260.0, 7),
-                    ("978-617-12-0005-9", "Маленький принц", "Антуан де Сент-Екзюпері", "Казка", 2017, 80.0, 150.0, 12),
-                    ("978-617-12-0006-6", "Гаррі Поттер 1", "Дж. К. Ролінґ", "Фентезі", 2021, 200.0, 350.0, 9),
-                    ("978-617-12-0007-3", "Місто", "Валер'ян Підмогильний", "Роман", 2016, 100.0, 190.0, 5),
-                    ("978-617-12-0008-0", "Сад Гетсиманський", "Іван Багряний", "Роман", 2022, 130.0, 240.0, 4),
-                    ("978-617-12-0009-7", "Алхімік", "Пауло Коельйо", "Роман", 2014, 95.0, 175.0, 11),
-                    ("978-617-12-0010-3", "Дюна", "Френк Герберт", "Фантастика", 2023, 220.0, 390.0, 3),
-                ]
-                cur.executemany(
-                    """
-                    INSERT INTO book (isbn, title, author, genre, year, cost_price, sale_price, quantity)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s);
-                    """,
-                    books,
-                )
-                print("[DB] Додано demo книги (10)")
-
-            if sale_count == 0:
-                cur.execute("SELECT id FROM employee WHERE is_deleted=FALSE ORDER BY id;")
-                emp_ids = [r[0] for r in cur.fetchall()]
-                cur.execute("SELECT id, sale_price FROM book WHERE is_deleted=FALSE ORDER BY id;")
-                book_rows = cur.fetchall()
-
-                if emp_ids and book_rows:
-                    today = datetime.date.today()
-                    sales_to_insert = []
-                    for _ in range(10):
-                        emp_id = random.choice(emp_ids)
-                        book_id, sale_price = random.choice(book_rows)
-                        qty = random.randint(1, 2)
-                        total = float(sale_price) * qty
-                        sale_date = today - datetime.timedelta(days=random.randint(0, 30))
-                        sales_to_insert.append((emp_id, book_id, sale_date, total, qty))
-
-                    for emp_id, book_id, sale_date, total, qty in sales_to_insert:
-                        cur.execute("SELECT quantity FROM book WHERE id=%s;", (book_id,))
-                        q = cur.fetchone()[0]
-                        if q >= qty:
-                            cur.execute("UPDATE book SET quantity = quantity - %s WHERE id=%s;", (qty, book_id))
-                            cur.execute(
-                                """
-                                INSERT INTO sale (employee_id, book_id, sale_date, real_price, quantity_sold)
-                                VALUES (%s, %s, %s, %s, %s);
-                                """,
-                                (emp_id, book_id, sale_date, total, qty),
-                            )
-                print("[DB] Додано demo продажі (до 10)")
+            cur.execute("""
+                SELECT EXISTS (SELECT 1 FROM employee),
+                       EXISTS (SELECT 1 FROM book),
+                       EXISTS (SELECT 1 FROM sale);
+            """)
+            has_employees, has_books, has_sales = cur.fetchone()
+
+        generate(
+            conn,
+            employees=0 if has_employees else len(DEMO_EMPLOYEES),
+            books=0 if has_books else len(DEMO_BOOKS),
+            sales=0 if has_sales else 10,
+            days=31,
+            restock=False,
+        )
 
     print("[DB] Seed готовий")
 
 
 def init_db():
-    create_db_if_not_exists()
-    init_tables()
-    seed_data()
\ No newline at end of file
+    started = time.perf_counter()
+    try:
+        conn = psycopg.connect(_conn_str(DB_NAME), autocommit=True)
+    except psycopg.OperationalError:
+        create_db_if_not_exists()
+        conn = psycopg.connect(_conn_str(DB_NAME), autocommit=True)
+
+    with conn:
+        version = schema_version(conn)
+        if version < LATEST_VERSION:
+            version = apply_migrations(conn)
+            print(f"[DB] Таблиці готові (схема версії {version})")
+            seed_data(conn)
+        with conn.cursor() as cur:
+            today = date.today()
+            ensure_sale_partitions(cur, today, today + timedelta(days=31 * SALE_PARTITIONS_AHEAD_MONTHS))
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"[DB] Схема версії {version}, старт за {elapsed_ms:.0f} мс")
\ No newline at end of file
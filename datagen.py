@@ -0,0 +1,268 @@
+import argparse
+import itertools
+import random
+import time
+from collections import Counter
+from datetime import date, timedelta
+from database import dedicated_conn, init_db
+from migrations import ensure_sale_partitions
+from rollup import add_sales_after
+
+BATCH_SIZE = 100_000
+REBUILD_CONSTRAINTS_FROM = 1_000_000
+ZIPF_S = 1.1
+RESTOCK_QUANTITY = 100
+
+DEMO_EMPLOYEES = [
+    ("Іван Петренко", "Продавець", "+380501112233", "ivan.petrenko@example.com"),
+    ("Олена Коваль", "Продавець", "+380631234567", "olena.koval@example.com"),
+    ("Андрій Мельник", "Старший продавець", "+380671110022", "andrii.melnyk@example.com"),
+    ("Марія Ткаченко", "Касир", "+380951234111", "maria.tkachenko@example.com"),
+]
+
+DEMO_BOOKS = [
+    ("978-617-12-0001-1", "Кобзар", "Тарас Шевченко", "Класика", 2015, 120.0, 220.0, 10),
+    ("978-617-12-0002-8", "Лісова пісня", "Леся Українка", "Драма", 2018, 90.0, 180.0, 8),
+    ("978-617-12-0003-5", "Тигролови", "Іван Багряний", "Роман", 2019, 110.0, 210.0, 6),
+    ("978-617-12-0004-2", "1984", "Джордж Орвелл", "Антиутопія", 2020, 140.0, 260.0, 7),
+    ("978-617-12-0005-9", "Маленький принц", "Антуан де Сент-Екзюпері", "Казка", 2017, 80.0, 150.0, 12),
+    ("978-617-12-0006-6", "Гаррі Поттер 1", "Дж. К. Ролінґ", "Фентезі", 2021, 200.0, 350.0, 9),
+    ("978-617-12-0007-3", "Місто", "Валер'ян Підмогильний", "Роман", 2016, 100.0, 190.0, 5),
+    ("978-617-12-0008-0", "Сад Гетсиманський", "Іван Багряний", "Роман", 2022, 130.0, 240.0, 4),
+    ("978-617-12-0009-7", "Алхімік", "Пауло Коельйо", "Роман", 2014, 95.0, 175.0, 11),
+    ("978-617-12-0010-3", "Дюна", "Френк Герберт", "Фантастика", 2023, 220.0, 390.0, 3),
+]
+
+FIRST_NAMES = ["Іван", "Олена", "Андрій", "Марія", "Петро", "Ольга", "Максим", "Анна", "Дмитро", "Наталія",
+               "Сергій", "Ірина", "Олег", "Юлія", "Тарас", "Софія", "Богдан", "Катерина", "Василь", "Оксана"]
+LAST_NAMES = ["Петренко", "Коваль", "Мельник", "Ткаченко", "Шевченко", "Бондар", "Кравченко", "Олійник",
+              "Шевчук", "Поліщук", "Бойко", "Ткачук", "Савченко", "Руденко", "Марченко", "Лисенко"]
+POSITIONS = ["Продавець", "Старший продавець", "Касир", "Консультант", "Адміністратор"]
+POSITION_WEIGHTS = [50, 15, 20, 12, 3]
+
+GENRES = ["Роман", "Фантастика", "Фентезі", "Детектив", "Класика", "Драма", "Поезія", "Казка",
+          "Антиутопія", "Історія", "Біографія", "Наука"]
+GENRE_WEIGHTS = [20, 12, 12, 14, 8, 6, 3, 6, 3, 7, 4, 5]
+TITLE_WORDS = ["Тінь", "Місто", "Сад", "Вітер", "Дорога", "Сонце", "Ріка", "Зима", "Таємниця", "Дім",
+               "Ліс", "Море", "Світло", "Пісня", "Острів", "Зірка", "Ніч", "Степ", "Міст", "Час"]
+TITLE_ADJECTIVES = ["Останній", "Далекий", "Тихий", "Забутий", "Золотий", "Холодний", "Новий", "Старий",
+                    "Червоний", "Безкінечний"]
+SYLLABLES = ["ба", "ва", "го", "да", "же", "зо", "ки", "ла", "ме", "но", "пі", "ро", "са", "ті", "ур", "фе",
+             "ха", "це", "чу", "ша", "ян", "ко", "лі", "ми", "ну", "ос", "ре", "сту", "три", "ві", "дні", "гри"]
+SURNAME_SUFFIXES = ["енко", "ук", "юк", "ич", "ський", "ко", "ів", "ишин"]
+VOCABULARY_SIZE = 20_000
+
+QUANTITIES = [1, 2, 3, 4, 5]
+QUANTITY_WEIGHTS = [70, 18, 7, 3, 2]
+DISCOUNTS = [1.0, 0.95, 0.9, 0.8]
+DISCOUNT_WEIGHTS = [80, 10, 7, 3]
+MONTH_WEIGHTS = [0.8, 0.8, 0.9, 0.9, 0.9, 0.8, 0.8, 1.2, 1.3, 1.0, 1.1, 1.6]
+WEEKDAY_WEIGHTS = [0.9, 0.9, 0.9, 1.0, 1.1, 1.4, 1.2]
+
+
+def _next_id(cur, table: str) -> int:
+    cur.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table};")
+    return cur.fetchone()[0]
+
+
+def _employee_rows(rng: random.Random, start: int, count: int):
+    for n in range(start, start + count):
+        if n < len(DEMO_EMPLOYEES):
+            yield DEMO_EMPLOYEES[n]
+            continue
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        position = rng.choices(POSITIONS, weights=POSITION_WEIGHTS)[0]
+        yield name, position, f"+38050{n:07d}", f"staff{n}@bookstore.example"
+
+
+def _vocabulary(rng: random.Random) -> tuple[list, list]:
+    words = [w.lower() for w in TITLE_WORDS + TITLE_ADJECTIVES]
+    while len(words) < VOCABULARY_SIZE:
+        words.append("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return words, list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+
+
+def _book_rows(rng: random.Random, start: int, count: int):
+    words, word_weights = _vocabulary(rng)
+    surnames = LAST_NAMES + [
+        "".join(rng.choices(SYLLABLES, k=2)).capitalize() + rng.choice(SURNAME_SUFFIXES)
+        for _ in range(max(count // 20, 1))
+    ]
+    authors = [f"{rng.choice(FIRST_NAMES)} {rng.choice(surnames)}" for _ in range(max(count // 8, 1))]
+    last_year = date.today().year
+    for n in range(start, start + count):
+        if n < len(DEMO_BOOKS):
+            yield DEMO_BOOKS[n]
+            continue
+        title = " ".join(rng.choices(words, cum_weights=word_weights, k=rng.randint(1, 4))).capitalize()
+        genre = rng.choices(GENRES, weights=GENRE_WEIGHTS)[0]
+        cost = round(rng.uniform(60, 400), 2)
+        price = round(cost * rng.uniform(1.3, 2.0), 2)
+        yield (f"979-{n:010d}", title, rng.choice(authors), genre, rng.randint(1990, last_year),
+               cost, price, rng.randint(0, 500))
+
+
+def _load_employees(cur, rng: random.Random, count: int):
+    start = _next_id(cur, "employee")
+    with cur.copy("COPY employee (name, position, phone, email) FROM STDIN") as copy:
+        for row in _employee_rows(rng, start, count):
+            copy.write_row(row)
+    print(f"[DATA] Співробітників додано: {count}")
+
+
+def _load_books(cur, rng: random.Random, count: int):
+    start = _next_id(cur, "book")
+    with cur.copy(
+        "COPY book (isbn, title, author, genre, year, cost_price, sale_price, quantity) FROM STDIN"
+    ) as copy:
+        for row in _book_rows(rng, start, count):
+            copy.write_row(row)
+    print(f"[DATA] Книг додано: {count}")
+
+
+def _sale_days(days: int) -> tuple[list, list]:
+    end = date.today()
+    calendar = [end - timedelta(days=i) for i in range(days - 1, -1, -1)]
+    weights = [MONTH_WEIGHTS[d.month - 1] * WEEKDAY_WEIGHTS[d.weekday()] for d in calendar]
+    return [d.isoformat() for d in calendar], list(itertools.accumulate(weights))
+
+
+def _drop_sale_constraints(cur) -> list:
+    cur.execute("""
+        SELECT format('ALTER TABLE sale ADD CONSTRAINT %I %s', conname, pg_get_constraintdef(oid)),
+               format('ALTER TABLE sale DROP CONSTRAINT %I', conname)
+        FROM pg_constraint
+        WHERE conrelid = 'sale'::regclass AND contype = 'f'
+        UNION ALL
+        SELECT replace(pg_get_indexdef(i.indexrelid), ' ON ONLY ', ' ON '),
+               format('DROP INDEX %s', i.indexrelid::regclass)
+        FROM pg_index i
+        WHERE i.indrelid = 'sale'::regclass AND NOT i.indisprimary AND NOT i.indisunique;
+    """)
+    restore = []
+    for create, drop in cur.fetchall():
+        cur.execute(drop)
+        restore.append(create)
+    return restore
+
+
+def _load_sales(cur, rng: random.Random, count: int, days: int, batch_size: int, zipf_s: float,
+                restock: bool):
+    cur.execute("SELECT id FROM employee WHERE is_deleted = FALSE ORDER BY id;")
+    employee_ids = [r[0] for r in cur.fetchall()]
+    cur.execute("""
+        SELECT b.id, b.sale_price, st.stock
+        FROM book b
+        JOIN book_stock st ON st.book_id = b.id
+        WHERE b.is_deleted = FALSE
+        ORDER BY b.id;
+    """)
+    book_rows = cur.fetchall()
+    books = [(r[0], float(r[1])) for r in book_rows]
+    stock_left = {r[0]: r[2] for r in book_rows}
+    received = Counter()
+    if not employee_ids or not books:
+        print("[DATA] Немає співробітників або книг — продажі не згенеровано")
+        return
+
+    rng.shuffle(books)
+    book_weights = list(itertools.accumulate(1 / (rank + 1) ** zipf_s for rank in range(len(books))))
+    employee_weights = list(itertools.accumulate(rng.uniform(0.5, 1.5) for _ in employee_ids))
+    day_values, day_weights = _sale_days(days)
+
+    ensure_sale_partitions(cur, day_values[0], day_values[-1])
+    last_sale_id = _next_id(cur, "sale")
+    restore = _drop_sale_constraints(cur) if count >= REBUILD_CONSTRAINTS_FROM else []
+    started = time.perf_counter()
+    generated = loaded = 0
+    while generated < count:
+        n = min(batch_size, count - generated)
+        sold = rng.choices(books, cum_weights=book_weights, k=n)
+        sellers = rng.choices(employee_ids, cum_weights=employee_weights, k=n)
+        sale_days = rng.choices(day_values, cum_weights=day_weights, k=n)
+        quantities = rng.choices(QUANTITIES, weights=QUANTITY_WEIGHTS, k=n)
+        discounts = rng.choices(DISCOUNTS, weights=DISCOUNT_WEIGHTS, k=n)
+        lines = []
+        for e, (book_id, price), d, q, k in zip(sellers, sold, sale_days, quantities, discounts):
+            if stock_left[book_id] < q:
+                if not restock:
+                    continue
+                received[book_id] += RESTOCK_QUANTITY + q
+                stock_left[book_id] += RESTOCK_QUANTITY + q
+            stock_left[book_id] -= q
+            lines.append(f"{e}\t{book_id}\t{d}\t{price * q * k:.2f}\t{q}\n")
+        with cur.copy(
+            "COPY sale (employee_id, book_id, sale_date, real_price, quantity_sold) FROM STDIN"
+        ) as copy:
+            copy.write("".join(lines))
+        generated += n
+        loaded += len(lines)
+        if count > batch_size:
+            rate = loaded / (time.perf_counter() - started)
+            print(f"[DATA] Продажі: {loaded}/{count} ({rate:.0f} рядків/с)")
+
+    for statement in restore:
+        cur.execute(statement)
+    with cur.copy("COPY stock_movement (book_id, kind, delta) FROM STDIN") as copy:
+        for book_id, quantity in received.items():
+            copy.write_row((book_id, "receipt", quantity))
+    cur.execute("""
+        INSERT INTO stock_movement (book_id, kind, delta, sale_id)
+        SELECT book_id, 'sale', -quantity_sold, id
+        FROM sale
+        WHERE id > %s;
+    """, (last_sale_id,))
+    rows = add_sales_after(cur, last_sale_id)
+    cur.execute("ANALYZE sale;")
+    cur.execute("ANALYZE stock_movement;")
+    skipped = f", пропущено (немає на складі): {count - loaded}" if loaded < count else ""
+    print(f"[DATA] Продажів додано: {loaded}{skipped}, поставок: {sum(received.values())}, "
+          f"рядків rollup оновлено: {rows}")
+
+
+def generate(conn, employees: int = 0, books: int = 0, sales: int = 0, days: int = 365,
+             seed: int | None = None, batch_size: int = BATCH_SIZE, zipf_s: float = ZIPF_S,
+             restock: bool = True):
+    rng = random.Random(seed)
+    with conn.cursor() as cur:
+        if employees:
+            _load_employees(cur, rng, employees)
+        if books:
+            _load_books(cur, rng, books)
+        if sales:
+            with conn.transaction():
+                _load_sales(cur, rng, sales, days, batch_size, zipf_s, restock)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Генератор синтетичних даних для навантажувального тестування")
+    parser.add_argument("--employees", type=int, default=1000)
+    parser.add_argument("--books", type=int, default=100_000)
+    parser.add_argument("--sales", type=int, default=1_000_000)
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--zipf", type=float, default=ZIPF_S)
+    parser.add_argument("--no-restock", dest="restock", action="store_false",
+                        help="пропускати продажі, яких немає на складі, замість поставки")
+    args = parser.parse_args()
+
+    init_db()
+    started = time.perf_counter()
+    with dedicated_conn() as conn:
+        generate(
+            conn,
+            employees=args.employees,
+            books=args.books,
+            sales=args.sales,
+            days=max(int(args.years * 365), 1),
+            seed=args.seed,
+            batch_size=args.batch_size,
+            zipf_s=args.zipf,
+            restock=args.restock,
+        )
+    print(f"[DATA] Готово за {time.perf_counter() - started:.1f} с")
+
+
+if __name__ == "__main__":
+    main()
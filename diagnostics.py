@@ -0,0 +1,231 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+import cache
+import instrumentation
+from database import pool_stats, replica_status
+
+METRICS_FILE = os.getenv("METRICS_FILE", "export/metrics/bookstore.prom")
+METRICS_JSON_FILE = os.path.splitext(METRICS_FILE)[0] + ".json"
+METRICS_INTERVAL_SECONDS = float(os.getenv("METRICS_INTERVAL_SECONDS", "15"))
+
+_metrics_writer = None
+
+
+def print_statement_stats():
+    stats = instrumentation.snapshot()
+    if not stats:
+        print("Ще не виконано жодного запиту.")
+        return
+
+    print("\nЗапит | Викликів | Помилок | Рядків | Сума, мс | p50 | p95 | p99 | Макс, мс")
+    print("-" * 120)
+    for name, s in sorted(stats.items(), key=lambda item: item[1]["total_ms"], reverse=True):
+        print(
+            f"{name} | {s['calls']} | {s['errors']} | {s['rows']} | {s['total_ms']:.1f} | "
+            f"{s['p50_ms']:g} | {s['p95_ms']:g} | {s['p99_ms']:g} | {s['max_ms']:.1f}"
+        )
+    print(f"Поріг повільного запиту: {instrumentation.SLOW_QUERY_MS:g} мс (журнал: {instrumentation.SLOW_QUERY_LOG})")
+
+
+def print_action_stats():
+    stats = instrumentation.action_snapshot()
+    if not stats:
+        print("Ще не виконано жодної дії.")
+        return
+
+    print("\nДія | Викликів | Помилок | Сума, мс | p50 | p95 | Макс, мс | З'єднання | SQL | Python | Введення, с")
+    print("-" * 130)
+    for name, s in sorted(stats.items(), key=lambda item: item[1]["total_ms"], reverse=True):
+        print(
+            f"{name} | {s['calls']} | {s['errors']} | {s['total_ms']:.1f} | {s['p50_ms']:g} | {s['p95_ms']:g} | "
+            f"{s['max_ms']:.1f} | {s['connect_ms']:.1f} | {s['sql_ms']:.1f} | {s['python_ms']:.1f} | "
+            f"{s['input_ms'] / 1000:.1f}"
+        )
+    print("Час дії — без очікування введення користувача; Python — форматування, вивід і логіка.")
+    profiles = {name: s["last_profile"] for name, s in stats.items() if s["last_profile"]}
+    for name, profile in profiles.items():
+        print(f"cProfile {name}: {profile}")
+
+
+def print_plans():
+    plans = {name: s["last_plan"] for name, s in instrumentation.snapshot().items() if s["last_plan"]}
+    if not plans:
+        print("Немає збережених планів (увімкніть EXPLAIN_SLOW=1).")
+        return
+    for name, plan in plans.items():
+        print(f"\n--- {name} ---")
+        print(plan)
+
+
+def print_runtime_stats():
+    print("\nПул з'єднань:")
+    for key, value in sorted(pool_stats().items()):
+        print(f"  {key}: {value}")
+    replica = replica_status()
+    if replica:
+        lag = "—" if replica["lag_seconds"] is None else f"{replica['lag_seconds']:.1f} с"
+        state = "використовується" if replica["in_use"] else f"не використовується ({replica['error']})"
+        print(f"Репліка {replica['host']}: {state}, відставання {lag}")
+    print("Кеш:")
+    for table, s in cache.cache_stats().items():
+        print(f"  {table}: {s['size']}/{s['maxsize']}, влучань {s['hits']}, промахів {s['misses']}")
+
+
+def _metrics_data() -> dict:
+    return {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "latency_buckets_ms": [str(b) for b in instrumentation.LATENCY_BUCKETS_MS],
+        "actions": instrumentation.action_snapshot(),
+        "statements": instrumentation.snapshot(),
+        "pool": pool_stats(),
+        "replica": replica_status(),
+        "cache": cache.cache_stats(),
+    }
+
+
+def dump_json() -> str:
+    os.makedirs("export", exist_ok=True)
+    filename = f"export/diagnostics_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(_metrics_data(), f, ensure_ascii=False, indent=2)
+    return filename
+
+
+def _label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _histogram(lines: list, name: str, label: str, stats: dict):
+    for key, s in sorted(stats.items()):
+        labels = f'{label}="{_label(key)}"'
+        cumulative = 0
+        for bound, count in zip(instrumentation.LATENCY_BUCKETS_MS, s["buckets"]):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else f"{bound / 1000:g}"
+            lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {s['total_ms'] / 1000:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {cumulative}")
+
+
+def _counter(lines: list, name: str, label: str, values: dict):
+    for key, value in sorted(values.items()):
+        lines.append(f'{name}{{{label}="{_label(key)}"}} {value:g}')
+
+
+def prometheus_text(data: dict) -> str:
+    lines = []
+    actions, statements = data["actions"], data["statements"]
+
+    lines += ["# HELP bookstore_action_duration_seconds Час дії меню без очікування введення.",
+              "# TYPE bookstore_action_duration_seconds histogram"]
+    _histogram(lines, "bookstore_action_duration_seconds", "action", actions)
+    lines += ["# HELP bookstore_action_errors_total Дії, що завершились винятком.",
+              "# TYPE bookstore_action_errors_total counter"]
+    _counter(lines, "bookstore_action_errors_total", "action", {k: s["errors"] for k, s in actions.items()})
+    lines += ["# HELP bookstore_action_phase_seconds_total Час дій за фазами: connect, sql, python, input.",
+              "# TYPE bookstore_action_phase_seconds_total counter"]
+    for name, s in sorted(actions.items()):
+        for phase in ("connect", "sql", "python", "input"):
+            lines.append(f'bookstore_action_phase_seconds_total{{action="{_label(name)}",phase="{phase}"}} '
+                         f"{s[phase + '_ms'] / 1000:.6f}")
+
+    lines += ["# HELP bookstore_sql_duration_seconds Час SQL-запитів за місцем виклику.",
+              "# TYPE bookstore_sql_duration_seconds histogram"]
+    _histogram(lines, "bookstore_sql_duration_seconds", "statement", statements)
+    lines += ["# HELP bookstore_sql_errors_total Запити, що завершились помилкою.",
+              "# TYPE bookstore_sql_errors_total counter"]
+    _counter(lines, "bookstore_sql_errors_total", "statement", {k: s["errors"] for k, s in statements.items()})
+    lines += ["# HELP bookstore_sql_rows_total Рядки, повернуті або змінені запитами.",
+              "# TYPE bookstore_sql_rows_total counter"]
+    _counter(lines, "bookstore_sql_rows_total", "statement", {k: s["rows"] for k, s in statements.items()})
+
+    for key, value in sorted(data["pool"].items()):
+        if isinstance(value, (int, float)):
+            if key.startswith("pool_") or key == "requests_waiting":
+                name, kind = "bookstore_pool_" + key.removeprefix("pool_"), "gauge"
+            else:
+                name, kind = f"bookstore_pool_{key}_total", "counter"
+            lines += [f"# TYPE {name} {kind}", f"{name} {value:g}"]
+    for key in ("size", "hits", "misses"):
+        kind = "gauge" if key == "size" else "counter"
+        name = f"bookstore_cache_{key}" + ("" if key == "size" else "_total")
+        lines.append(f"# TYPE {name} {kind}")
+        _counter(lines, name, "table", {t: s[key] for t, s in data["cache"].items()})
+    return "\n".join(lines) + "\n"
+
+
+def _write_atomic(filename: str, text: str):
+    tmp = filename + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, filename)
+
+
+def write_metrics() -> tuple[str, str]:
+    os.makedirs(os.path.dirname(METRICS_FILE) or ".", exist_ok=True)
+    data = _metrics_data()
+    _write_atomic(METRICS_FILE, prometheus_text(data))
+    _write_atomic(METRICS_JSON_FILE, json.dumps(data, ensure_ascii=False, indent=2))
+    return METRICS_FILE, METRICS_JSON_FILE
+
+
+def _metrics_loop():
+    while True:
+        time.sleep(METRICS_INTERVAL_SECONDS)
+        try:
+            write_metrics()
+        except OSError as e:
+            print("[DIAG] Не вдалося записати метрики:", e)
+
+
+def start_metrics_writer():
+    global _metrics_writer
+    if _metrics_writer is None and METRICS_INTERVAL_SECONDS > 0:
+        _metrics_writer = threading.Thread(target=_metrics_loop, name="metrics-writer", daemon=True)
+        _metrics_writer.start()
+
+
+def diagnostics_menu():
+    while True:
+        print("\n=== ДІАГНОСТИКА ===")
+        print("1) Статистика запитів")
+        print("2) Плани повільних запитів (EXPLAIN)")
+        print("3) Пул з'єднань і кеш")
+        print("4) Зберегти у JSON")
+        print("5) Скинути статистику")
+        print("6) Час дій меню (кінець-в-кінець)")
+        print("7) Записати метрики для node exporter (Prometheus + JSON)")
+        print("8) Профілювання дій cProfile")
+        print("0) Назад")
+
+        choice = input("Оберіть: ").strip()
+        if choice == "0":
+            break
+        elif choice == "1":
+            print_statement_stats()
+        elif choice == "2":
+            print_plans()
+        elif choice == "3":
+            print_runtime_stats()
+        elif choice == "4":
+            print(f"Збережено в {dump_json()}")
+        elif choice == "5":
+            instrumentation.reset()
+            print("Статистику скинуто.")
+        elif choice == "6":
+            print_action_stats()
+        elif choice == "7":
+            try:
+                print("Записано: " + ", ".join(write_metrics()))
+            except OSError as e:
+                print("Помилка:", e)
+        elif choice == "8":
+            current = instrumentation.PROFILE_ACTIONS or "вимкнено"
+            print(f"Зараз: {current}. Шаблони назв дій через кому, наприклад reports.* або crud.BookCRUD.search")
+            instrumentation.set_profiled(input("Шаблони (порожньо — вимкнути): "))
+            print(f"Профілі зберігаються в {instrumentation.PROFILE_DIR}/")
+        else:
+            print("Невірний пункт.")
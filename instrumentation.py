@@ -0,0 +1,316 @@
+import cProfile
+import functools
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from fnmatch import fnmatch
+import psycopg
+from psycopg import pq
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "export/slow_queries.log")
+EXPLAIN_SLOW = os.getenv("EXPLAIN_SLOW", "0") == "1"
+PROFILE_ACTIONS = os.getenv("PROFILE_ACTIONS", "")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "export/profiles")
+
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float("inf"))
+
+_HELPER_MODULES = {"instrumentation", "database", "paging", "cache", "contextlib"}
+
+_stats = {}
+_actions = {}
+_lock = threading.Lock()
+_local = threading.local()
+_log = logging.getLogger("bookstore.sql")
+
+
+def _slow_log():
+    if not _log.handlers:
+        os.makedirs(os.path.dirname(SLOW_QUERY_LOG) or ".", exist_ok=True)
+        handler = logging.FileHandler(SLOW_QUERY_LOG, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        _log.addHandler(handler)
+        _log.setLevel(logging.INFO)
+        _log.propagate = False
+    return _log
+
+
+def _statement_name() -> str:
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module not in _HELPER_MODULES and module != "psycopg" and not module.startswith("psycopg."):
+            return f"{module}.{frame.f_code.co_qualname}"
+        frame = frame.f_back
+    return "unknown"
+
+
+def _new_entry() -> dict:
+    return {
+        "calls": 0,
+        "errors": 0,
+        "rows": 0,
+        "total_ms": 0.0,
+        "max_ms": 0.0,
+        "buckets": [0] * len(LATENCY_BUCKETS_MS),
+        "last_plan": None,
+    }
+
+
+def _new_action_entry() -> dict:
+    return {
+        "calls": 0,
+        "errors": 0,
+        "total_ms": 0.0,
+        "max_ms": 0.0,
+        "buckets": [0] * len(LATENCY_BUCKETS_MS),
+        "connect_ms": 0.0,
+        "sql_ms": 0.0,
+        "python_ms": 0.0,
+        "input_ms": 0.0,
+        "last_profile": None,
+    }
+
+
+def record(name: str, elapsed_ms: float, rows: int = 0, error: bool = False, call: bool = True):
+    with _lock:
+        entry = _stats.setdefault(name, _new_entry())
+        if call:
+            entry["calls"] += 1
+        if error:
+            entry["errors"] += 1
+        entry["rows"] += max(rows, 0)
+        entry["total_ms"] += elapsed_ms
+        entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                entry["buckets"][i] += 1
+                break
+    _add_phase("sql_ms", elapsed_ms)
+
+
+def _add_phase(phase: str, elapsed_ms: float):
+    for frame in getattr(_local, "frames", ()):
+        frame[phase] += elapsed_ms
+
+
+def record_connect(elapsed_ms: float):
+    _add_phase("connect_ms", elapsed_ms)
+
+
+def timed_input(prompt=""):
+    started = time.perf_counter()
+    try:
+        return input(prompt)
+    finally:
+        _add_phase("input_ms", (time.perf_counter() - started) * 1000)
+
+
+def set_profiled(patterns: str):
+    global PROFILE_ACTIONS
+    PROFILE_ACTIONS = patterns.strip()
+
+
+def _should_profile(name: str) -> bool:
+    return any(fnmatch(name, p.strip()) for p in PROFILE_ACTIONS.split(",") if p.strip())
+
+
+def _save_profile(name: str, profiler: cProfile.Profile) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    filename = f"{PROFILE_DIR}/{name}_{datetime.now():%Y%m%d_%H%M%S_%f}"
+    profiler.dump_stats(filename + ".prof")
+    with open(filename + ".txt", "w", encoding="utf-8") as f:
+        pstats.Stats(profiler, stream=f).sort_stats("cumulative").print_stats(30)
+    return filename + ".prof"
+
+
+def _record_action(name: str, elapsed_ms: float, frame: dict, error: bool, profile: str | None):
+    work_ms = max(elapsed_ms - frame["input_ms"], 0.0)
+    with _lock:
+        entry = _actions.setdefault(name, _new_action_entry())
+        entry["calls"] += 1
+        if error:
+            entry["errors"] += 1
+        entry["total_ms"] += work_ms
+        entry["max_ms"] = max(entry["max_ms"], work_ms)
+        entry["connect_ms"] += frame["connect_ms"]
+        entry["sql_ms"] += frame["sql_ms"]
+        entry["input_ms"] += frame["input_ms"]
+        entry["python_ms"] += max(work_ms - frame["connect_ms"] - frame["sql_ms"], 0.0)
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if work_ms <= bound:
+                entry["buckets"][i] += 1
+                break
+        if profile:
+            entry["last_profile"] = profile
+
+
+def action(func):
+    name = f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        frames = _local.__dict__.setdefault("frames", [])
+        profiler = cProfile.Profile() if not frames and _should_profile(name) else None
+        frame = {"connect_ms": 0.0, "sql_ms": 0.0, "input_ms": 0.0}
+        frames.append(frame)
+        started = time.perf_counter()
+        error = False
+        try:
+            if profiler is not None:
+                return profiler.runcall(func, *args, **kwargs)
+            return func(*args, **kwargs)
+        except Exception:
+            error = True
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            frames.pop()
+            profile = _save_profile(name, profiler) if profiler is not None else None
+            _record_action(name, elapsed_ms, frame, error, profile)
+            if profile:
+                print(f"[PROFILE] {name}: {profile}")
+
+    return wrapper
+
+
+def _percentile(entry: dict, q: float) -> float:
+    total = sum(entry["buckets"])
+    if total == 0:
+        return 0.0
+    seen = 0
+    for bound, count in zip(LATENCY_BUCKETS_MS, entry["buckets"]):
+        seen += count
+        if seen >= q * total:
+            return entry["max_ms"] if bound == float("inf") else bound
+    return entry["max_ms"]
+
+
+def _summarize(entries: dict) -> dict:
+    with _lock:
+        result = {}
+        for name, entry in entries.items():
+            item = dict(entry, buckets=list(entry["buckets"]))
+            item["avg_ms"] = entry["total_ms"] / entry["calls"] if entry["calls"] else 0.0
+            item["p50_ms"] = _percentile(entry, 0.50)
+            item["p95_ms"] = _percentile(entry, 0.95)
+            item["p99_ms"] = _percentile(entry, 0.99)
+            result[name] = item
+        return result
+
+
+def snapshot() -> dict:
+    return _summarize(_stats)
+
+
+def action_snapshot() -> dict:
+    return _summarize(_actions)
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+        _actions.clear()
+
+
+def _is_query(query: str) -> bool:
+    head = query.lstrip().upper()
+    return head.startswith("SELECT") or head.startswith("WITH")
+
+
+def _capture_plan(conn, name: str, query, params):
+    if conn.info.transaction_status == pq.TransactionStatus.INERROR:
+        return
+    if conn.pgconn.pipeline_status != pq.PipelineStatus.OFF:
+        return
+    try:
+        with conn.transaction(), psycopg.Cursor(conn) as cur:
+            cur.execute("EXPLAIN " + query, params)
+            plan = "\n".join(r[0] for r in cur.fetchall())
+    except psycopg.Error as e:
+        plan = f"EXPLAIN не вдався: {e}"
+    with _lock:
+        _stats.setdefault(name, _new_entry())["last_plan"] = plan
+    _slow_log().info("EXPLAIN %s\n%s", name, plan)
+
+
+def _after_statement(cur, name: str, query, params, elapsed_ms: float, error: bool):
+    rows = 0 if error else cur.rowcount
+    record(name, elapsed_ms, rows, error)
+    if elapsed_ms >= SLOW_QUERY_MS:
+        text = query.as_string(cur) if hasattr(query, "as_string") else str(query)
+        _slow_log().info("%.1f мс %s: %s", elapsed_ms, name, " ".join(text.split()))
+        if EXPLAIN_SLOW and not error and isinstance(query, str) and _is_query(query):
+            _capture_plan(cur.connection, name, query, params)
+
+
+class InstrumentedCursor(psycopg.Cursor):
+    def execute(self, query, params=None, **kwargs):
+        name = _statement_name()
+        started = time.perf_counter()
+        error = False
+        try:
+            return super().execute(query, params, **kwargs)
+        except Exception:
+            error = True
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            _after_statement(self, name, query, params, elapsed_ms, error)
+
+    def executemany(self, query, params_seq, **kwargs):
+        name = _statement_name()
+        started = time.perf_counter()
+        error = False
+        try:
+            return super().executemany(query, params_seq, **kwargs)
+        except Exception:
+            error = True
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            record(name, elapsed_ms, 0 if error else self.rowcount, error)
+
+    @contextmanager
+    def copy(self, statement, params=None, **kwargs):
+        name = _statement_name()
+        started = time.perf_counter()
+        error = False
+        try:
+            with super().copy(statement, params, **kwargs) as copy:
+                yield copy
+        except Exception:
+            error = True
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            record(name, elapsed_ms, 0 if error else self.rowcount, error)
+
+
+class InstrumentedServerCursor(psycopg.ServerCursor):
+    def execute(self, query, params=None, **kwargs):
+        started = time.perf_counter()
+        error = False
+        try:
+            return super().execute(query, params, **kwargs)
+        except Exception:
+            error = True
+            raise
+        finally:
+            record(f"cursor.{self.name}", (time.perf_counter() - started) * 1000, 0, error)
+
+    def fetchmany(self, size=0):
+        started = time.perf_counter()
+        rows = super().fetchmany(size)
+        record(f"cursor.{self.name}", (time.perf_counter() - started) * 1000, len(rows), call=False)
+        return rows
+
+
+def configure_connection(conn):
+    conn.cursor_factory = InstrumentedCursor
+    conn.server_cursor_factory = InstrumentedServerCursor
@@ -1,6 +1,17 @@
-from database import init_db
+import argparse
+import time
+from database import init_db, pool_stats, close_pool
 from crud import employees_menu, books_menu, sales_menu
+from rollup import rebuild_rollup_menu
+from partitions import partitions_menu
+from archive import archive_menu
+from batch_reports import batch_report_menu
+from sales_export import export_sales_menu
+from analytics import SNAPSHOT_DIR, SalesSnapshot, analytics_menu, save_snapshot_menu
+from cache import start_listener
+from diagnostics import diagnostics_menu, start_metrics_writer, write_metrics
 from reports import (
+    use_snapshot,
     report_employees_full,
     report_books_full,
     report_sales_full,
@@ -12,11 +23,70 @@ from reports import (
     profit_by_period,
     top_author_by_period,
     top_genre_by_period,
+    export_report_menu,
+    period_dashboard,
 )
 
 
+def snapshot_reports(path: str):
+    started = time.perf_counter()
+    snapshot = SalesSnapshot.open(path)
+    use_snapshot(snapshot)
+    print(f"[DATA] Знімок {path}: {len(snapshot)} продажів станом на "
+          f"{snapshot.refreshed_at:%Y-%m-%d %H:%M}, відкрито за {(time.perf_counter() - started) * 1000:.0f} мс")
+
+    while True:
+        print("\n=== ЗВІТИ (знімок, без БД) ===")
+        print("1) Продажі за дату")
+        print("2) Продажі за період")
+        print("3) Продажі конкретного співробітника (за період)")
+        print("4) Найбільш продавана книга за період")
+        print("5) Найуспішніший продавець за період (за прибутком)")
+        print("6) Сумарний прибуток за період")
+        print("7) ТОП автор за період ")
+        print("8) ТОП жанр за період ")
+        print("9) Підсумки за період")
+        print("0) Вихід")
+
+        r = input("Оберіть: ").strip()
+
+        if r == "0":
+            print("Вихід.")
+            break
+        elif r == "1":
+            sales_by_date()
+        elif r == "2":
+            sales_by_period(export_csv=False)
+        elif r == "3":
+            sales_by_employee()
+        elif r == "4":
+            most_sold_book_by_period()
+        elif r == "5":
+            best_seller_by_profit()
+        elif r == "6":
+            profit_by_period()
+        elif r == "7":
+            top_author_by_period()
+        elif r == "8":
+            top_genre_by_period()
+        elif r == "9":
+            period_dashboard()
+        else:
+            print("Невірний пункт.")
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Книгарня")
+    parser.add_argument("--snapshot", nargs="?", const=SNAPSHOT_DIR,
+                        help=f"звіти зі знімка на диску без підключення до БД (за замовчуванням {SNAPSHOT_DIR})")
+    args = parser.parse_args()
+    if args.snapshot:
+        snapshot_reports(args.snapshot)
+        return
+
     init_db()
+    start_listener()
+    start_metrics_writer()
 
     while True:
         print("\n=== ГОЛОВНЕ МЕНЮ ===")
@@ -24,11 +94,22 @@ def main():
         print("2) Книги")
         print("3) Продажі")
         print("4) Звіти")
+        print("5) Діагностика")
+        print("6) Архів видалених записів")
         print("0) Вихід")
 
         choice = input("Оберіть пункт: ").strip()
 
         if choice == "0":
+            stats = pool_stats()
+            if stats:
+                print(
+                    f"[DB] Пул: запитів {stats.get('requests_num', 0)}, "
+                    f"очікувань {stats.get('requests_queued', 0)} ({stats.get('requests_wait_ms', 0)} мс), "
+                    f"таймаутів {stats.get('requests_errors', 0)}"
+                )
+            write_metrics()
+            close_pool()
             print("Вихід.")
             break
         elif choice == "1":
@@ -53,6 +134,14 @@ def main():
                 print("11) ТОП жанр за період ")
                 print("12) Експорт ВСІХ продажів у CSV")
                 print("13) Експорт продажів за період у CSV")
+                print("14) Швидкий експорт будь-якого звіту (COPY, gzip)")
+                print("15) Перебудувати денний rollup продажів")
+                print("16) Підсумки за період (усі показники одним запитом)")
+                print("17) Розділи продажів (створення, стиснення, архів)")
+                print("18) Пакетний запуск звітів (паралельно, у export/)")
+                print("19) Інкрементальний експорт продажів (лише нові та змінені)")
+                print("20) Аналітика в пам'яті (багато періодів поспіль)")
+                print("21) Зберегти знімок продажів на диск (звіти без БД)")
                 print("0) Назад")
 
                 r = input("Оберіть: ").strip()
@@ -85,8 +174,28 @@ def main():
                     report_sales_full(export_csv=True)
                 elif r == "13":
                     sales_by_period(export_csv=True)
+                elif r == "14":
+                    export_report_menu()
+                elif r == "15":
+                    rebuild_rollup_menu()
+                elif r == "16":
+                    period_dashboard()
+                elif r == "17":
+                    partitions_menu()
+                elif r == "18":
+                    batch_report_menu()
+                elif r == "19":
+                    export_sales_menu()
+                elif r == "20":
+                    analytics_menu()
+                elif r == "21":
+                    save_snapshot_menu()
                 else:
                     print("Невірний пункт.")
+        elif choice == "5":
+            diagnostics_menu()
+        elif choice == "6":
+            archive_menu()
         else:
             print("Невірний ввід. Спробуйте ще раз.")
 
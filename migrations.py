@@ -0,0 +1,259 @@
+import psycopg
+
+MIGRATIONS_LOCK_KEY = 7_310_001
+PARTITIONS_LOCK_KEY = 7_310_002
+
+MIGRATIONS = [
+    (1, "базові таблиці", """
+        CREATE TABLE IF NOT EXISTS employee (
+            id SERIAL PRIMARY KEY,
+            name TEXT NOT NULL,
+            position TEXT,
+            phone TEXT,
+            email TEXT UNIQUE NOT NULL,
+            is_deleted BOOLEAN NOT NULL DEFAULT FALSE
+        );
+
+        CREATE TABLE IF NOT EXISTS book (
+            id SERIAL PRIMARY KEY,
+            isbn TEXT UNIQUE NOT NULL,
+            title TEXT NOT NULL,
+            author TEXT NOT NULL,
+            genre TEXT,
+            year INT,
+            cost_price NUMERIC NOT NULL CHECK (cost_price > 0),
+            sale_price NUMERIC NOT NULL CHECK (sale_price > 0),
+            quantity INT NOT NULL CHECK (quantity >= 0),
+            is_deleted BOOLEAN NOT NULL DEFAULT FALSE
+        );
+
+        CREATE TABLE IF NOT EXISTS sale (
+            id SERIAL PRIMARY KEY,
+            employee_id INT NOT NULL REFERENCES employee(id),
+            book_id INT NOT NULL REFERENCES book(id),
+            sale_date DATE NOT NULL,
+            real_price NUMERIC NOT NULL CHECK (real_price > 0),
+            quantity_sold INT NOT NULL CHECK (quantity_sold > 0),
+            is_deleted BOOLEAN NOT NULL DEFAULT FALSE
+        );
+    """),
+    (2, "індекси для звітів по продажах", """
+        CREATE INDEX IF NOT EXISTS sale_date_active_idx
+            ON sale (sale_date) WHERE is_deleted = FALSE;
+
+        CREATE INDEX IF NOT EXISTS sale_employee_date_active_idx
+            ON sale (employee_id, sale_date) WHERE is_deleted = FALSE;
+
+        CREATE INDEX IF NOT EXISTS sale_book_id_idx
+            ON sale (book_id);
+
+        ANALYZE sale;
+    """),
+    (3, "денний rollup продажів", """
+        CREATE TABLE IF NOT EXISTS sale_daily_rollup (
+            sale_date DATE NOT NULL,
+            book_id INT NOT NULL,
+            employee_id INT NOT NULL,
+            quantity BIGINT NOT NULL,
+            revenue NUMERIC NOT NULL,
+            cost NUMERIC NOT NULL,
+            PRIMARY KEY (sale_date, book_id, employee_id)
+        );
+
+        CREATE INDEX IF NOT EXISTS sale_daily_rollup_book_idx
+            ON sale_daily_rollup (book_id);
+
+        INSERT INTO sale_daily_rollup (sale_date, book_id, employee_id, quantity, revenue, cost)
+        SELECT s.sale_date, s.book_id, s.employee_id,
+               SUM(s.quantity_sold), SUM(s.real_price), SUM(b.cost_price * s.quantity_sold)
+        FROM sale s
+        JOIN book b ON b.id = s.book_id
+        WHERE s.is_deleted = FALSE
+        GROUP BY s.sale_date, s.book_id, s.employee_id
+        ON CONFLICT DO NOTHING;
+    """),
+    (4, "помісячні розділи продажів", f"""
+        ALTER TABLE sale RENAME TO sale_unpartitioned;
+        ALTER SEQUENCE sale_id_seq OWNED BY NONE;
+        DROP INDEX IF EXISTS sale_date_active_idx;
+        DROP INDEX IF EXISTS sale_employee_date_active_idx;
+        DROP INDEX IF EXISTS sale_book_id_idx;
+        ALTER TABLE sale_unpartitioned DROP CONSTRAINT sale_pkey;
+
+        CREATE TABLE sale (
+            id INT NOT NULL DEFAULT nextval('sale_id_seq'),
+            employee_id INT NOT NULL CONSTRAINT sale_employee_id_fkey REFERENCES employee(id),
+            book_id INT NOT NULL CONSTRAINT sale_book_id_fkey REFERENCES book(id),
+            sale_date DATE NOT NULL,
+            real_price NUMERIC NOT NULL CONSTRAINT sale_real_price_check CHECK (real_price > 0),
+            quantity_sold INT NOT NULL CONSTRAINT sale_quantity_sold_check CHECK (quantity_sold > 0),
+            is_deleted BOOLEAN NOT NULL DEFAULT FALSE,
+            CONSTRAINT sale_pkey PRIMARY KEY (id, sale_date)
+        ) PARTITION BY RANGE (sale_date);
+
+        CREATE TABLE sale_default PARTITION OF sale DEFAULT;
+        CREATE INDEX sale_default_date_idx ON sale_default (sale_date);
+
+        CREATE INDEX sale_employee_date_active_idx
+            ON sale (employee_id, sale_date) WHERE is_deleted = FALSE;
+        CREATE INDEX sale_book_id_idx
+            ON sale (book_id);
+
+        CREATE OR REPLACE FUNCTION ensure_sale_partitions(p_from DATE, p_to DATE) RETURNS INT
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            month_start DATE := date_trunc('month', p_from)::date;
+            month_end DATE;
+            part TEXT;
+            created INT := 0;
+        BEGIN
+            PERFORM pg_advisory_xact_lock({PARTITIONS_LOCK_KEY});
+            WHILE month_start <= p_to LOOP
+                month_end := (month_start + INTERVAL '1 month')::date;
+                part := format('sale_%s', to_char(month_start, 'YYYY_MM'));
+                IF to_regclass(part) IS NULL THEN
+                    EXECUTE format('CREATE TABLE %I (LIKE sale INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', part);
+                    EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I CHECK (sale_date >= %L AND sale_date < %L)',
+                                   part, part || '_range', month_start, month_end);
+                    EXECUTE format('WITH moved AS (DELETE FROM sale_default WHERE sale_date >= %L AND sale_date < %L '
+                                   'RETURNING *) INSERT INTO %I SELECT * FROM moved',
+                                   month_start, month_end, part);
+                    EXECUTE format('CREATE INDEX %I ON %I (sale_date)', part || '_date_idx', part);
+                    EXECUTE format('ALTER TABLE sale ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                                   part, month_start, month_end);
+                    EXECUTE format('ALTER TABLE %I DROP CONSTRAINT %I', part, part || '_range');
+                    created := created + 1;
+                END IF;
+                month_start := month_end;
+            END LOOP;
+            RETURN created;
+        END
+        $$;
+
+        SELECT ensure_sale_partitions(month, month)
+        FROM (
+            SELECT DISTINCT date_trunc('month', sale_date)::date AS month
+            FROM sale_unpartitioned
+            ORDER BY month
+        ) m;
+        SELECT ensure_sale_partitions(current_date, current_date + 90);
+
+        INSERT INTO sale (id, employee_id, book_id, sale_date, real_price, quantity_sold, is_deleted)
+        SELECT id, employee_id, book_id, sale_date, real_price, quantity_sold, is_deleted
+        FROM sale_unpartitioned;
+
+        DROP TABLE sale_unpartitioned;
+        ALTER SEQUENCE sale_id_seq OWNED BY sale.id;
+        ANALYZE sale;
+    """),
+    (5, "пошук книг за назвою, автором і ISBN", """
+        CREATE OR REPLACE FUNCTION book_search_normalize(value TEXT) RETURNS TEXT
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+            SELECT trim(regexp_replace(translate(lower(value), 'ґёʼ’''`', 'ге'), '[^[:alnum:]]+', ' ', 'g'))
+        $$;
+
+        ALTER TABLE book ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', book_search_normalize(title)), 'A')
+            || setweight(to_tsvector('simple', book_search_normalize(author)), 'B')
+            || setweight(to_tsvector('simple', book_search_normalize(isbn) || ' '
+                                               || lower(regexp_replace(isbn, '[^0-9Xx]', '', 'g'))), 'C')
+        ) STORED;
+
+        CREATE INDEX IF NOT EXISTS book_search_idx ON book USING gin (search_vector);
+        ANALYZE book;
+    """),
+    (6, "маркер змін продажів для інкрементального експорту", """
+        CREATE SEQUENCE IF NOT EXISTS sale_change_seq;
+        ALTER TABLE sale ADD COLUMN IF NOT EXISTS change_seq BIGINT;
+        CREATE INDEX IF NOT EXISTS sale_change_seq_idx
+            ON sale (change_seq) WHERE change_seq IS NOT NULL;
+    """),
+    (7, "журнал руху товару", """
+        CREATE TABLE IF NOT EXISTS stock_movement (
+            id BIGSERIAL PRIMARY KEY,
+            book_id INT NOT NULL REFERENCES book(id),
+            kind TEXT NOT NULL CHECK (kind IN ('receipt', 'sale', 'reversal', 'adjustment')),
+            delta INT NOT NULL CHECK (delta <> 0),
+            sale_id INT,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+        CREATE INDEX IF NOT EXISTS stock_movement_book_idx ON stock_movement (book_id) INCLUDE (delta);
+
+        CREATE TABLE IF NOT EXISTS stock_movement_history (LIKE stock_movement INCLUDING CONSTRAINTS);
+        CREATE INDEX IF NOT EXISTS stock_movement_history_book_idx ON stock_movement_history (book_id, id);
+
+        CREATE OR REPLACE VIEW book_stock AS
+        SELECT b.id AS book_id,
+               b.quantity + COALESCE((SELECT SUM(m.delta) FROM stock_movement m WHERE m.book_id = b.id), 0)::int
+                   AS stock
+        FROM book b;
+    """),
+    (8, "архів видалених записів", """
+        ALTER TABLE employee ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMPTZ;
+        ALTER TABLE book ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMPTZ;
+        ALTER TABLE sale ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMPTZ;
+        UPDATE employee SET deleted_at = now() WHERE is_deleted AND deleted_at IS NULL;
+        UPDATE book SET deleted_at = now() WHERE is_deleted AND deleted_at IS NULL;
+        UPDATE sale SET deleted_at = now() WHERE is_deleted AND deleted_at IS NULL;
+        CREATE INDEX IF NOT EXISTS sale_deleted_idx ON sale (deleted_at) WHERE is_deleted;
+
+        CREATE TABLE IF NOT EXISTS employee_archive (LIKE employee INCLUDING CONSTRAINTS, PRIMARY KEY (id));
+        CREATE TABLE IF NOT EXISTS book_archive (LIKE book INCLUDING CONSTRAINTS, PRIMARY KEY (id));
+        ALTER TABLE book_archive DROP COLUMN IF EXISTS search_vector;
+        CREATE TABLE IF NOT EXISTS sale_archive (LIKE sale INCLUDING CONSTRAINTS, PRIMARY KEY (id));
+    """),
+    (9, "транзакції продажів для інкрементального експорту", """
+        ALTER TABLE sale ADD COLUMN IF NOT EXISTS created_xid xid8 NOT NULL DEFAULT '0';
+        ALTER TABLE sale ALTER COLUMN created_xid SET DEFAULT pg_current_xact_id();
+        ALTER TABLE sale ADD COLUMN IF NOT EXISTS changed_xid xid8;
+        CREATE INDEX IF NOT EXISTS sale_created_xid_idx ON sale (created_xid);
+        CREATE INDEX IF NOT EXISTS sale_changed_xid_idx ON sale (changed_xid) WHERE changed_xid IS NOT NULL;
+    """),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(cur) -> int:
+    cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations;")
+    return cur.fetchone()[0]
+
+
+def schema_version(conn) -> int:
+    try:
+        with conn.cursor() as cur:
+            return current_version(cur)
+    except psycopg.errors.UndefinedTable:
+        return 0
+
+
+def ensure_sale_partitions(cur, date_from, date_to) -> int:
+    cur.execute("SELECT ensure_sale_partitions(%s::date, %s::date);", (date_from, date_to))
+    return cur.fetchone()[0]
+
+
+def apply_migrations(conn) -> int:
+    with conn.transaction():
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_xact_lock(%s);", (MIGRATIONS_LOCK_KEY,))
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                );
+            """)
+            version = current_version(cur)
+
+            for number, name, sql in MIGRATIONS:
+                if number <= version:
+                    continue
+                cur.execute(sql)
+                cur.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES (%s, %s);",
+                    (number, name),
+                )
+                print(f"[DB] Застосовано міграцію {number}: {name}")
+                version = number
+
+    return version
@@ -0,0 +1,186 @@
+import os
+from datetime import datetime
+from database import get_conn, get_read_conn
+from instrumentation import timed_input
+
+PAGE_SIZE = int(os.getenv("PAGE_SIZE", "50"))
+
+
+def fetch_page(query: str, key: str, conditions: list, params: list,
+               after: int | None = None, before: int | None = None, limit: int = PAGE_SIZE,
+               read_only: bool = False):
+    conditions = list(conditions)
+    params = list(params)
+    if before is not None:
+        conditions.append(f"{key} < %s")
+        params.append(before)
+        order = "DESC"
+    else:
+        conditions.append(f"{key} > %s")
+        params.append(after or 0)
+        order = "ASC"
+    params.append(limit + 1)
+
+    with (get_read_conn() if read_only else get_conn()) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"{query} WHERE {' AND '.join(conditions)} ORDER BY {key} {order} LIMIT %s",
+                params,
+            )
+            rows = cur.fetchall()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if before is not None:
+        rows.reverse()
+    return rows, has_more
+
+
+def browse(query: str, key: str, conditions: list, params: list, header: str, width: int,
+           format_row, empty_message: str, read_only: bool = False):
+    rows, has_next = fetch_page(query, key, conditions, params, read_only=read_only)
+    if not rows:
+        print(empty_message)
+        return
+    has_prev = False
+    page = 1
+
+    while True:
+        print(f"\n{header}")
+        print("-" * width)
+        for r in rows:
+            print(format_row(r))
+
+        commands = []
+        if has_next:
+            commands.append("n — наступна")
+        if has_prev:
+            commands.append("p — попередня")
+        commands.append("Enter — вихід")
+        choice = timed_input(f"Сторінка {page}. {', '.join(commands)}: ").strip().lower()
+
+        if choice == "n" and has_next:
+            rows, has_next = fetch_page(query, key, conditions, params, after=rows[-1][0], read_only=read_only)
+            has_prev = True
+            page += 1
+        elif choice == "p" and has_prev:
+            rows, has_prev = fetch_page(query, key, conditions, params, before=rows[0][0], read_only=read_only)
+            has_next = True
+            page -= 1
+        elif not choice:
+            break
+        else:
+            print("Невірна команда.")
+
+
+def _input_filter(prompt: str) -> str:
+    return timed_input(prompt).strip()
+
+
+def _input_date_filter(prompt: str) -> str:
+    value = timed_input(prompt).strip()
+    if value:
+        try:
+            datetime.strptime(value, "%Y-%m-%d")
+        except ValueError:
+            raise ValueError("Дата має бути у форматі YYYY-MM-DD.")
+    return value
+
+
+def _input_id_filter(prompt: str) -> int | None:
+    value = timed_input(prompt).strip()
+    if not value:
+        return None
+    if not value.isdigit():
+        raise ValueError("ID має бути числом.")
+    return int(value)
+
+
+def browse_employees(read_only: bool = False):
+    print("Фільтри (Enter — без фільтра):")
+    name = _input_filter("  ПІБ або email містить: ")
+    position = _input_filter("  Посада: ")
+
+    conditions = ["is_deleted = FALSE"]
+    params = []
+    if name:
+        conditions.append("(name ILIKE %s OR email ILIKE %s)")
+        params += [f"%{name}%", f"%{name}%"]
+    if position:
+        conditions.append("position ILIKE %s")
+        params.append(position)
+
+    browse(
+        "SELECT id, name, position, phone, email FROM employee",
+        "id", conditions, params,
+        "ID | ПІБ | Посада | Телефон | Email", 80,
+        lambda r: f"{r[0]} | {r[1]} | {r[2]} | {r[3]} | {r[4]}",
+        "Немає співробітників.",
+        read_only=read_only,
+    )
+
+
+def browse_books(read_only: bool = False):
+    print("Фільтри (Enter — без фільтра):")
+    title = _input_filter("  Назва містить: ")
+    author = _input_filter("  Автор містить: ")
+    genre = _input_filter("  Жанр: ")
+
+    conditions = ["is_deleted = FALSE"]
+    params = []
+    if title:
+        conditions.append("title ILIKE %s")
+        params.append(f"%{title}%")
+    if author:
+        conditions.append("author ILIKE %s")
+        params.append(f"%{author}%")
+    if genre:
+        conditions.append("genre ILIKE %s")
+        params.append(genre)
+
+    browse(
+        "SELECT id, isbn, title, author, genre, year, cost_price, sale_price, st.stock "
+        "FROM book JOIN book_stock st ON st.book_id = book.id",
+        "id", conditions, params,
+        "ID | ISBN | Назва | Автор | Жанр | Рік | Собівартість | Ціна | К-ть", 120,
+        lambda r: f"{r[0]} | {r[1]} | {r[2]} | {r[3]} | {r[4]} | {r[5]} | {r[6]} | {r[7]} | {r[8]}",
+        "Немає книг.",
+        read_only=read_only,
+    )
+
+
+def browse_sales(read_only: bool = False):
+    print("Фільтри (Enter — без фільтра):")
+    date_from = _input_date_filter("  Дата від (YYYY-MM-DD): ")
+    date_to = _input_date_filter("  Дата до (YYYY-MM-DD): ")
+    emp_id = _input_id_filter("  ID співробітника: ")
+    book_id = _input_id_filter("  ID книги: ")
+
+    conditions = ["s.is_deleted = FALSE", "e.is_deleted = FALSE", "b.is_deleted = FALSE"]
+    params = []
+    if date_from:
+        conditions.append("s.sale_date >= %s")
+        params.append(date_from)
+    if date_to:
+        conditions.append("s.sale_date <= %s")
+        params.append(date_to)
+    if emp_id is not None:
+        conditions.append("s.employee_id = %s")
+        params.append(emp_id)
+    if book_id is not None:
+        conditions.append("s.book_id = %s")
+        params.append(book_id)
+
+    browse(
+        """
+        SELECT s.id, s.sale_date, e.name, b.title, s.quantity_sold, s.real_price
+        FROM sale s
+        JOIN employee e ON e.id = s.employee_id
+        JOIN book b ON b.id = s.book_id
+        """,
+        "s.id", conditions, params,
+        "ID | Дата | Співробітник | Книга | К-ть | Сума (TOTAL)", 100,
+        lambda r: f"{r[0]} | {r[1]} | {r[2]} | {r[3]} | {r[4]} | {r[5]}",
+        "Немає продажів.",
+        read_only=read_only,
+    )
@@ -0,0 +1,172 @@
+import gzip
+import os
+from datetime import date, datetime, timedelta
+from database import SALE_PARTITIONS_AHEAD_MONTHS, get_conn
+from migrations import ensure_sale_partitions
+from rollup import remove_period
+
+ARCHIVE_DIR = "export/archive"
+
+PARTITIONS_SQL = """
+    SELECT c.relname,
+           pg_get_expr(c.relpartbound, c.oid) AS bounds,
+           c.reltuples::bigint AS rows_estimate,
+           pg_total_relation_size(c.oid) AS total_bytes,
+           EXISTS (SELECT 1 FROM pg_class i WHERE i.relname = c.relname || '_date_brin') AS compacted
+    FROM pg_inherits h
+    JOIN pg_class c ON c.oid = h.inhrelid
+    WHERE h.inhparent = 'sale'::regclass
+    ORDER BY c.relname
+"""
+
+CLOSED_PARTITIONS_SQL = """
+    SELECT c.relname
+    FROM pg_inherits h
+    JOIN pg_class c ON c.oid = h.inhrelid
+    WHERE h.inhparent = 'sale'::regclass
+      AND c.relname ~ '^sale_[0-9]{4}_[0-9]{2}$'
+      AND to_date(substr(c.relname, 6), 'YYYY_MM') + INTERVAL '1 month' <= %s
+    ORDER BY c.relname
+"""
+
+
+def _month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def list_partitions() -> list:
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(PARTITIONS_SQL)
+            return cur.fetchall()
+
+
+def ensure_ahead(months: int = SALE_PARTITIONS_AHEAD_MONTHS) -> int:
+    today = date.today()
+    with get_conn() as conn:
+        with conn.transaction():
+            with conn.cursor() as cur:
+                return ensure_sale_partitions(cur, today, today + timedelta(days=31 * months))
+
+
+def compact_closed_partitions(before: date | None = None) -> list:
+    before = before or _month_start(date.today())
+    compacted = []
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(CLOSED_PARTITIONS_SQL, (before,))
+            names = [r[0] for r in cur.fetchall()]
+        conn.commit()
+
+        for name in names:
+            with conn.transaction():
+                with conn.cursor() as cur:
+                    cur.execute("SELECT to_regclass(%s) IS NOT NULL;", (f"{name}_date_idx",))
+                    if not cur.fetchone()[0]:
+                        continue
+                    cur.execute(f'CLUSTER "{name}" USING "{name}_date_idx";')
+                    cur.execute(f'CREATE INDEX "{name}_date_brin" ON "{name}" USING brin (sale_date);')
+                    cur.execute(f'DROP INDEX "{name}_date_idx";')
+                    compacted.append(name)
+    return compacted
+
+
+def _free_table_name(cur, base: str) -> str:
+    name, n = base, 1
+    while True:
+        cur.execute("SELECT to_regclass(%s) IS NULL;", (f'"{name}"',))
+        if cur.fetchone()[0]:
+            return name
+        n += 1
+        name = f"{base}_{n}"
+
+
+def _free_archive_path(base: str) -> str:
+    path, n = f"{base}.csv.gz", 1
+    while os.path.exists(path):
+        n += 1
+        path = f"{base}_{n}.csv.gz"
+    return path
+
+
+def detach_partitions(before: date, archive: bool = False) -> list:
+    done = []
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(CLOSED_PARTITIONS_SQL, (_month_start(before),))
+            names = [r[0] for r in cur.fetchall()]
+        conn.commit()
+
+        for name in names:
+            tmp = None
+            try:
+                with conn.transaction():
+                    with conn.cursor() as cur:
+                        cur.execute(f'ALTER TABLE sale DETACH PARTITION "{name}";')
+                        month = datetime.strptime(name[len("sale_"):], "%Y_%m").date()
+                        remove_period(cur, month, _month_start(month + timedelta(days=31)))
+                        if archive:
+                            os.makedirs(ARCHIVE_DIR, exist_ok=True)
+                            target = _free_archive_path(f"{ARCHIVE_DIR}/{name}")
+                            tmp = target + ".tmp"
+                            with gzip.open(tmp, "wb") as f:
+                                with cur.copy(
+                                    f'COPY "{name}" TO STDOUT WITH (FORMAT csv, HEADER, ENCODING \'UTF8\')'
+                                ) as copy:
+                                    for data in copy:
+                                        f.write(data)
+                            cur.execute(f'DROP TABLE "{name}";')
+                        else:
+                            target = _free_table_name(cur, f"{name}_detached")
+                            cur.execute(f'ALTER TABLE "{name}" RENAME TO "{target}";')
+                            for suffix in ("_date_idx", "_date_brin"):
+                                cur.execute(f'ALTER INDEX IF EXISTS "{name}{suffix}" RENAME TO "{target}{suffix}";')
+                if tmp:
+                    os.replace(tmp, target)
+                    tmp = None
+                done.append(target)
+            finally:
+                if tmp and os.path.exists(tmp):
+                    os.remove(tmp)
+    return done
+
+
+def partitions_menu():
+    while True:
+        print("\n--- Розділи продажів ---")
+        print("1) Список розділів")
+        print(f"2) Створити розділи наперед ({SALE_PARTITIONS_AHEAD_MONTHS} міс.)")
+        print("3) Стиснути закриті місяці (CLUSTER + BRIN)")
+        print("4) Від'єднати або архівувати старі місяці")
+        print("0) Назад")
+        choice = input("Оберіть: ").strip()
+
+        try:
+            if choice == "0":
+                break
+            elif choice == "1":
+                rows = list_partitions()
+                print("\nРозділ | Межі | Рядків (оцінка) | Розмір, МБ | BRIN")
+                print("-" * 100)
+                for r in rows:
+                    print(f"{r[0]} | {r[1]} | {r[2]} | {r[3] / 1024 / 1024:.1f} | {'так' if r[4] else 'ні'}")
+            elif choice == "2":
+                print(f"Створено розділів: {ensure_ahead()}")
+            elif choice == "3":
+                names = compact_closed_partitions()
+                print(f"Стиснуто розділів: {len(names)}" + (f" ({', '.join(names)})" if names else ""))
+            elif choice == "4":
+                before = input("Від'єднати місяці до (YYYY-MM-DD, не включно): ").strip()
+                before = datetime.strptime(before, "%Y-%m-%d").date()
+                archive = input("Архівувати в gzip і видалити таблиці? (y/N): ").strip().lower() in ("y", "т", "так")
+                done = detach_partitions(before, archive)
+                if not done:
+                    print("Немає розділів для від'єднання.")
+                for item in done:
+                    print(("Архівовано: " if archive else "Від'єднано: ") + item)
+            else:
+                print("Невірний пункт.")
+        except ValueError:
+            print("Некоректний формат дати.")
+        except Exception as e:
+            print("Помилка:", e)
@@ -1,7 +1,109 @@
-import csv
+import gzip
 import os
 from datetime import datetime
-from database import get_conn
+from database import get_read_conn, stream_rows
+from instrumentation import action, timed_input
+from paging import browse_books, browse_employees, browse_sales
+
+SALES_EXPORT_SELECT = """
+    SELECT s.id, s.sale_date, e.name AS employee, b.title AS book,
+           s.quantity_sold, s.real_price AS real_price_total
+    FROM sale s
+    JOIN employee e ON e.id = s.employee_id
+    JOIN book b ON b.id = s.book_id
+"""
+
+EXPORT_REPORTS = {
+    "employees": ("Співробітники", "employees_all", [], """
+        SELECT id, name, position, phone, email
+        FROM employee
+        WHERE is_deleted=FALSE
+        ORDER BY id
+    """),
+    "books": ("Книги", "books_all", [], """
+        SELECT b.id, b.isbn, b.title, b.author, b.genre, b.year, b.cost_price, b.sale_price, st.stock AS quantity
+        FROM book b
+        JOIN book_stock st ON st.book_id = b.id
+        WHERE b.is_deleted=FALSE
+        ORDER BY b.id
+    """),
+    "sales_all": ("Усі продажі", "sales_all", [], SALES_EXPORT_SELECT + """
+        WHERE s.is_deleted=FALSE
+          AND e.is_deleted=FALSE
+          AND b.is_deleted=FALSE
+        ORDER BY s.id
+    """),
+    "sales_by_date": ("Продажі за дату", "sales_{date}", ["date"], SALES_EXPORT_SELECT + """
+        WHERE s.is_deleted=FALSE
+          AND s.sale_date = %(date)s
+        ORDER BY s.id
+    """),
+    "sales_by_period": ("Продажі за період", "sales_{date_from}_to_{date_to}", ["date_from", "date_to"],
+                        SALES_EXPORT_SELECT + """
+        WHERE s.is_deleted=FALSE
+          AND s.sale_date BETWEEN %(date_from)s AND %(date_to)s
+        ORDER BY s.sale_date, s.id
+    """),
+    "sales_by_employee": ("Продажі співробітника за період",
+                          "sales_employee_{employee_id}_{date_from}_to_{date_to}",
+                          ["employee_id", "date_from", "date_to"], """
+        SELECT s.id, s.sale_date, b.title AS book, s.quantity_sold, s.real_price AS real_price_total
+        FROM sale s
+        JOIN book b ON b.id = s.book_id
+        WHERE s.is_deleted=FALSE
+          AND s.employee_id=%(employee_id)s
+          AND s.sale_date BETWEEN %(date_from)s AND %(date_to)s
+        ORDER BY s.sale_date, s.id
+    """),
+    "most_sold_books": ("Рейтинг книг за кількістю", "most_sold_books_{date_from}_to_{date_to}",
+                        ["date_from", "date_to"], """
+        SELECT b.id, b.title, SUM(r.quantity) AS total_qty
+        FROM sale_daily_rollup r
+        JOIN book b ON b.id = r.book_id
+        WHERE r.sale_date BETWEEN %(date_from)s AND %(date_to)s
+        GROUP BY b.id, b.title
+        ORDER BY total_qty DESC
+    """),
+    "sellers_by_profit": ("Рейтинг продавців за прибутком", "sellers_by_profit_{date_from}_to_{date_to}",
+                          ["date_from", "date_to"], """
+        SELECT e.id, e.name, COALESCE(SUM(r.revenue - r.cost), 0) AS profit
+        FROM sale_daily_rollup r
+        JOIN employee e ON e.id = r.employee_id
+        WHERE r.sale_date BETWEEN %(date_from)s AND %(date_to)s
+        GROUP BY e.id, e.name
+        ORDER BY profit DESC
+    """),
+    "profit_by_period": ("Сумарний прибуток", "profit_{date_from}_to_{date_to}", ["date_from", "date_to"], """
+        SELECT COALESCE(SUM(r.revenue - r.cost), 0) AS total_profit
+        FROM sale_daily_rollup r
+        WHERE r.sale_date BETWEEN %(date_from)s AND %(date_to)s
+    """),
+    "top_authors": ("Рейтинг авторів", "top_authors_{date_from}_to_{date_to}", ["date_from", "date_to"], """
+        SELECT b.author, SUM(r.quantity) AS total_qty
+        FROM sale_daily_rollup r
+        JOIN book b ON b.id = r.book_id
+        WHERE r.sale_date BETWEEN %(date_from)s AND %(date_to)s
+        GROUP BY b.author
+        ORDER BY total_qty DESC
+    """),
+    "top_genres": ("Рейтинг жанрів", "top_genres_{date_from}_to_{date_to}", ["date_from", "date_to"], """
+        SELECT b.genre, SUM(r.quantity) AS total_qty
+        FROM sale_daily_rollup r
+        JOIN book b ON b.id = r.book_id
+        WHERE r.sale_date BETWEEN %(date_from)s AND %(date_to)s
+        GROUP BY b.genre
+        ORDER BY total_qty DESC
+    """),
+}
+
+_snapshot = None
+
+EXPORT_PARAM_PROMPTS = {
+    "date": "Дата (YYYY-MM-DD): ",
+    "date_from": "Дата від (YYYY-MM-DD): ",
+    "date_to": "Дата до (YYYY-MM-DD): ",
+    "employee_id": "ID співробітника: ",
+}
 
 
 def _validate_date_str(s: str) -> bool:
@@ -16,110 +118,310 @@ def _ensure_export_dir():
     os.makedirs("export", exist_ok=True)
 
 
-def report_employees_full():
-    print("\n--- Повна інформація про співробітників ---")
-    try:
-        with get_conn() as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT id, name, position, phone, email
-                    FROM employee
-                    WHERE is_deleted=FALSE
-                    ORDER BY id
-                """)
-                rows = cur.fetchall()
-        if not rows:
-            print("Немає співробітників.")
+@action
+def export_report(key: str, params: dict | None = None, compress: bool = False) -> tuple[str, int]:
+    _, name, _, query = EXPORT_REPORTS[key]
+    params = params or {}
+    filename = f"export/{name.format(**params)}.csv" + (".gz" if compress else "")
+    opener = gzip.open if compress else open
+
+    _ensure_export_dir()
+    with get_read_conn() as conn:
+        with conn.cursor() as cur:
+            with opener(filename, "wb") as f:
+                with cur.copy(
+                    f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER, ENCODING 'UTF8')",
+                    params,
+                ) as copy:
+                    for data in copy:
+                        f.write(data)
+            rows = cur.rowcount
+    return filename, rows
+
+
+@action
+def export_report_menu():
+    keys = list(EXPORT_REPORTS)
+    print("\n--- Швидкий експорт звіту (COPY) ---")
+    for i, key in enumerate(keys, start=1):
+        print(f"{i}) {EXPORT_REPORTS[key][0]}")
+
+    choice = timed_input("Оберіть звіт: ").strip()
+    if not choice.isdigit() or not 1 <= int(choice) <= len(keys):
+        print("Невірний пункт.")
+        return
+    key = keys[int(choice) - 1]
+
+    params = {}
+    for param in EXPORT_REPORTS[key][2]:
+        value = timed_input(EXPORT_PARAM_PROMPTS[param]).strip()
+        if param == "employee_id":
+            if not value.isdigit():
+                print("ID має бути числом.")
+                return
+            value = int(value)
+        elif not _validate_date_str(value):
+            print("Некоректний формат дати.")
             return
+        params[param] = value
 
-        print("ID | ПІБ | Посада | Телефон | Email")
-        print("-" * 80)
+    compress = timed_input("Стиснути gzip? (y/N): ").strip().lower() in ("y", "т", "так")
+
+    try:
+        filename, rows = export_report(key, params, compress)
+        print(f"Експортовано {rows} рядків в {filename}")
+    except Exception as e:
+        print("Помилка експорту:", e)
+
+
+def _print_sales_chunks(chunks, header: str) -> int:
+    total = 0
+    for rows in chunks:
+        if total == 0:
+            print(header)
+            print("-" * 100)
         for r in rows:
-            print(f"{r[0]} | {r[1]} | {r[2]} | {r[3]} | {r[4]}")
+            print(f"{r[0]} | {r[1]} | {r[2]} | {r[3]} | {r[4]} | {r[5]}")
+        total += len(rows)
+    return total
+
+
+@action
+def report_employees_full():
+    print("\n--- Повна інформація про співробітників ---")
+    try:
+        browse_employees(read_only=True)
     except Exception as e:
         print("Помилка звіту:", e)
 
 
+@action
 def report_books_full():
     print("\n--- Повна інформація про книги ---")
     try:
-        with get_conn() as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT id, isbn, title, author, genre, year, cost_price, sale_price, quantity
-                    FROM book
-                    WHERE is_deleted=FALSE
-                    ORDER BY id
-                """)
-                rows = cur.fetchall()
-        if not rows:
-            print("Немає книг.")
-            return
-
-        print("ID | ISBN | Назва | Автор | Жанр | Рік | Собівартість | Ціна | К-ть")
-        print("-" * 120)
-        for r in rows:
-            print(f"{r[0]} | {r[1]} | {r[2]} | {r[3]} | {r[4]} | {r[5]} | {r[6]} | {r[7]} | {r[8]}")
+        browse_books(read_only=True)
     except Exception as e:
         print("Помилка звіту:", e)
 
 
+@action
 def report_sales_full(export_csv: bool = False):
     print("\n--- Повна інформація про продажі ---")
     try:
-        with get_conn() as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT s.id, s.sale_date, e.name, b.title, s.quantity_sold, s.real_price
-                    FROM sale s
-                    JOIN employee e ON e.id = s.employee_id
-                    JOIN book b ON b.id = s.book_id
-                    WHERE s.is_deleted=FALSE
-                      AND e.is_deleted=FALSE
-                      AND b.is_deleted=FALSE
-                    ORDER BY s.id
-                """)
-                rows = cur.fetchall()
-        if not rows:
-            print("Немає продажів.")
-            return
-
-        print("ID | Дата | Співробітник | Книга | К-ть | Сума (TOTAL)")
-        print("-" * 100)
-        for r in rows:
-            print(f"{r[0]} | {r[1]} | {r[2]} | {r[3]} | {r[4]} | {r[5]}")
-
         if export_csv:
-            _ensure_export_dir()
-            filename = "export/sales_all.csv"
-            with open(filename, "w", newline="", encoding="utf-8") as f:
-                w = csv.writer(f)
-                w.writerow(["id", "sale_date", "employee", "book", "quantity_sold", "real_price_total"])
-                w.writerows(rows)
-            print(f"Експортовано в {filename}")
+            filename, rows = export_report("sales_all")
+            print(f"Експортовано {rows} рядків в {filename}")
+        else:
+            browse_sales(read_only=True)
     except Exception as e:
         print("Помилка звіту:", e)
 
 
+def use_snapshot(snapshot):
+    global _snapshot
+    _snapshot = snapshot
+
+
+def _input_period():
+    date_from = timed_input("Дата від (YYYY-MM-DD): ").strip()
+    date_to = timed_input("Дата до (YYYY-MM-DD): ").strip()
+    if not _validate_date_str(date_from) or not _validate_date_str(date_to):
+        print("Некоректний формат дати.")
+        return None
+    return date_from, date_to
+
+
+@action
+def fetch_sales_by_date(date_str: str) -> list:
+    if _snapshot is not None:
+        return _snapshot.sales_by_date(date_str)
+    with get_read_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT s.id, s.sale_date, e.name, b.title, s.quantity_sold, s.real_price
+                FROM sale s
+                JOIN employee e ON e.id = s.employee_id
+                JOIN book b ON b.id = s.book_id
+                WHERE s.is_deleted=FALSE
+                  AND s.sale_date = %s
+                ORDER BY s.id
+            """, (date_str,))
+            return cur.fetchall()
+
+
+def stream_sales_by_period(conn, date_from: str, date_to: str):
+    return stream_rows(conn, "sales_by_period", """
+        SELECT s.id, s.sale_date, e.name, b.title, s.quantity_sold, s.real_price
+        FROM sale s
+        JOIN employee e ON e.id = s.employee_id
+        JOIN book b ON b.id = s.book_id
+        WHERE s.is_deleted=FALSE
+          AND s.sale_date BETWEEN %s AND %s
+        ORDER BY s.sale_date, s.id
+    """, (date_from, date_to))
+
+
+@action
+def fetch_sales_by_employee(emp_id: int, date_from: str, date_to: str) -> list:
+    if _snapshot is not None:
+        return _snapshot.sales_by_employee(emp_id, date_from, date_to)
+    with get_read_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT s.id, s.sale_date, b.title, s.quantity_sold, s.real_price
+                FROM sale s
+                JOIN book b ON b.id = s.book_id
+                WHERE s.is_deleted=FALSE
+                  AND s.employee_id=%s
+                  AND s.sale_date BETWEEN %s AND %s
+                ORDER BY s.sale_date, s.id
+            """, (emp_id, date_from, date_to))
+            return cur.fetchall()
+
+
+@action
+def fetch_most_sold_book(date_from: str, date_to: str):
+    if _snapshot is not None:
+        return _snapshot.most_sold_book(date_from, date_to)
+    with get_read_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT b.id, b.title, SUM(r.quantity) AS total_qty
+                FROM sale_daily_rollup r
+                JOIN book b ON b.id = r.book_id
+                WHERE r.sale_date BETWEEN %s AND %s
+                GROUP BY b.id, b.title
+                ORDER BY total_qty DESC
+                LIMIT 1;
+            """, (date_from, date_to))
+            return cur.fetchone()
+
+
+@action
+def fetch_profit(date_from: str, date_to: str):
+    if _snapshot is not None:
+        return _snapshot.profit(date_from, date_to)
+    with get_read_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT COALESCE(SUM(r.revenue - r.cost), 0)
+                FROM sale_daily_rollup r
+                WHERE r.sale_date BETWEEN %s AND %s
+            """, (date_from, date_to))
+            return cur.fetchone()[0]
+
+
+@action
+def fetch_best_seller(date_from: str, date_to: str):
+    if _snapshot is not None:
+        return _snapshot.best_seller(date_from, date_to)
+    with get_read_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT e.id, e.name, COALESCE(SUM(r.revenue - r.cost), 0) AS profit
+                FROM sale_daily_rollup r
+                JOIN employee e ON e.id = r.employee_id
+                WHERE r.sale_date BETWEEN %s AND %s
+                GROUP BY e.id, e.name
+                ORDER BY profit DESC
+                LIMIT 1;
+            """, (date_from, date_to))
+            return cur.fetchone()
+
+
+@action
+def fetch_top_author(date_from: str, date_to: str):
+    if _snapshot is not None:
+        return _snapshot.top_author(date_from, date_to)
+    with get_read_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT b.author, SUM(r.quantity) AS total_qty
+                FROM sale_daily_rollup r
+                JOIN book b ON b.id = r.book_id
+                WHERE r.sale_date BETWEEN %s AND %s
+                GROUP BY b.author
+                ORDER BY total_qty DESC
+                LIMIT 1;
+            """, (date_from, date_to))
+            return cur.fetchone()
+
+
+@action
+def fetch_top_genre(date_from: str, date_to: str):
+    if _snapshot is not None:
+        return _snapshot.top_genre(date_from, date_to)
+    with get_read_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT b.genre, SUM(r.quantity) AS total_qty
+                FROM sale_daily_rollup r
+                JOIN book b ON b.id = r.book_id
+                WHERE r.sale_date BETWEEN %s AND %s
+                GROUP BY b.genre
+                ORDER BY total_qty DESC
+                LIMIT 1;
+            """, (date_from, date_to))
+            return cur.fetchone()
+
+
+DASHBOARD_BOOK, DASHBOARD_SELLER, DASHBOARD_AUTHOR, DASHBOARD_GENRE, DASHBOARD_TOTAL = 7, 11, 13, 14, 15
+
+
+@action
+def fetch_dashboard(date_from: str, date_to: str) -> dict:
+    if _snapshot is not None:
+        summary = _snapshot.summary(date_from, date_to)
+        if summary is None:
+            return {}
+        (book_id, title, qty), (emp_id, name, profit) = summary["book"], summary["seller"]
+        return {
+            DASHBOARD_BOOK: (DASHBOARD_BOOK, book_id, title, None, None, None, None, qty, None),
+            DASHBOARD_SELLER: (DASHBOARD_SELLER, None, None, emp_id, name, None, None, None, profit),
+            DASHBOARD_AUTHOR: (DASHBOARD_AUTHOR, None, None, None, None, summary["author"][0], None,
+                               summary["author"][1], None),
+            DASHBOARD_GENRE: (DASHBOARD_GENRE, None, None, None, None, None, summary["genre"][0],
+                              summary["genre"][1], None),
+            DASHBOARD_TOTAL: (DASHBOARD_TOTAL, None, None, None, None, None, None, None, summary["profit"]),
+        }
+    with get_read_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                WITH grouped AS (
+                    SELECT GROUPING(b.id, e.id, b.author, b.genre) AS grp,
+                           b.id AS book_id, b.title, e.id AS employee_id, e.name,
+                           b.author, b.genre,
+                           SUM(r.quantity) AS total_qty,
+                           COALESCE(SUM(r.revenue - r.cost), 0) AS profit
+                    FROM sale_daily_rollup r
+                    JOIN book b ON b.id = r.book_id
+                    JOIN employee e ON e.id = r.employee_id
+                    WHERE r.sale_date BETWEEN %s AND %s
+                    GROUP BY GROUPING SETS ((b.id, b.title), (e.id, e.name), (b.author), (b.genre), ())
+                ), ranked AS (
+                    SELECT grouped.*,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY grp
+                               ORDER BY CASE WHEN grp = %s THEN profit ELSE total_qty END DESC
+                           ) AS rn
+                    FROM grouped
+                )
+                SELECT grp, book_id, title, employee_id, name, author, genre, total_qty, profit
+                FROM ranked
+                WHERE rn = 1;
+            """, (date_from, date_to, DASHBOARD_SELLER))
+            return {r[0]: r for r in cur.fetchall()}
+
+
+@action
 def sales_by_date():
-    date_str = input("Введіть дату (YYYY-MM-DD): ").strip()
+    date_str = timed_input("Введіть дату (YYYY-MM-DD): ").strip()
     if not _validate_date_str(date_str):
         print("Некоректна дата.")
         return
 
     try:
-        with get_conn() as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT s.id, s.sale_date, e.name, b.title, s.quantity_sold, s.real_price
-                    FROM sale s
-                    JOIN employee e ON e.id = s.employee_id
-                    JOIN book b ON b.id = s.book_id
-                    WHERE s.is_deleted=FALSE
-                      AND s.sale_date = %s
-                    ORDER BY s.id
-                """, (date_str,))
-                rows = cur.fetchall()
+        rows = fetch_sales_by_date(date_str)
         if not rows:
             print("Немає продажів на цю дату.")
             return
@@ -132,73 +434,45 @@ def sales_by_date():
         print("Помилка звіту:", e)
 
 
+@action
 def sales_by_period(export_csv: bool = False):
-    date_from = input("Дата від (YYYY-MM-DD): ").strip()
-    date_to = input("Дата до (YYYY-MM-DD): ").strip()
-    if not _validate_date_str(date_from) or not _validate_date_str(date_to):
-        print("Некоректний формат дати.")
+    period = _input_period()
+    if period is None:
         return
+    date_from, date_to = period
 
     try:
-        with get_conn() as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT s.id, s.sale_date, e.name, b.title, s.quantity_sold, s.real_price
-                    FROM sale s
-                    JOIN employee e ON e.id = s.employee_id
-                    JOIN book b ON b.id = s.book_id
-                    WHERE s.is_deleted=FALSE
-                      AND s.sale_date BETWEEN %s AND %s
-                    ORDER BY s.sale_date, s.id
-                """, (date_from, date_to))
-                rows = cur.fetchall()
-        if not rows:
+        header = "\nID | Дата | Співробітник | Книга | К-ть | Сума (TOTAL)"
+        if _snapshot is not None:
+            total = _print_sales_chunks(_snapshot.stream_sales_by_period(date_from, date_to), header)
+        else:
+            with get_read_conn() as conn:
+                total = _print_sales_chunks(stream_sales_by_period(conn, date_from, date_to), header)
+        if total == 0:
             print("Немає продажів за період.")
             return
 
-        print("\nID | Дата | Співробітник | Книга | К-ть | Сума (TOTAL)")
-        print("-" * 100)
-        for r in rows:
-            print(f"{r[0]} | {r[1]} | {r[2]} | {r[3]} | {r[4]} | {r[5]}")
-
         if export_csv:
-            _ensure_export_dir()
-            filename = f"export/sales_{date_from}_to_{date_to}.csv"
-            with open(filename, "w", newline="", encoding="utf-8") as f:
-                w = csv.writer(f)
-                w.writerow(["id", "sale_date", "employee", "book", "quantity_sold", "real_price_total"])
-                w.writerows(rows)
+            filename, _ = export_report("sales_by_period", {"date_from": date_from, "date_to": date_to})
             print(f"Експортовано в {filename}")
     except Exception as e:
         print("Помилка звіту:", e)
 
 
+@action
 def sales_by_employee():
-    emp_id = input("ID співробітника: ").strip()
+    emp_id = timed_input("ID співробітника: ").strip()
     if not emp_id.isdigit():
         print("ID має бути числом.")
         return
     emp_id = int(emp_id)
 
-    date_from = input("Дата від (YYYY-MM-DD): ").strip()
-    date_to = input("Дата до (YYYY-MM-DD): ").strip()
-    if not _validate_date_str(date_from) or not _validate_date_str(date_to):
-        print("Некоректний формат дати.")
+    period = _input_period()
+    if period is None:
         return
 
     try:
-        with get_conn() as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT s.id, s.sale_date, b.title, s.quantity_sold, s.real_price
-                    FROM sale s
-                    JOIN book b ON b.id = s.book_id
-                    WHERE s.is_deleted=FALSE
-                      AND s.employee_id=%s
-                      AND s.sale_date BETWEEN %s AND %s
-                    ORDER BY s.sale_date, s.id
-                """, (emp_id, date_from, date_to))
-                rows = cur.fetchall()
+        rows = fetch_sales_by_employee(emp_id, *period)
         if not rows:
             print("Немає продажів для цього співробітника за період.")
             return
@@ -211,27 +485,14 @@ def sales_by_employee():
         print("Помилка звіту:", e)
 
 
+@action
 def most_sold_book_by_period():
-    date_from = input("Дата від (YYYY-MM-DD): ").strip()
-    date_to = input("Дата до (YYYY-MM-DD): ").strip()
-    if not _validate_date_str(date_from) or not _validate_date_str(date_to):
-        print("Некоректний формат дати.")
+    period = _input_period()
+    if period is None:
         return
 
     try:
-        with get_conn() as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT b.id, b.title, SUM(s.quantity_sold) AS total_qty
-                    FROM sale s
-                    JOIN book b ON b.id = s.book_id
-                    WHERE s.is_deleted=FALSE
-                      AND s.sale_date BETWEEN %s AND %s
-                    GROUP BY b.id, b.title
-                    ORDER BY total_qty DESC
-                    LIMIT 1;
-                """, (date_from, date_to))
-                row = cur.fetchone()
+        row = fetch_most_sold_book(*period)
         if row is None:
             print("Немає продажів за період.")
             return
@@ -240,52 +501,26 @@ def most_sold_book_by_period():
         print("Помилка звіту:", e)
 
 
+@action
 def profit_by_period():
-    date_from = input("Дата від (YYYY-MM-DD): ").strip()
-    date_to = input("Дата до (YYYY-MM-DD): ").strip()
-    if not _validate_date_str(date_from) or not _validate_date_str(date_to):
-        print("Некоректний формат дати.")
+    period = _input_period()
+    if period is None:
         return
 
     try:
-        with get_conn() as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT COALESCE(SUM(s.real_price - b.cost_price * s.quantity_sold), 0)
-                    FROM sale s
-                    JOIN book b ON b.id = s.book_id
-                    WHERE s.is_deleted=FALSE
-                      AND s.sale_date BETWEEN %s AND %s
-                """, (date_from, date_to))
-                total_profit = cur.fetchone()[0]
-        print(f"Сумарний прибуток за період: {total_profit}")
+        print(f"Сумарний прибуток за період: {fetch_profit(*period)}")
     except Exception as e:
         print("Помилка звіту:", e)
 
 
+@action
 def best_seller_by_profit():
-    date_from = input("Дата від (YYYY-MM-DD): ").strip()
-    date_to = input("Дата до (YYYY-MM-DD): ").strip()
-    if not _validate_date_str(date_from) or not _validate_date_str(date_to):
-        print("Некоректний формат дати.")
+    period = _input_period()
+    if period is None:
         return
 
     try:
-        with get_conn() as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT e.id, e.name,
-                           COALESCE(SUM(s.real_price - b.cost_price * s.quantity_sold), 0) AS profit
-                    FROM sale s
-                    JOIN employee e ON e.id = s.employee_id
-                    JOIN book b ON b.id = s.book_id
-                    WHERE s.is_deleted=FALSE
-                      AND s.sale_date BETWEEN %s AND %s
-                    GROUP BY e.id, e.name
-                    ORDER BY profit DESC
-                    LIMIT 1;
-                """, (date_from, date_to))
-                row = cur.fetchone()
+        row = fetch_best_seller(*period)
         if row is None:
             print("Немає продажів за період.")
             return
@@ -296,27 +531,14 @@ def best_seller_by_profit():
         print("Помилка звіту:", e)
 
 
+@action
 def top_author_by_period():
-    date_from = input("Дата від (YYYY-MM-DD): ").strip()
-    date_to = input("Дата до (YYYY-MM-DD): ").strip()
-    if not _validate_date_str(date_from) or not _validate_date_str(date_to):
-        print("Некоректний формат дати.")
+    period = _input_period()
+    if period is None:
         return
 
     try:
-        with get_conn() as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT b.author, SUM(s.quantity_sold) AS total_qty
-                    FROM sale s
-                    JOIN book b ON b.id = s.book_id
-                    WHERE s.is_deleted=FALSE
-                      AND s.sale_date BETWEEN %s AND %s
-                    GROUP BY b.author
-                    ORDER BY total_qty DESC
-                    LIMIT 1;
-                """, (date_from, date_to))
-                row = cur.fetchone()
+        row = fetch_top_author(*period)
         if row is None:
             print("Немає продажів за період.")
             return
@@ -325,30 +547,44 @@ def top_author_by_period():
         print("Помилка звіту:", e)
 
 
+@action
 def top_genre_by_period():
-    date_from = input("Дата від (YYYY-MM-DD): ").strip()
-    date_to = input("Дата до (YYYY-MM-DD): ").strip()
-    if not _validate_date_str(date_from) or not _validate_date_str(date_to):
-        print("Некоректний формат дати.")
+    period = _input_period()
+    if period is None:
         return
 
     try:
-        with get_conn() as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT b.genre, SUM(s.quantity_sold) AS total_qty
-                    FROM sale s
-                    JOIN book b ON b.id = s.book_id
-                    WHERE s.is_deleted=FALSE
-                      AND s.sale_date BETWEEN %s AND %s
-                    GROUP BY b.genre
-                    ORDER BY total_qty DESC
-                    LIMIT 1;
-                """, (date_from, date_to))
-                row = cur.fetchone()
+        row = fetch_top_genre(*period)
         if row is None:
             print("Немає продажів за період.")
             return
         print(f"ТОП жанр: {row[0]} (кількість: {row[1]})")
     except Exception as e:
-        print("Помилка звіту:", e)
\ No newline at end of file
+        print("Помилка звіту:", e)
+
+
+@action
+def period_dashboard():
+    period = _input_period()
+    if period is None:
+        return
+    date_from, date_to = period
+
+    try:
+        rows = fetch_dashboard(date_from, date_to)
+        if DASHBOARD_BOOK not in rows:
+            print("Немає продажів за період.")
+            return
+
+        book = rows[DASHBOARD_BOOK]
+        seller = rows[DASHBOARD_SELLER]
+        author = rows[DASHBOARD_AUTHOR]
+        genre = rows[DASHBOARD_GENRE]
+        print(f"\n--- Підсумки за {date_from} — {date_to} ---")
+        print(f"Найбільш продавана книга: ID={book[1]}, {book[2]} (кількість: {book[7]})")
+        print(f"Найуспішніший продавець: ID={seller[3]}, {seller[4]} (прибуток: {seller[8]})")
+        print(f"Сумарний прибуток за період: {rows[DASHBOARD_TOTAL][8]}")
+        print(f"ТОП автор: {author[5]} (кількість: {author[7]})")
+        print(f"ТОП жанр: {genre[6]} (кількість: {genre[7]})")
+    except Exception as e:
+        print("Помилка звіту:", e)
@@ -0,0 +1,99 @@
+import time
+from database import get_conn
+
+ROLLUP_UPSERT_SQL = """
+    INSERT INTO sale_daily_rollup AS r (sale_date, book_id, employee_id, quantity, revenue, cost)
+    SELECT %(sale_date)s, b.id, %(employee_id)s, %(quantity)s, %(revenue)s, b.cost_price * %(quantity)s
+    FROM book b
+    WHERE b.id = %(book_id)s
+    ON CONFLICT (sale_date, book_id, employee_id) DO UPDATE
+    SET quantity = r.quantity + EXCLUDED.quantity,
+        revenue = r.revenue + EXCLUDED.revenue,
+        cost = r.cost + EXCLUDED.cost
+"""
+
+ROLLUP_FROM_SALES_SQL = """
+    SELECT s.sale_date, s.book_id, s.employee_id,
+           SUM(s.quantity_sold), SUM(s.real_price), SUM(b.cost_price * s.quantity_sold)
+    FROM sale s
+    JOIN book b ON b.id = s.book_id
+    WHERE s.is_deleted = FALSE
+    GROUP BY s.sale_date, s.book_id, s.employee_id
+"""
+
+
+def apply_sale(cur, sale_date, book_id: int, employee_id: int, quantity: int, revenue, sign: int = 1):
+    params = {
+        "sale_date": sale_date,
+        "book_id": book_id,
+        "employee_id": employee_id,
+        "quantity": sign * quantity,
+        "revenue": sign * revenue,
+    }
+    cur.execute(ROLLUP_UPSERT_SQL, params)
+    if sign < 0:
+        cur.execute(
+            """
+            DELETE FROM sale_daily_rollup
+            WHERE sale_date=%(sale_date)s AND book_id=%(book_id)s AND employee_id=%(employee_id)s
+              AND quantity = 0
+            """,
+            params,
+        )
+
+
+def update_book_cost(cur, book_id: int, cost_price):
+    cur.execute(
+        "UPDATE sale_daily_rollup SET cost = quantity * %s WHERE book_id=%s;",
+        (cost_price, book_id),
+    )
+
+
+def remove_period(cur, date_from, date_to) -> int:
+    cur.execute(
+        "DELETE FROM sale_daily_rollup WHERE sale_date >= %s AND sale_date < %s;",
+        (date_from, date_to),
+    )
+    return cur.rowcount
+
+
+def add_sales_after(cur, last_sale_id: int) -> int:
+    cur.execute(
+        """
+        INSERT INTO sale_daily_rollup AS r (sale_date, book_id, employee_id, quantity, revenue, cost)
+        SELECT s.sale_date, s.book_id, s.employee_id,
+               SUM(s.quantity_sold), SUM(s.real_price), SUM(b.cost_price * s.quantity_sold)
+        FROM sale s
+        JOIN book b ON b.id = s.book_id
+        WHERE s.is_deleted = FALSE AND s.id > %s
+        GROUP BY s.sale_date, s.book_id, s.employee_id
+        ON CONFLICT (sale_date, book_id, employee_id) DO UPDATE
+        SET quantity = r.quantity + EXCLUDED.quantity,
+            revenue = r.revenue + EXCLUDED.revenue,
+            cost = r.cost + EXCLUDED.cost;
+        """,
+        (last_sale_id,),
+    )
+    return cur.rowcount
+
+
+def rebuild_rollup() -> int:
+    with get_conn() as conn:
+        with conn.transaction():
+            with conn.cursor() as cur:
+                cur.execute("TRUNCATE sale_daily_rollup;")
+                cur.execute(
+                    "INSERT INTO sale_daily_rollup (sale_date, book_id, employee_id, quantity, revenue, cost)"
+                    + ROLLUP_FROM_SALES_SQL
+                )
+                return cur.rowcount
+
+
+def rebuild_rollup_menu():
+    print("\n--- Перебудова денного rollup продажів ---")
+    try:
+        started = time.perf_counter()
+        rows = rebuild_rollup()
+        print(f"Rollup перебудовано: {rows} рядків за {time.perf_counter() - started:.2f} с")
+    except Exception as e:
+        print("Помилка:", e)
@@ -0,0 +1,147 @@
+import argparse
+import json
+import os
+from datetime import datetime
+from database import close_pool, get_read_conn, init_db, sale_horizon
+
+SALES_EXPORT_FILE = "export/sales_all.csv"
+SALES_EXPORT_STATE = "export/sales_all.state.json"
+SALES_DELTA_FILE = "export/sales_delta_{from_xid}_{to_xid}.csv"
+SALES_EXPORT_FORMAT = 2
+
+SALES_APPEND_SQL = """
+    SELECT s.id, s.sale_date, e.name AS employee, b.title AS book,
+           s.quantity_sold, s.real_price AS real_price_total,
+           e.is_deleted AS employee_deleted, b.is_deleted AS book_deleted
+    FROM sale s
+    JOIN employee e ON e.id = s.employee_id
+    JOIN book b ON b.id = s.book_id
+    WHERE s.is_deleted=FALSE
+      AND s.created_xid >= %(from_xid)s::text::xid8
+      AND s.created_xid < %(to_xid)s::text::xid8
+    ORDER BY s.id
+"""
+
+SALES_DELTA_SQL = """
+    SELECT s.id, s.sale_date, e.name AS employee, b.title AS book,
+           s.quantity_sold, s.real_price AS real_price_total,
+           e.is_deleted AS employee_deleted, b.is_deleted AS book_deleted, s.is_deleted, s.change_seq
+    FROM sale s
+    JOIN employee e ON e.id = s.employee_id
+    JOIN book b ON b.id = s.book_id
+    WHERE s.changed_xid >= %(from_xid)s::text::xid8
+      AND s.changed_xid < %(to_xid)s::text::xid8
+      AND s.created_xid < %(from_xid)s::text::xid8
+    ORDER BY s.change_seq
+"""
+
+
+def load_state() -> dict | None:
+    try:
+        with open(SALES_EXPORT_STATE, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    try:
+        stat = os.stat(SALES_EXPORT_FILE)
+    except OSError:
+        return None
+    if state.get("format") != SALES_EXPORT_FORMAT:
+        return None
+    if (stat.st_size, stat.st_mtime_ns) != (state.get("bytes"), state.get("mtime_ns")):
+        return None
+    return state
+
+
+def _save_state(state: dict):
+    tmp = SALES_EXPORT_STATE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, SALES_EXPORT_STATE)
+
+
+def _copy_to(cur, f, query: str, params: dict, header: bool) -> int:
+    with cur.copy(
+        f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER {str(header).upper()}, ENCODING 'UTF8')",
+        params,
+    ) as copy:
+        for data in copy:
+            f.write(data)
+    return cur.rowcount
+
+
+def export_sales(full: bool = False) -> dict:
+    state = None if full else load_state()
+    os.makedirs(os.path.dirname(SALES_EXPORT_FILE), exist_ok=True)
+
+    with get_read_conn() as conn:
+        with conn.transaction():
+            with conn.cursor() as cur:
+                cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY;")
+                to_xid = sale_horizon(cur)
+                from_xid = 0 if state is None else state["horizon"]
+                to_xid = max(to_xid, from_xid)
+                params = {"from_xid": from_xid, "to_xid": to_xid}
+
+                result = {"mode": "full" if state is None else "incremental", "appended": 0,
+                          "changed": 0, "file": SALES_EXPORT_FILE, "delta_file": None}
+
+                with open(SALES_EXPORT_FILE, "wb" if state is None else "ab") as f:
+                    result["appended"] = _copy_to(cur, f, SALES_APPEND_SQL, params, header=state is None)
+
+                if state is not None and to_xid > from_xid:
+                    delta_file = SALES_DELTA_FILE.format(from_xid=from_xid, to_xid=to_xid)
+                    with open(delta_file, "wb") as f:
+                        result["changed"] = _copy_to(cur, f, SALES_DELTA_SQL, params, header=True)
+                    if result["changed"]:
+                        result["delta_file"] = delta_file
+                    else:
+                        os.remove(delta_file)
+
+    stat = os.stat(SALES_EXPORT_FILE)
+    _save_state({
+        "format": SALES_EXPORT_FORMAT,
+        "horizon": to_xid,
+        "bytes": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "exported_at": datetime.now().isoformat(timespec="seconds"),
+    })
+    return result
+
+
+def print_result(result: dict):
+    if result["mode"] == "full":
+        print(f"Повний експорт: {result['appended']} рядків в {result['file']}")
+        return
+    print(f"Дописано нових продажів: {result['appended']} в {result['file']}")
+    if result["delta_file"]:
+        print(f"Змінених або видалених продажів: {result['changed']} в {result['delta_file']}")
+    else:
+        print("Змінених або видалених продажів немає.")
+
+
+def export_sales_menu():
+    print("\n--- Інкрементальний експорт продажів ---")
+    state = load_state()
+    if state is None:
+        print("Попереднього експорту немає — буде виконано повний.")
+    else:
+        print(f"Останній експорт: {state['exported_at']}, транзакції до №{state['horizon']}")
+    try:
+        print_result(export_sales())
+    except Exception as e:
+        print("Помилка експорту:", e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Інкрементальний експорт продажів у export/sales_all.csv")
+    parser.add_argument("--full", action="store_true", help="переписати файл повністю і скинути позначку")
+    args = parser.parse_args()
+
+    init_db()
+    print_result(export_sales(args.full))
+    close_pool()
+
+
+if __name__ == "__main__":
+    main()
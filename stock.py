@@ -0,0 +1,146 @@
+import argparse
+import os
+import time
+from database import close_pool, get_conn, init_db
+
+STOCK_LOCK_SPACE = 7_310_003
+STOCK_COMPACT_BOOKS = int(os.getenv("STOCK_COMPACT_BOOKS", "1000"))
+
+MOVEMENT_KINDS = {
+    "receipt": "надходження",
+    "sale": "продаж",
+    "reversal": "повернення",
+    "adjustment": "коригування",
+}
+
+LOCK_BOOKS_SQL = """
+    SELECT pg_advisory_xact_lock(%s, book_id)
+    FROM unnest(%s::int[]) AS t(book_id)
+"""
+
+COMPACT_SQL = """
+    WITH moved AS (
+        DELETE FROM stock_movement
+        WHERE book_id = ANY(%(book_ids)s)
+        RETURNING *
+    ), archived AS (
+        INSERT INTO stock_movement_history
+        SELECT * FROM moved
+    ), folded AS (
+        UPDATE book b
+        SET quantity = b.quantity + m.delta
+        FROM (SELECT book_id, SUM(delta) AS delta FROM moved GROUP BY book_id) m
+        WHERE b.id = m.book_id
+        RETURNING b.id
+    )
+    SELECT (SELECT COUNT(*) FROM moved), (SELECT COUNT(*) FROM folded)
+"""
+
+MOVEMENTS_SQL = """
+    SELECT id, created_at, kind, delta, sale_id
+    FROM (
+        SELECT id, created_at, kind, delta, sale_id FROM stock_movement WHERE book_id = %(book_id)s
+        UNION ALL
+        SELECT id, created_at, kind, delta, sale_id FROM stock_movement_history WHERE book_id = %(book_id)s
+    ) m
+    ORDER BY id DESC
+    LIMIT %(limit)s
+"""
+
+
+def lock_books(cur, book_ids: list):
+    cur.execute(LOCK_BOOKS_SQL, (STOCK_LOCK_SPACE, sorted(set(book_ids))))
+
+
+def lock_book(cur, book_id: int):
+    cur.execute("SELECT pg_advisory_xact_lock(%s, %s);", (STOCK_LOCK_SPACE, book_id))
+
+
+def current_stock(cur, book_id: int) -> int | None:
+    cur.execute(
+        """
+        SELECT st.stock
+        FROM book b
+        JOIN book_stock st ON st.book_id = b.id
+        WHERE b.id=%s AND b.is_deleted=FALSE
+        """,
+        (book_id,),
+    )
+    row = cur.fetchone()
+    return None if row is None else row[0]
+
+
+def record_movement(cur, book_id: int, kind: str, delta: int, sale_id: int | None = None):
+    cur.execute(
+        "INSERT INTO stock_movement (book_id, kind, delta, sale_id) VALUES (%s, %s, %s, %s);",
+        (book_id, kind, delta, sale_id),
+    )
+
+
+def adjust_stock(cur, book_id: int, new_quantity: int) -> int:
+    lock_book(cur, book_id)
+    delta = new_quantity - current_stock(cur, book_id)
+    if delta:
+        record_movement(cur, book_id, "adjustment", delta)
+    return delta
+
+
+def receive_stock(book_id: int, quantity: int) -> int:
+    with get_conn() as conn:
+        with conn.transaction():
+            with conn.cursor() as cur:
+                if current_stock(cur, book_id) is None:
+                    raise ValueError("Книгу не знайдено.")
+                record_movement(cur, book_id, "receipt", quantity)
+                return current_stock(cur, book_id)
+
+
+def book_movements(book_id: int, limit: int = 20) -> list:
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(MOVEMENTS_SQL, {"book_id": book_id, "limit": limit})
+            return cur.fetchall()
+
+
+def compact_ledger(books_per_batch: int = STOCK_COMPACT_BOOKS) -> tuple[int, int]:
+    moved_total = books_total = 0
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT DISTINCT book_id FROM stock_movement ORDER BY book_id;")
+            book_ids = [r[0] for r in cur.fetchall()]
+        conn.commit()
+
+        for i in range(0, len(book_ids), books_per_batch):
+            with conn.transaction():
+                with conn.cursor() as cur:
+                    cur.execute(COMPACT_SQL, {"book_ids": book_ids[i:i + books_per_batch]})
+                    moved, books = cur.fetchone()
+            moved_total += moved
+            books_total += books
+    return moved_total, books_total
+
+
+def compact_ledger_menu():
+    print("\n--- Стиснення журналу руху товару ---")
+    try:
+        started = time.perf_counter()
+        moved, books = compact_ledger()
+        print(f"Перенесено в залишки {moved} рухів по {books} книгах за {time.perf_counter() - started:.2f} с")
+    except Exception as e:
+        print("Помилка:", e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Стиснення журналу руху товару в залишки book.quantity")
+    parser.add_argument("--books-per-batch", type=int, default=STOCK_COMPACT_BOOKS)
+    args = parser.parse_args()
+
+    init_db()
+    started = time.perf_counter()
+    moved, books = compact_ledger(args.books_per_batch)
+    close_pool()
+    print(f"[DB] Перенесено в залишки {moved} рухів по {books} книгах за {time.perf_counter() - started:.2f} с")
+
+
+if __name__ == "__main__":
+    main()
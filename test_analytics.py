@@ -0,0 +1,51 @@
+import struct
+import unittest
+from analytics import COPY_BINARY_SIGNATURE, COPY_BINARY_TRAILER, SALE_RECORD, _parse_copy
+
+HEADER = COPY_BINARY_SIGNATURE + struct.pack(">ii", 0, 0)
+
+
+def _record(sale_id, day, book_id, employee_id, quantity, cents):
+    return struct.pack(">hiiiiiiiiiiiq", 6, 4, sale_id, 4, day, 4, book_id, 4, employee_id, 4, quantity, 8, cents)
+
+
+class ParseCopyTest(unittest.TestCase):
+    def test_decodes_records(self):
+        data = HEADER + _record(1, 19000, 7, 3, 2, 12345) + _record(2, 19001, 8, 4, 1, -50) + COPY_BINARY_TRAILER
+        columns = _parse_copy([data[:5], data[5:40], data[40:]])
+        self.assertEqual(columns["id"].tolist(), [1, 2])
+        self.assertEqual(columns["day"].tolist(), [19000, 19001])
+        self.assertEqual(columns["book_id"].tolist(), [7, 8])
+        self.assertEqual(columns["employee_id"].tolist(), [3, 4])
+        self.assertEqual(columns["quantity"].tolist(), [2, 1])
+        self.assertEqual(columns["cents"].tolist(), [12345, -50])
+
+    def test_empty_result(self):
+        columns = _parse_copy([HEADER + COPY_BINARY_TRAILER])
+        self.assertEqual(len(columns["id"]), 0)
+
+    def test_record_size_matches_wire_format(self):
+        self.assertEqual(SALE_RECORD.itemsize, len(_record(1, 1, 1, 1, 1, 1)))
+
+    def test_rejects_null_column(self):
+        record = bytearray(_record(1, 19000, 7, 3, 2, 12345))
+        record[2:6] = struct.pack(">i", -1)
+        with self.assertRaises(ValueError):
+            _parse_copy([HEADER + bytes(record) + COPY_BINARY_TRAILER])
+
+    def test_rejects_wrong_field_count(self):
+        record = struct.pack(">h", 5) + _record(1, 19000, 7, 3, 2, 12345)[2:]
+        with self.assertRaises(ValueError):
+            _parse_copy([HEADER + record + COPY_BINARY_TRAILER])
+
+    def test_rejects_misaligned_stream(self):
+        with self.assertRaises(ValueError):
+            _parse_copy([HEADER + _record(1, 19000, 7, 3, 2, 12345) + b"\x00" + COPY_BINARY_TRAILER])
+
+    def test_rejects_bad_header(self):
+        with self.assertRaises(ValueError):
+            _parse_copy([b"NOTCOPY" + HEADER[7:] + COPY_BINARY_TRAILER])
+
+
+if __name__ == "__main__":
+    unittest.main()